@@ -0,0 +1,89 @@
+"""Persistent cache of LLM answers to help-document procedure questions."""
+import hashlib
+import logging
+import re
+import time
+
+from erp_cache import SQLiteBackend
+
+logger = logging.getLogger(__name__)
+
+GENERAL_PROCEDURE = "__general__"
+_NON_WORD_RE = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize_leave_phrase(phrase):
+    """Normalise a leave-type phrase: "Sick  Leave?" and "sick" give ``"sick"``."""
+    text = _NON_WORD_RE.sub(" ", (phrase or "").lower())
+    words = text.split()
+    while words and words[-1] in ("leave", "leaves"):
+        words.pop()
+    return " ".join(words) or GENERAL_PROCEDURE
+
+
+class AnswerCache:
+    """LLM answers keyed on the help document, the question and the model.
+
+    Procedure answers depend only on the help document, the normalised
+    leave-type phrase and the retrieval settings that choose the document
+    excerpts in the prompt, so they are stored under a key built from a
+    hash of the document, the model name, ``retrieval`` and that phrase.
+    Editing ``leave_help.txt`` or the retrieval settings changes the key,
+    so stale answers are never served again and age out through the
+    backend's LRU eviction.
+    """
+
+    def __init__(self, backend, help_doc, model, ttl=30 * 24 * 3600, retrieval=()):
+        self.backend = backend
+        self.model = model
+        self.ttl = ttl
+        self.retrieval = tuple(retrieval)
+        self.doc_hash = hashlib.sha256(help_doc.encode("utf-8")).hexdigest()[:16]
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def sqlite(cls, path, help_doc, model, max_bytes=8 * 1024 * 1024, **kwargs):
+        """Build a cache stored in the ``answers`` table of ``path``."""
+        return cls(SQLiteBackend(path, max_bytes=max_bytes, table="answers"), help_doc, model, **kwargs)
+
+    def _key(self, question):
+        return ("answer", self.doc_hash, self.model, self.retrieval, question)
+
+    def get(self, question):
+        """Return the cached answer for a normalised ``question`` or ``None``."""
+        try:
+            entry = self.backend.get(self._key(question))
+        except Exception:
+            logger.exception("Answer cache read failed")
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def put(self, question, answer):
+        """Store ``answer`` for a normalised ``question``."""
+        now = time.time()
+        try:
+            self.backend.set(self._key(question), answer, now, now + self.ttl)
+        except Exception:
+            logger.exception("Answer cache write failed")
+
+    def warm_up(self, questions, compute):
+        """Precompute answers for ``questions`` that are not cached yet.
+
+        ``compute(question)`` returns the answer text, or a falsy value when
+        there is nothing worth caching. Returns the number of new answers.
+        """
+        added = 0
+        for question in questions:
+            if self.backend.get(self._key(question)) is not None:
+                continue
+            answer = compute(question)
+            if answer:
+                self.put(question, answer)
+                added += 1
+        logger.info("Answer cache warm-up added %d answer(s)", added)
+        return added
@@ -0,0 +1,189 @@
+"""Answer a JSONL stream of questions for many employees.
+
+Each input line is a JSON object with ``emp_id`` and ``question`` (any
+``id`` is copied to the output). Every record is answered by the same
+engine as the chat, and one JSON line per record is written as soon as it
+is answered, holding the ``reply``, the matched ``intent``, any ``warnings``
+and the ``seconds`` it took. ``line`` gives the input line number, since
+results from different employees can come out of order. Records that
+cannot be answered get an ``error`` instead, and make the exit status 1.
+
+Consecutive records of the same employee form a group that shares one
+conversation, so that employee's ERP data is fetched once; sort the input
+by ``emp_id`` to get the most out of this. Records within a group are
+answered independently, in input order. Groups are answered by a bounded
+pool of ``--workers`` threads, and the input is read only as fast as they
+take it, so memory use does not grow with the size of the input.
+
+    python batch.py [questions.jsonl] [-o answers.jsonl] [--workers 8]
+"""
+import argparse
+import functools
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import Conversation, get_assistant
+
+logger = logging.getLogger(__name__)
+
+
+def read_records(lines):
+    """Yield ``(line_number, record)`` for the input; ``record`` is an error string for bad lines."""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            yield number, f"invalid JSON: {exc}"
+            continue
+        if not isinstance(record, dict) or not record.get("question") or record.get("emp_id") in (None, ""):
+            yield number, "each record needs emp_id and question"
+            continue
+        yield number, record
+
+
+def employee_groups(records, max_group=500):
+    """Group consecutive records by employee, at most ``max_group`` records per group.
+
+    Yields ``(emp_id, [(line_number, record), ...])``; ``emp_id`` is
+    ``None`` for a group of invalid lines.
+    """
+    def key(item):
+        record = item[1]
+        return str(record["emp_id"]) if isinstance(record, dict) else None
+
+    for emp_id, items in itertools.groupby(records, key=key):
+        while True:
+            group = list(itertools.islice(items, max_group))
+            if not group:
+                break
+            yield emp_id, group
+
+
+class ResultWriter:
+    """Write result records as JSON lines from any thread, and count them."""
+
+    def __init__(self, out):
+        self.out = out
+        self.lock = threading.Lock()
+        self.answered = 0
+        self.failed = 0
+
+    def write(self, result):
+        line = json.dumps(result, ensure_ascii=False)
+        with self.lock:
+            if "error" in result:
+                self.failed += 1
+            else:
+                self.answered += 1
+            self.out.write(line + "\n")
+            self.out.flush()
+
+
+def answer_group(assistant, emp_id, group, writer, written=None):
+    """Answer one employee's records in a single conversation.
+
+    The line numbers written so far are added to ``written``, if given.
+    """
+    written = set() if written is None else written
+    conversation = Conversation(emp_id) if emp_id is not None else None
+    for number, record in group:
+        started = time.perf_counter()
+        if conversation is None:
+            writer.write({"line": number, "error": record})
+            written.add(number)
+            continue
+        result = {"line": number, "emp_id": record["emp_id"], "question": record["question"]}
+        if "id" in record:
+            result["id"] = record["id"]
+        try:
+            turn = assistant.respond(conversation, str(record["question"]))
+        except Exception as exc:
+            logger.exception("Failed to answer line %d for Emp_ID=%s", number, emp_id)
+            result["error"] = str(exc) or type(exc).__name__
+        else:
+            result.update(intent=turn.intent or "llm_fallback", reply=turn.reply, warnings=turn.warnings)
+        result["seconds"] = round(time.perf_counter() - started, 4)
+        writer.write(result)
+        written.add(number)
+        conversation.clear_history()
+
+
+def fail_group(emp_id, group, writer, written, exc):
+    """Write an error result for every record of ``group`` not in ``written``."""
+    logger.error("Failed to answer the records of Emp_ID=%s", emp_id, exc_info=exc)
+    for number, record in group:
+        if number in written:
+            continue
+        result = {"line": number, "error": str(exc) or type(exc).__name__}
+        if isinstance(record, dict):
+            result.update(emp_id=record["emp_id"], question=record["question"])
+            if "id" in record:
+                result["id"] = record["id"]
+        try:
+            writer.write(result)
+        except Exception:
+            logger.exception("Failed to write the error result for line %d", number)
+
+
+def run(lines, out, workers=8, max_group=500):
+    """Answer every record in ``lines`` and write the results to ``out``; returns the writer."""
+    assistant = get_assistant()
+    writer = ResultWriter(out)
+    # Groups waiting for a worker are bounded, which keeps the reader from
+    # running ahead of the pool.
+    slots = threading.BoundedSemaphore(2 * workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        for emp_id, group in employee_groups(read_records(lines), max_group):
+            slots.acquire()
+            written = set()
+            future = executor.submit(answer_group, assistant, emp_id, group, writer, written)
+            future.add_done_callback(functools.partial(_group_done, slots, emp_id, group, writer, written))
+    return writer
+
+
+def _group_done(slots, emp_id, group, writer, written, future):
+    # Errors outside respond() (e.g. writing a result) would otherwise be
+    # lost with the future, leaving the group's remaining lines unanswered.
+    try:
+        exc = future.exception()
+        if exc is not None:
+            fail_group(emp_id, group, writer, written, exc)
+    finally:
+        slots.release()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="JSONL file of {emp_id, question} records (default: stdin)")
+    parser.add_argument("-o", "--output", help="file for the JSONL results (default: stdout)")
+    parser.add_argument("--workers", type=int, default=8, help="employees answered concurrently")
+    parser.add_argument("--max-group", type=int, default=500, help="records answered per conversation")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        writer = run(source, out, workers=args.workers, max_group=args.max_group)
+    finally:
+        if args.input:
+            source.close()
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - started
+    total = writer.answered + writer.failed
+    logger.info("Batch done: %d records (%d failed) in %.1fs, %.1f records/s",
+                total, writer.failed, elapsed, total / elapsed if elapsed else 0.0)
+    return 1 if writer.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
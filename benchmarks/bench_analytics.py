@@ -0,0 +1,77 @@
+"""Micro-benchmark for the leave analytics (``leave_analytics.py``).
+
+Times building :class:`~leave_analytics.LeaveAnalytics` from the
+:class:`~leave_history.LeaveHistory` of mock ERP histories of growing size
+and computing all three aggregates on it, against plain Python loops that
+parse the dates of every record with ``strptime``.
+
+    python benchmarks/bench_analytics.py [--sizes 40,500,5000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import timeit
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from leave_analytics import LeaveAnalytics  # noqa: E402
+from leave_history import LeaveHistory  # noqa: E402
+import mock_erp  # noqa: E402
+
+YEAR = date.today().year
+
+
+def _parse(value):
+    return datetime.strptime(value.split("T")[0], "%Y-%m-%d").date() if value else None
+
+
+def loop_aggregates(records):
+    """All three aggregates as per-record Python loops."""
+    by_type = defaultdict(float)
+    months = [0.0] * 12
+    active = []
+    for r in records:
+        status = r.get("LeaveGrid_Status", "").lower()
+        start, end = _parse(r.get("LeaveGrid_Ela_FromDate_D")), _parse(r.get("LeaveGrid_Ela_ToDate_D"))
+        if status == "approved" and start and start.year == YEAR:
+            by_type[r["LeaveGrid_Lvm_Description_V"]] += float(r["LeaveGrid_Ela_Tot"])
+            months[start.month - 1] += float(r["LeaveGrid_Ela_Tot"])
+        if status in ("approved", "pending") and start and end:
+            active.append((start, end))
+    active.sort()
+    pairs, latest = 0, None
+    for start, end in active:
+        if latest is not None and start <= latest + timedelta(days=1):
+            pairs += 1
+        latest = end if latest is None else max(latest, end)
+    return by_type, months, pairs
+
+
+def array_aggregates(analytics):
+    return (analytics.days_by_type(YEAR), analytics.monthly_usage(YEAR),
+            analytics.adjacent_pairs())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="40,500,5000", help="leave applications per history")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # NumPy's first calls include one-off setup costs.
+    array_aggregates(LeaveAnalytics(mock_erp.leave_history(7000, 40, 8)))
+    print("{:>7} {:>12} {:>14} {:>12}   (ms)".format("records", "build", "aggregates", "loops"))
+    for size in (int(s) for s in args.sizes.split(",") if s):
+        records = mock_erp.leave_history(7001, size, 8)
+        history = LeaveHistory(records)
+        build = timeit.timeit(lambda: LeaveAnalytics(history), number=args.repeat) / args.repeat
+        analytics = LeaveAnalytics(history)
+        arrays = timeit.timeit(lambda: array_aggregates(analytics), number=args.repeat) / args.repeat
+        loops = timeit.timeit(lambda: loop_aggregates(records), number=args.repeat) / args.repeat
+        print(f"{size:>7} {build * 1000:12.3f} {arrays * 1000:14.3f} {loops * 1000:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""End-to-end benchmark of ``app.py`` against local mock backends.
+
+Starts :mod:`mock_erp` on a free port, replaces ``openai.OpenAI`` with the
+deterministic :mod:`fake_llm` client and drives the app through
+Streamlit's ``AppTest``: each session loads a distinct employee, then asks
+a fixed mix of questions. Reports bootstrap time, per-intent turn latency,
+LLM calls and tokens, ERP requests and memory. No network access needed.
+
+    python benchmarks/bench_app.py [--sessions N] [--latency S] [--error-rate P] [--json]
+
+Extra app settings can be given as ``--secret NAME=JSON``, e.g.
+``--secret LLM_STREAMING=false``.
+"""
+import argparse
+import contextlib
+import json
+import logging
+import os
+import resource
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+APP_PATH = os.path.join(ROOT, "app.py")
+
+import mock_erp  # noqa: E402
+from fake_llm import FakeOpenAI  # noqa: E402
+
+# (question, what it exercises). The intent actually matched is reported
+# from the app's own metrics.
+QUESTIONS = [
+    ("what is my leave balance", "balance"),
+    ("when was my last leave", "history"),
+    ("show me my last approved leave", "history"),
+    ("how many leaves did i take this year", "history"),
+    ("how do i apply for sick leave", "procedure"),
+    ("how do i apply for leave", "procedure"),
+    ("can i apply for 3 days annual leave", "balance"),
+    ("draft a letter requesting to approve my leave", "letter"),
+    ("who is my manager", "profile"),
+    ("what is my department", "profile"),
+    ("do i have sick leave", "balance"),
+    ("what is my leave policy", "policy"),
+    ("am i eligible for an air ticket", "balance"),
+    ("are public holidays counted in my leave days?", "fallback"),
+    ("which leave types can I still take before december?", "fallback+tool"),
+]
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of ``values`` (``None`` when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def latency_summary(values):
+    return {
+        "n": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+        "mean": statistics.fmean(values) if values else None,
+    }
+
+
+def rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def shared_script_cache():
+    """Patch ``AppTest`` sessions to share one compiled copy of the script.
+
+    A Streamlit server compiles ``app.py`` once for all sessions, but every
+    ``AppTest`` has its own cache and would recompile it (and ``ast.parse``
+    is not safe to call from several threads on Python 3.11).
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    original = ScriptCache.get_bytecode
+    shared = ScriptCache()
+    lock = threading.Lock()
+
+    def get_bytecode(self, script_path):
+        with lock:
+            return original(shared, script_path)
+
+    return mock.patch.object(ScriptCache, "get_bytecode", get_bytecode)
+
+
+@contextlib.contextmanager
+def concurrent_apptest(secrets):
+    """Allow ``AppTest`` sessions to run from several threads at once.
+
+    Each ``AppTest.run`` installs a mock ``Runtime`` singleton and its own
+    ``st.secrets`` and restores the previous ones when done, so a run
+    finishing on one thread would pull both out from under a run still
+    going on another. Inside this context the most recent mock runtime
+    stays visible, and the secrets restored in between are ``secrets``
+    (the same values every session uses).
+    """
+    import streamlit as st
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.secrets import Secrets
+
+    last = []
+
+    def instance(cls):
+        current = cls.__dict__.get("_instance")
+        if current is not None:
+            last[:] = [current]
+            return current
+        if last:
+            return last[0]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    def exists(cls):
+        return cls.__dict__.get("_instance") is not None or bool(last)
+
+    shared_secrets = Secrets()
+    shared_secrets._secrets = {"OPENAI_API_KEY": "benchmark", **secrets}
+    with mock.patch.object(Runtime, "instance", classmethod(instance)), \
+            mock.patch.object(Runtime, "exists", classmethod(exists)), \
+            mock.patch.object(st, "secrets", shared_secrets):
+        yield
+
+
+@contextlib.contextmanager
+def backends(erp_config=None, llm_latency=0.0, llm_token_latency=0.0):
+    """Run the mock ERP and patch in the fake LLM; yields the :class:`MockERP`."""
+    FakeOpenAI.reset(llm_latency, llm_token_latency)
+    cwd = os.getcwd()
+    # The app reads leave_help.txt relative to the working directory.
+    os.chdir(ROOT)
+    try:
+        with mock_erp.MockERP(erp_config) as erp, mock.patch("openai.OpenAI", FakeOpenAI), \
+                shared_script_cache():
+            yield erp
+    finally:
+        os.chdir(cwd)
+
+
+class ChatSession:
+    """One simulated browser session of the app, driven through ``AppTest``."""
+
+    def __init__(self, emp_id, secrets, timeout=120, path=APP_PATH):
+        from streamlit.testing.v1 import AppTest
+
+        self.emp_id = str(emp_id)
+        self.app = AppTest.from_file(path, default_timeout=timeout)
+        self.app.secrets["OPENAI_API_KEY"] = "benchmark"
+        for name, value in secrets.items():
+            self.app.secrets[name] = value
+        self.app.query_params["emp_id"] = self.emp_id
+        self.last_error = None
+
+    def _outcome(self):
+        if self.app.exception:
+            self.last_error = self.app.exception[0].message
+            return "error"
+        if self.app.warning:
+            return "degraded"
+        return "ok"
+
+    def start(self):
+        """Load the session (greeting and bootstrap); returns ``(seconds, outcome)``."""
+        started = time.perf_counter()
+        self.app.run()
+        return time.perf_counter() - started, self._outcome()
+
+    def ask(self, question):
+        """Send one chat message; returns ``(seconds, outcome)``."""
+        self.app.chat_input[0].set_value(question)
+        started = time.perf_counter()
+        self.app.run()
+        return time.perf_counter() - started, self._outcome()
+
+    def last_reply(self):
+        messages = self.app.chat_message
+        if not messages or not messages[-1].markdown:
+            return ""
+        return messages[-1].markdown[-1].value
+
+
+def _matched_intent(before, after):
+    changed = [key[0] for key, value in after.items() if value != before.get(key, 0)]
+    return changed[0] if len(changed) == 1 else "?"
+
+
+def run_benchmark(args):
+    from metrics import INTENT_MATCHES
+
+    secrets = {"ERP_CACHE_BACKEND": "memory", "METRICS_PORT": 0, "METRICS_PATH": ""}
+    for item in args.secret:
+        name, _, value = item.partition("=")
+        secrets[name] = json.loads(value)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    bootstrap = []
+    turns = defaultdict(list)
+    outcomes = defaultdict(int)
+    questions = QUESTIONS[:args.questions] if args.questions else QUESTIONS
+    with backends(mock_erp.config_from_args(args), args.llm_latency, args.llm_token_latency) as erp:
+        secrets["ERP_BASE_URL"] = erp.url
+        rss_start = rss_mb()
+        # The first run in a process imports modules and builds shared resources.
+        warm = ChatSession(args.first_emp_id - 1, secrets)
+        process_start, _ = warm.start()
+        erp.reset_counts()
+        FakeOpenAI.reset(args.llm_latency, args.llm_token_latency)
+
+        for n in range(args.sessions):
+            session = ChatSession(args.first_emp_id + n, secrets)
+            seconds, outcome = session.start()
+            bootstrap.append(seconds)
+            outcomes[outcome] += 1
+            for question, _ in questions:
+                before = INTENT_MATCHES.samples()
+                seconds, outcome = session.ask(question)
+                turns[_matched_intent(before, INTENT_MATCHES.samples())].append(seconds)
+                outcomes[outcome] += 1
+        erp_requests = dict(erp.requests)
+        erp_errors = dict(erp.errors)
+
+    calls = FakeOpenAI.calls
+    report = {
+        "sessions": args.sessions,
+        "questions_per_session": len(questions),
+        "first_run_seconds": process_start,
+        "bootstrap": latency_summary(bootstrap),
+        "turns": {intent: latency_summary(v) for intent, v in sorted(turns.items())},
+        "all_turns": latency_summary([s for v in turns.values() for s in v]),
+        "outcomes": dict(outcomes),
+        "llm": {
+            "calls": len(calls),
+            "calls_per_session": len(calls) / args.sessions if args.sessions else 0,
+            "streamed": sum(c["stream"] for c in calls),
+            "tool_call_replies": sum(1 for c in calls if c["tool_calls"]),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "completion_tokens": sum(c["completion_tokens"] for c in calls),
+        },
+        "erp": {"requests": erp_requests, "errors": erp_errors},
+        "memory": {"rss_start_mb": rss_start, "rss_peak_mb": rss_mb()},
+    }
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        report["memory"].update(traced_current_mb=current / 2 ** 20, traced_peak_mb=peak / 2 ** 20)
+        tracemalloc.stop()
+    return report
+
+
+def _ms(value):
+    return "     -" if value is None else f"{value * 1000:6.1f}"
+
+
+def print_report(report):
+    print(f"{report['sessions']} session(s) x {report['questions_per_session']} questions")
+    print(f"first run in process: {report['first_run_seconds'] * 1000:.0f} ms (imports, shared resources)")
+    print("\n{:<24} {:>5} {:>6} {:>6} {:>6} {:>6}   (ms)".format("", "n", "p50", "p95", "p99", "max"))
+    rows = [("bootstrap", report["bootstrap"])] + list(report["turns"].items()) + [("all turns", report["all_turns"])]
+    for name, s in rows:
+        print(f"{name:<24} {s['n']:>5} {_ms(s['p50'])} {_ms(s['p95'])} {_ms(s['p99'])} {_ms(s['max'])}")
+    llm = report["llm"]
+    print(f"\noutcomes: {report['outcomes']}")
+    print(f"LLM: {llm['calls']} calls ({llm['calls_per_session']:.1f}/session, {llm['streamed']} streamed, "
+          f"{llm['tool_call_replies']} tool-call replies), "
+          f"{llm['prompt_tokens']} prompt + {llm['completion_tokens']} completion tokens")
+    print(f"ERP requests: {report['erp']['requests']}  injected errors: {report['erp']['errors']}")
+    mem = report["memory"]
+    line = f"memory: RSS {mem['rss_start_mb']:.0f} -> peak {mem['rss_peak_mb']:.0f} MB"
+    if "traced_peak_mb" in mem:
+        line += f", traced peak {mem['traced_peak_mb']:.1f} MB"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=0, help="use only the first N questions of the mix")
+    parser.add_argument("--first-emp-id", type=int, default=1001)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds before each fake LLM reply")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0, help="seconds between streamed words")
+    parser.add_argument("--secret", action="append", default=[], metavar="NAME=JSON")
+    parser.add_argument("--tracemalloc", action="store_true", help="also trace Python allocations (slower)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's INFO logging")
+    mock_erp.add_arguments(parser)
+    args = parser.parse_args()
+    # Configured before the app's own basicConfig call, which then does nothing.
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    report = run_benchmark(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark of the monthly report pipeline (``report.py``) against the mock ERP.
+
+Builds the report for ``--employees`` mock employees once per
+``--workers`` value, each time with a cold ERP cache, and reports the run
+time, the employees per second and the ERP requests made. Then it
+simulates a crash after half of the batches and shows that a rerun only
+fetches the remaining employees.
+
+The mock ERP runs in its own process here: serving thousands of requests
+a second from this one would make the benchmark measure the GIL rather
+than the report's concurrency. ``--trace-memory`` also reports the peak
+memory traced during each run, which slows the run down.
+
+    python benchmarks/bench_report.py [--employees 1000] [--workers 4,16,64] [--rate 0] [--latency 0.05]
+"""
+import argparse
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest import mock
+
+import mock_erp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+# mock_erp options forwarded to its process.
+MOCK_OPTIONS = ("latency", "jitter", "history_latency", "summary_latency", "error_rate", "history_size",
+                "leave_types", "profile_padding", "seed")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock_erp(args):
+    """Start ``mock_erp.py`` in a subprocess; return ``(process, url)``."""
+    port = _free_port()
+    command = [sys.executable, os.path.join(HERE, "mock_erp.py"), "--port", str(port)]
+    for name in MOCK_OPTIONS:
+        value = getattr(args, name)
+        if value is not None:
+            command += ["--" + name.replace("_", "-"), str(value)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    process.stdout.readline()  # "Mock ERP listening on ..."
+    return process, f"http://127.0.0.1:{port}"
+
+
+def erp_requests():
+    """Return the ERP requests sent so far, from the client's request histogram."""
+    from metrics import ERP_REQUEST_SECONDS
+
+    return sum(count for key, (_, _, count) in ERP_REQUEST_SECONDS.samples().items() if key[-1] != "circuit_open")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=1000)
+    parser.add_argument("--first-emp-id", type=int, default=10000)
+    parser.add_argument("--workers", default="4,16,64", help="comma-separated worker counts to compare")
+    parser.add_argument("--rate", type=float, default=0, help="ERP requests per second (0 for no limit)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--cache-entries", type=int, default=2000, help="ERP_CACHE_MAX_ENTRIES")
+    parser.add_argument("--trace-memory", action="store_true", help="also report the traced peak memory")
+    mock_erp.add_arguments(parser)
+    parser.set_defaults(latency=0.05)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+
+    worker_counts = [int(w) for w in args.workers.split(",") if w]
+    ids = [str(args.first_emp_id + i) for i in range(args.employees)]
+    process, url = start_mock_erp(args)
+    try:
+        secrets = Secrets()
+        secrets._secrets = {
+            "OPENAI_API_KEY": "benchmark", "ERP_BASE_URL": url, "ERP_CACHE_BACKEND": "memory",
+            "METRICS_PORT": 0, "METRICS_PATH": "", "ERP_POOL_SIZE": max(worker_counts),
+            "ERP_CACHE_MAX_ENTRIES": args.cache_entries, "ERP_RATE_LIMIT": args.rate,
+        }
+        with mock.patch.object(st, "secrets", secrets), tempfile.TemporaryDirectory() as tmp:
+            import report
+            import resources
+
+            def build(employee_ids, out):
+                resources.erp_cache.clear()
+                before = erp_requests()
+                started = time.perf_counter()
+                checkpoint = report.run(iter(employee_ids), out, workers=workers, batch_size=args.batch_size,
+                                        fmt=args.format)
+                return checkpoint, time.perf_counter() - started, erp_requests() - before
+
+            print(f"{args.employees} employees, ERP latency {args.latency:.2f}s, rate limit "
+                  f"{args.rate or 'none'}, batches of {args.batch_size}\n")
+            header = "{:>8} {:>9} {:>12} {:>13}".format("workers", "seconds", "employees/s", "ERP requests")
+            print(header + (" {:>14}".format("traced peak MB") if args.trace_memory else ""))
+            for workers in worker_counts:
+                if args.trace_memory:
+                    tracemalloc.start()
+                _, elapsed, requests = build(ids, os.path.join(tmp, f"w{workers}"))
+                line = f"{workers:>8} {elapsed:9.2f} {args.employees / elapsed:12.1f} {requests:>13}"
+                if args.trace_memory:
+                    line += f" {tracemalloc.get_traced_memory()[1] / 1e6:14.1f}"
+                    tracemalloc.stop()
+                print(line)
+
+            out = os.path.join(tmp, "resume")
+            workers = max(worker_counts)
+            half = (args.employees // args.batch_size // 2) * args.batch_size
+            # A crash after the first half of the batches leaves their checkpoint behind.
+            _, _, first = build(ids[:half], out)
+            checkpoint, _, rerun = build(ids, out)
+            print(f"\nresume: first run {half} employees ({first} ERP requests), rerun fetched {rerun} ERP "
+                  f"requests, checkpoint has {checkpoint['employees']} employees in {checkpoint['batches']} batches")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Micro-benchmark for the intent router.
+
+Compares the precompiled router with the per-keyword ``fuzz.partial_ratio``
+loop it replaced, and shows how routing cost grows as synthetic fuzzy
+intents are added.
+
+    python benchmarks/bench_router.py [--repeat N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapidfuzz import fuzz  # noqa: E402
+
+from intent_router import DEFAULT_RULES, IntentRouter, Rule  # noqa: E402
+from leave_type_index import LeaveTypeIndex  # noqa: E402
+
+MESSAGES = [
+    "how do i apply for sick leave",
+    "can i apply for 3 days annual leave",
+    "what is my leave balance",
+    "how many sick leaves are left",
+    "show me my last approved leave",
+    "who is my manager",
+    "what is my visa type",
+    "tell me something about the company holidays",
+    "draft a letter for ref 1234",
+]
+CONTEXT = {"leave_index": LeaveTypeIndex([{"Lvm_Description_V": "ANNUAL LEAVE"}, {"Lvm_Description_V": "SICK LEAVE"}])}
+
+
+def legacy_route(rules, text, context):
+    """The original approach: every rule checked one keyword at a time."""
+    for rule in rules:
+        hit = False
+        match = rule.pattern.search(text) if rule.pattern is not None else None
+        if match or (rule.substrings and any(s in text for s in rule.substrings)):
+            hit = True
+        elif rule.keywords:
+            hit = any(fuzz.partial_ratio(text, kw) >= rule.threshold for kw in rule.keywords)
+        elif rule.pattern is None and not rule.substrings:
+            hit = True
+        if hit and rule.exclude is not None and rule.exclude.search(text):
+            hit = False
+        if hit and rule.guard is not None and not rule.guard(text, match, context):
+            hit = False
+        if hit:
+            return rule.name
+    return None
+
+
+def synthetic_rules(n):
+    return tuple(
+        Rule(f"synthetic_{i}", keywords=(f"synthetic question number {i}", f"another phrasing {i} of it"))
+        for i in range(n)
+    )
+
+
+# Messages that fall through every rule pay for the full keyword table.
+NO_MATCH = "tell me something about the company holidays"
+
+
+def per_call_us(fn, repeat, messages=MESSAGES):
+    total = timeit.timeit(lambda: [fn(m) for m in messages], number=repeat)
+    return total / (repeat * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    router = IntentRouter(DEFAULT_RULES)
+    for m in MESSAGES:
+        legacy = legacy_route(DEFAULT_RULES, m, CONTEXT)
+        route = router.route(m, CONTEXT)
+        assert legacy == (route.intent if route else None), m
+
+    print("microseconds per routed message (mix / fall-through)")
+    print(f"{'extra intents':>14} {'legacy mix':>12} {'router mix':>12} {'legacy miss':>12} {'router miss':>12}")
+    for extra in (0, 50, 200):
+        rules = DEFAULT_RULES[:-5] + synthetic_rules(extra) + DEFAULT_RULES[-5:]
+        router = IntentRouter(rules)
+        legacy = lambda m: legacy_route(rules, m, CONTEXT)  # noqa: E731
+        routed = lambda m: router.route(m, CONTEXT)  # noqa: E731
+        print(f"{extra:>14} {per_call_us(legacy, args.repeat):>12.1f} {per_call_us(routed, args.repeat):>12.1f}"
+              f" {per_call_us(legacy, args.repeat, [NO_MATCH]):>12.1f}"
+              f" {per_call_us(routed, args.repeat, [NO_MATCH]):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Load test of the HTTP service (``service.py``) against local mock backends.
+
+Runs the service with uvicorn on a free port, with :mod:`mock_erp` as the
+ERP and the fake ``openai.AsyncOpenAI`` client as the LLM, then has
+``--users`` concurrent clients each hold a conversation for one employee
+and send ``--turns`` questions from the ``bench_app`` mix to ``POST /chat``.
+Reports throughput and latency per intent.
+
+    python benchmarks/bench_service.py [--users 16] [--turns 15] [--llm-latency 0.3]
+"""
+import argparse
+import json
+import logging
+import socket
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from bench_app import QUESTIONS, backends, latency_summary, rss_mb
+from fake_llm import FakeAsyncOpenAI, FakeOpenAI
+import mock_erp
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def post(url, payload, timeout):
+    request = urllib.request.Request(url, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def run_user(url, emp_id, questions, timeout, results):
+    session_id = None
+    for question, _ in questions:
+        started = time.perf_counter()
+        try:
+            reply = post(url, {"emp_id": emp_id, "message": question, "session_id": session_id}, timeout)
+        except Exception:
+            logging.exception("Request failed for emp_id %s", emp_id)
+            results["error"].append(time.perf_counter() - started)
+            continue
+        session_id = reply["session_id"]
+        results[reply["intent"]].append(time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=16, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=len(QUESTIONS), help="questions per conversation")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--first-emp-id", type=int, default=7001)
+    parser.add_argument("--workers", type=int, default=16, help="SERVICE_WORKERS")
+    parser.add_argument("--json", action="store_true")
+    mock_erp.add_arguments(parser)
+    parser.set_defaults(latency=0.05)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    import streamlit as st
+    import uvicorn
+    from streamlit.runtime.secrets import Secrets
+
+    questions = (QUESTIONS * (args.turns // len(QUESTIONS) + 1))[:args.turns]
+    results = defaultdict(list)
+    with backends(mock_erp.config_from_args(args), args.llm_latency) as erp:
+        secrets = Secrets()
+        secrets._secrets = {
+            "OPENAI_API_KEY": "benchmark", "ERP_BASE_URL": erp.url, "ERP_CACHE_BACKEND": "memory",
+            "METRICS_PORT": 0, "METRICS_PATH": "", "SERVICE_WORKERS": args.workers,
+        }
+        with mock.patch.object(st, "secrets", secrets), mock.patch("openai.AsyncOpenAI", FakeAsyncOpenAI):
+            import service
+
+            port = free_port()
+            server = uvicorn.Server(uvicorn.Config(service.app, port=port, log_level="warning"))
+            thread = threading.Thread(target=server.run, daemon=True)
+            thread.start()
+            while not server.started:
+                time.sleep(0.01)
+            url = f"http://127.0.0.1:{port}/chat"
+            # Import-time and first-request costs are not part of the measurement.
+            post(url, {"emp_id": args.first_emp_id - 1, "message": "who is my manager"}, args.timeout)
+            erp.reset_counts()
+            FakeOpenAI.reset(args.llm_latency)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.users) as pool:
+                for user in range(args.users):
+                    pool.submit(run_user, url, args.first_emp_id + user, questions, args.timeout, results)
+            elapsed = time.perf_counter() - started
+            server.should_exit = True
+            thread.join()
+        erp_requests = dict(erp.requests)
+
+    all_turns = [s for intent, v in results.items() if intent != "error" for s in v]
+    report = {
+        "users": args.users,
+        "elapsed_seconds": elapsed,
+        "requests_per_second": len(all_turns) / elapsed if elapsed else 0.0,
+        "errors": len(results.get("error", [])),
+        "turns": latency_summary(all_turns),
+        "by_intent": {i: latency_summary(v) for i, v in sorted(results.items()) if i != "error"},
+        "llm_calls": len(FakeOpenAI.calls),
+        "erp_requests": erp_requests,
+        "rss_peak_mb": rss_mb(),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{args.users} users x {args.turns} questions in {elapsed:.2f}s: "
+          f"{report['requests_per_second']:.1f} req/s, {report['errors']} errors")
+    print("\n{:<24} {:>5} {:>7} {:>7} {:>7}   (ms)".format("", "n", "p50", "p95", "max"))
+    for name, s in list(report["by_intent"].items()) + [("all", report["turns"])]:
+        print(f"{name:<24} {s['n']:>5} {s['p50'] * 1000:7.1f} {s['p95'] * 1000:7.1f} {s['max'] * 1000:7.1f}")
+    print(f"\nLLM calls: {report['llm_calls']}  ERP requests: {erp_requests}  RSS peak: {rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark of loading a manager's team (``team.py``) against local mock backends.
+
+Runs :mod:`mock_erp` with ``--latency`` seconds per call, resolves the
+direct reports of ``--manager`` among ``--candidates`` employee IDs by
+their reporting manager's name, then loads every report's leave types,
+history and balances through the team pipeline. Reports the time to
+resolve the team, to the first and the last member, and the ERP requests
+made. With ``--baseline`` the same team is also loaded one member at a
+time with ``engine.load_employee_data``, as a session per employee would.
+
+    python benchmarks/bench_team.py [--manager 7000] [--candidates 100] [--latency 0.2] [--baseline]
+"""
+import argparse
+import json
+import logging
+import time
+from unittest import mock
+
+from bench_app import backends
+import mock_erp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--manager", type=int, default=7000)
+    parser.add_argument("--candidates", type=int, default=2 * mock_erp.TEAM_SIZE,
+                        help="employee IDs from --manager on scanned for direct reports")
+    parser.add_argument("--workers", type=int, default=32, help="TEAM_WORKERS")
+    parser.add_argument("--baseline", action="store_true", help="also load the team one member at a time")
+    parser.add_argument("--json", action="store_true")
+    mock_erp.add_arguments(parser)
+    parser.set_defaults(latency=0.2)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+
+    report = {}
+    with backends(mock_erp.config_from_args(args)) as erp:
+        secrets = Secrets()
+        secrets._secrets = {
+            "OPENAI_API_KEY": "benchmark", "ERP_BASE_URL": erp.url, "ERP_CACHE_BACKEND": "memory",
+            "METRICS_PORT": 0, "METRICS_PATH": "", "TEAM_WORKERS": args.workers, "ERP_POOL_SIZE": args.workers,
+            "TEAM_CANDIDATE_IDS": list(range(args.manager, args.manager + args.candidates)),
+        }
+        with mock.patch.object(st, "secrets", secrets):
+            import engine
+            import resources
+            import team
+
+            erp.reset_counts()
+            started = time.perf_counter()
+            reports = team.direct_reports(args.manager)
+            resolved = time.perf_counter() - started
+            first = None
+            members = []
+            for member in team.load_team(reports):
+                first = first or time.perf_counter() - started
+                members.append(member)
+            report["team"] = {
+                "members": len(members),
+                "resolve_seconds": resolved,
+                "first_member_seconds": first,
+                "total_seconds": time.perf_counter() - started,
+                "incomplete": sum(bool(m.unavailable) for m in members),
+                "erp_requests": dict(erp.requests),
+            }
+            started = time.perf_counter()
+            start, end = team.next_week()
+            away = team.availability(members, start, end)
+            types, rows = team.balance_table(members)
+            report["team"]["aggregate_ms"] = (time.perf_counter() - started) * 1000
+            report["team"]["away_next_week"] = int(away.off.any(axis=1).sum())
+
+            if args.baseline:
+                resources.erp_cache.clear()
+                erp.reset_counts()
+                started = time.perf_counter()
+                for emp_id in reports:
+                    engine.load_employee_data(emp_id, ("profile",) + team.TEAM_DATASETS)
+                report["one_at_a_time"] = {
+                    "total_seconds": time.perf_counter() - started,
+                    "erp_requests": dict(erp.requests),
+                }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    t = report["team"]
+    print(f"{t['members']} direct reports of {args.manager}, ERP latency {args.latency:.2f}s, "
+          f"{args.workers} workers")
+    print(f"team pipeline:  resolved in {t['resolve_seconds']:.2f}s, first member at "
+          f"{t['first_member_seconds'] or 0:.2f}s, all at {t['total_seconds']:.2f}s "
+          f"({t['incomplete']} incomplete), ERP requests {t['erp_requests']}")
+    print(f"aggregates:     {t['away_next_week']} away next week, balances of {len(types)} leave types "
+          f"in {t['aggregate_ms']:.1f} ms")
+    if "one_at_a_time" in report:
+        b = report["one_at_a_time"]
+        print(f"one at a time:  {b['total_seconds']:.2f}s, ERP requests {b['erp_requests']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Evaluate intent routing with and without the local classifier.
+
+Routes every labelled message of an evaluation file (JSONL of
+``{"text", "intent"}``, ``"llm_fallback"`` for questions the LLM should
+answer) through the rules alone and through the rules plus the TF-IDF
+classifier trained on ``intent_examples.jsonl``. Reports for each:
+
+* accuracy over all messages;
+* the share of messages sent to the LLM, and how many of the rules-only
+  LLM calls the classifier avoids;
+* wrong local answers, i.e. messages answered by the wrong handler or
+  answered locally when they needed the LLM.
+
+``--sweep`` repeats the classifier run for several thresholds.
+
+    python benchmarks/eval_intents.py [--threshold 0.5] [--sweep 0.3,0.4,0.5,0.6] [--verbose]
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from intent_classifier import FALLBACK, load_examples  # noqa: E402
+from intent_router import build_default_router  # noqa: E402
+from leave_type_index import LeaveTypeIndex  # noqa: E402
+
+# Routing context of a fresh session: no pending application, no leave types.
+CONTEXT = {"pending_leave_application": None, "leave_index": LeaveTypeIndex()}
+
+
+def predict(router, text):
+    route = router.route(text.strip().lower(), CONTEXT)
+    return route.intent if route else FALLBACK
+
+
+def evaluate(router, cases):
+    started = time.perf_counter()
+    predictions = [predict(router, text) for text, _ in cases]
+    seconds = time.perf_counter() - started
+    correct = sum(p == e for p, (_, e) in zip(predictions, cases))
+    wrong_local = sum(p != e and p != FALLBACK for p, (_, e) in zip(predictions, cases))
+    return {
+        "predictions": predictions,
+        "accuracy": correct / len(cases),
+        "llm": sum(p == FALLBACK for p in predictions),
+        "wrong_local": wrong_local,
+        "us_per_message": seconds / len(cases) * 1e6,
+    }
+
+
+def print_row(name, result, cases, baseline=None):
+    n = len(cases)
+    line = (f"{name:<22} accuracy {result['accuracy']:6.1%}   to LLM {result['llm']:3d}/{n} "
+            f"({result['llm'] / n:5.1%})   wrong local answers {result['wrong_local']:2d}   "
+            f"{result['us_per_message']:6.0f} us/msg")
+    if baseline is not None and baseline["llm"]:
+        avoided = baseline["llm"] - result["llm"]
+        line += f"   LLM calls avoided {avoided}/{baseline['llm']} ({avoided / baseline['llm']:.1%})"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=os.path.join(ROOT, "benchmarks", "intent_eval.jsonl"))
+    parser.add_argument("--examples", default=os.path.join(ROOT, "intent_examples.jsonl"))
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--sweep", default="", help="comma-separated thresholds to compare")
+    parser.add_argument("--verbose", action="store_true", help="list the misrouted messages")
+    args = parser.parse_args()
+
+    cases = load_examples(args.cases)
+    examples = load_examples(args.examples)
+    rules = evaluate(build_default_router(), cases)
+    print(f"{len(cases)} messages, {sum(e == FALLBACK for _, e in cases)} of them for the LLM; "
+          f"classifier trained with {len(examples)} labelled examples\n")
+    print_row("rules only", rules, cases)
+    thresholds = [float(t) for t in args.sweep.split(",") if t] or [args.threshold]
+    for threshold in thresholds:
+        result = evaluate(build_default_router(examples, classifier_threshold=threshold), cases)
+        print_row(f"rules + classifier {threshold:.2f}", result, cases, baseline=rules)
+        if args.verbose:
+            for (text, expected), got, before in zip(cases, result["predictions"], rules["predictions"]):
+                if got != expected:
+                    print(f"    {text!r}: expected {expected}, got {got} (rules only: {before})")
+
+
+if __name__ == "__main__":
+    main()
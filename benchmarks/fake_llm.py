@@ -0,0 +1,144 @@
+"""Deterministic stand-in for ``openai.OpenAI`` used by the benchmarks.
+
+Only ``client.chat.completions.create`` is implemented, with and without
+``stream=True``; :class:`FakeAsyncOpenAI` is the ``openai.AsyncOpenAI``
+counterpart (non-streamed only). Replies are derived from the request alone, so repeated
+runs send identical conversations. When tools are offered and the question
+mentions one of :data:`TOOL_TRIGGERS`, the first reply is a tool call, which
+exercises the app's tool round trip. Every call is appended to
+:attr:`FakeOpenAI.calls`.
+"""
+import asyncio
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace as NS
+
+TOOL_TRIGGERS = {
+    "leave types": "get_leave_types",
+    "leave history": "get_leave_applications",
+}
+_EMP_ID_RE = re.compile(r'"Emp_ID_N":\s*"?(\w+)')
+
+
+def _tokens(text):
+    return (len(text or "") + 3) // 4
+
+
+def _chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+    choices = [] if usage is not None else [
+        NS(delta=NS(content=content, tool_calls=tool_calls, function_call=None), finish_reason=finish_reason)
+    ]
+    return NS(choices=choices, usage=usage)
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model, messages, stream=False, tools=None, stream_options=None, **kwargs):
+        response = self._respond(model, messages, stream, tools, stream_options)
+        if self._owner.latency:
+            time.sleep(self._owner.latency)
+        return response
+
+    def _respond(self, model, messages, stream, tools, stream_options):
+        owner = self._owner
+        prompt_tokens = sum(_tokens(m.get("content")) + 4 for m in messages)
+        text, calls = owner.reply(messages, tools)
+        usage = NS(prompt_tokens=prompt_tokens, completion_tokens=_tokens(text) + 8 * len(calls),
+                   total_tokens=0)
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+        with owner.lock:
+            owner.calls.append({
+                "model": model, "messages": len(messages), "stream": bool(stream),
+                "tools": bool(tools), "tool_calls": len(calls),
+                "prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens,
+            })
+        if not stream:
+            message = NS(role="assistant", content=text or None, function_call=None,
+                         tool_calls=[NS(id=c[0], type="function", function=NS(name=c[1], arguments=c[2]))
+                                     for c in calls] or None)
+            return NS(choices=[NS(index=0, message=message, finish_reason="tool_calls" if calls else "stop")],
+                      usage=usage)
+        return self._stream(text, calls, usage, bool(stream_options and stream_options.get("include_usage")))
+
+    def _stream(self, text, calls, usage, include_usage):
+        owner = self._owner
+        for i, (call_id, name, arguments) in enumerate(calls):
+            yield _chunk(tool_calls=[NS(index=i, id=call_id, function=NS(name=name, arguments=arguments))])
+        words = text.split(" ") if text else []
+        for i, word in enumerate(words):
+            if owner.token_latency:
+                time.sleep(owner.token_latency)
+            yield _chunk(content=word if i == len(words) - 1 else word + " ")
+        yield _chunk(finish_reason="tool_calls" if calls else "stop")
+        if include_usage:
+            yield _chunk(usage=usage)
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, model, messages, tools=None, **kwargs):
+        response = self._respond(model, messages, False, tools, None)
+        if self._owner.latency:
+            await asyncio.sleep(self._owner.latency)
+        return response
+
+
+class FakeOpenAI:
+    """Drop-in for ``openai.OpenAI`` in benchmarks.
+
+    ``latency`` seconds are spent before every reply and ``token_latency``
+    between streamed words. Both are class attributes so they can be set
+    before the app constructs its client.
+    """
+
+    calls = []
+    lock = threading.Lock()
+    latency = 0.0
+    token_latency = 0.0
+
+    def __init__(self, *args, **kwargs):
+        self.chat = NS(completions=_Completions(self))
+
+    @classmethod
+    def reset(cls, latency=0.0, token_latency=0.0):
+        with cls.lock:
+            cls.calls = []
+        cls.latency = latency
+        cls.token_latency = token_latency
+
+    @staticmethod
+    def reply(messages, tools):
+        """Return ``(text, tool_calls)`` for a request, deterministically."""
+        last_user = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        answered = messages and messages[-1].get("role") in ("tool", "function")
+        if tools and not answered:
+            lowered = last_user.lower()
+            system = messages[0].get("content") or "" if messages else ""
+            match = _EMP_ID_RE.search(system)
+            emp_id = match.group(1) if match else ""
+            calls = [
+                (f"call_{i}", name, json.dumps({"emp_id": emp_id}))
+                for i, (trigger, name) in enumerate(sorted(TOOL_TRIGGERS.items())) if trigger in lowered
+            ]
+            if calls:
+                return "", calls
+        topic = " ".join(last_user.split()[:12])
+        text = (
+            f"Here is what I found about \"{topic}\". This is a canned answer from the benchmark "
+            f"language model, built from {len(messages)} messages so that replies have a realistic "
+            "length and stream as several chunks."
+        )
+        return text, []
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """Drop-in for ``openai.AsyncOpenAI``; shares :class:`FakeOpenAI`'s settings and calls."""
+
+    def __init__(self, *args, **kwargs):
+        self.chat = NS(completions=_AsyncCompletions(FakeOpenAI))
+
+    async def close(self):
+        pass
@@ -0,0 +1,193 @@
+"""Concurrent-user load test of ``app.py`` against local mock backends.
+
+Simulates many employees using one app process at once: every session has
+its own ``emp_id``, loads the app, then asks a random (seeded) sequence of
+questions drawn from a realistic mix, optionally pausing between them. The
+test is repeated at increasing concurrency levels and reports throughput,
+tail latency and error rate for each, showing where the ERP fan-out, LLM
+calls and full-script reruns saturate a replica.
+
+    python benchmarks/load_test.py [--levels 1,4,16] [--sessions-per-user 2] [--turns 4]
+
+Uses the same mock ERP and fake LLM as ``bench_app.py``; by default the ERP
+answers in 50 ms and the LLM in 300 ms.
+"""
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_app import backends, ChatSession, concurrent_apptest, latency_summary, rss_mb
+import mock_erp
+
+# (weight, category, question variants)
+QUESTION_MIX = [
+    (30, "balance", ["what is my leave balance", "how many leaves do i have left",
+                     "can i apply for 3 days annual leave", "do i have sick leave"]),
+    (20, "last_leave", ["when was my last leave", "show me my last approved leave",
+                        "how many leaves did i take this year"]),
+    (15, "procedure", ["how do i apply for sick leave", "how do i apply for leave",
+                       "how do i apply for annual leave"]),
+    (10, "draft_letter", ["draft a letter requesting to approve my leave"]),
+    (25, "fallback", ["are public holidays counted in my leave days?",
+                      "can i carry forward unused leave to next year?",
+                      "which leave types can I still take before december?"]),
+]
+
+
+def pick_question(rng):
+    weights = [w for w, _, _ in QUESTION_MIX]
+    _, category, variants = rng.choices(QUESTION_MIX, weights=weights)[0]
+    return category, rng.choice(variants)
+
+
+class LevelResult:
+    """Timings collected while running one concurrency level."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bootstrap = []
+        self.turns = []
+        self.by_category = {}
+        self.outcomes = Counter()
+
+    def add(self, kind, seconds, outcome, category=None):
+        with self.lock:
+            self.outcomes[outcome] += 1
+            if outcome == "error":
+                return
+            if kind == "bootstrap":
+                self.bootstrap.append(seconds)
+            else:
+                self.turns.append(seconds)
+                self.by_category.setdefault(category, []).append(seconds)
+
+
+def run_user(user, emp_ids, args, secrets, result):
+    """One simulated user: several sessions, each a bootstrap plus ``turns`` questions."""
+    rng = random.Random(args.seed * 1000 + user)
+    for emp_id in emp_ids:
+        try:
+            session = ChatSession(emp_id, secrets, timeout=args.timeout)
+            seconds, outcome = session.start()
+        except Exception:
+            logging.exception("Session start failed for emp_id %s", emp_id)
+            result.add("bootstrap", 0.0, "error")
+            continue
+        if outcome == "error" and session.last_error:
+            logging.warning("Session error for emp_id %s: %s", emp_id, session.last_error)
+        result.add("bootstrap", seconds, outcome)
+        for _ in range(args.turns):
+            if args.think_time:
+                time.sleep(rng.uniform(0, 2 * args.think_time))
+            category, question = pick_question(rng)
+            try:
+                seconds, outcome = session.ask(question)
+            except Exception:
+                logging.exception("Turn failed for emp_id %s", emp_id)
+                seconds, outcome = 0.0, "error"
+            if outcome == "error" and session.last_error:
+                logging.warning("Turn error for emp_id %s: %s", emp_id, session.last_error)
+            result.add("turn", seconds, outcome, category)
+
+
+def run_level(users, args, secrets, next_emp_id):
+    result = LevelResult()
+    assignments = [
+        [next_emp_id + user * args.sessions_per_user + s for s in range(args.sessions_per_user)]
+        for user in range(users)
+    ]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users, thread_name_prefix="load-user") as pool:
+        futures = [pool.submit(run_user, u, ids, args, secrets, result) for u, ids in enumerate(assignments)]
+        for fut in futures:
+            fut.result()
+    elapsed = time.perf_counter() - started
+    total = sum(result.outcomes.values())
+    return {
+        "users": users,
+        "elapsed_seconds": elapsed,
+        "sessions": users * args.sessions_per_user,
+        "turns_per_second": len(result.turns) / elapsed if elapsed else 0.0,
+        "requests_per_second": total / elapsed if elapsed else 0.0,
+        "error_rate": result.outcomes["error"] / total if total else 0.0,
+        "degraded_rate": result.outcomes["degraded"] / total if total else 0.0,
+        "bootstrap": latency_summary(result.bootstrap),
+        "turns": latency_summary(result.turns),
+        "by_category": {c: latency_summary(v) for c, v in sorted(result.by_category.items())},
+        "rss_peak_mb": rss_mb(),
+    }
+
+
+def _ms(value):
+    return "      -" if value is None else f"{value * 1000:7.0f}"
+
+
+def print_report(levels):
+    print("{:>5} {:>8} {:>8} {:>7} {:>7} {:>7} {:>7} {:>7} {:>7} {:>7} {:>6}".format(
+        "users", "turns/s", "req/s", "err%", "degr%", "boot95", "p50", "p95", "p99", "max", "RSS"))
+    for r in levels:
+        t = r["turns"]
+        print("{:>5} {:>8.2f} {:>8.2f} {:>6.1f}% {:>6.1f}% {} {} {} {} {} {:>5.0f}M".format(
+            r["users"], r["turns_per_second"], r["requests_per_second"], 100 * r["error_rate"],
+            100 * r["degraded_rate"], _ms(r["bootstrap"]["p95"]), _ms(t["p50"]), _ms(t["p95"]),
+            _ms(t["p99"]), _ms(t["max"]), r["rss_peak_mb"]))
+    print("(latencies in ms; turn latency excludes think time)")
+    last = levels[-1]
+    print(f"\nper category at {last['users']} users:")
+    for category, s in last["by_category"].items():
+        print(f"  {category:<14} n={s['n']:<4} p50 {_ms(s['p50'])}  p95 {_ms(s['p95'])}  p99 {_ms(s['p99'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", default="1,2,4,8,16", help="comma-separated concurrent user counts")
+    parser.add_argument("--sessions-per-user", type=int, default=2)
+    parser.add_argument("--turns", type=int, default=4, help="questions per session")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean pause between questions (s)")
+    parser.add_argument("--timeout", type=float, default=120, help="per-run AppTest timeout (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-token-latency", type=float, default=0.0)
+    parser.add_argument("--secret", action="append", default=[], metavar="NAME=JSON")
+    parser.add_argument("--first-emp-id", type=int, default=5001)
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    mock_erp.add_arguments(parser)
+    parser.set_defaults(latency=0.05)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    secrets = {"ERP_CACHE_BACKEND": "memory", "METRICS_PORT": 0, "METRICS_PATH": ""}
+    for item in args.secret:
+        name, _, value = item.partition("=")
+        secrets[name] = json.loads(value)
+
+    levels = []
+    with backends(mock_erp.config_from_args(args), args.llm_latency, args.llm_token_latency) as erp:
+        secrets["ERP_BASE_URL"] = erp.url
+        with concurrent_apptest(secrets):
+            # Import modules and build shared resources before measuring.
+            ChatSession(args.first_emp_id - 1, secrets, timeout=args.timeout).start()
+            next_emp_id = args.first_emp_id
+            for users in (int(n) for n in args.levels.split(",")):
+                erp.reset_counts()
+                level = run_level(users, args, secrets, next_emp_id)
+                level["erp_requests"] = dict(erp.requests)
+                levels.append(level)
+                next_emp_id += users * args.sessions_per_user
+                if not args.json:
+                    print(f"... {users} user(s) done in {level['elapsed_seconds']:.1f}s", flush=True)
+
+    if args.json:
+        print(json.dumps(levels, indent=2))
+    else:
+        print()
+        print_report(levels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""Local stand-in for the four ERP endpoints the chatbot calls.
+
+Serves synthetic but deterministic employee profiles, leave types, leave
+applications and ``StrSql`` leave summaries, with configurable latency,
+payload sizes and error rate, so the app can be benchmarked offline.
+
+    python benchmarks/mock_erp.py --port 8085 --latency 0.2 --error-rate 0.05
+
+then point the app at it with ``ERP_BASE_URL = "http://127.0.0.1:8085"``
+in ``.streamlit/secrets.toml``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+EMPLOYEE_PATH = "/api/EmployeeMasterApi/HrmGetEmployeeDetails/"
+LEAVE_TYPES_PATH = "/api/LeaveApplicationApi/FillLeaveType"
+HISTORY_PATH = "/api/LeaveApplicationApi/HrmGetLeaveApplicationDetails"
+SUMMARY_PATH = "/api/LeaveApplicationApi"
+
+ENDPOINTS = {
+    EMPLOYEE_PATH.rstrip("/"): "employee",
+    LEAVE_TYPES_PATH: "leave_types",
+    HISTORY_PATH: "history",
+    SUMMARY_PATH: "summary",
+}
+
+LEAVE_TYPE_NAMES = (
+    "ANNUAL LEAVE", "SICK LEAVE", "CASUAL LEAVE", "EMERGENCY LEAVE", "MATERNITY LEAVE",
+    "PATERNITY LEAVE", "HAJJ LEAVE", "UNPAID LEAVE", "COMPASSIONATE LEAVE", "STUDY LEAVE",
+    "MARRIAGE LEAVE", "COMPENSATORY LEAVE",
+)
+STATUSES = ("Approved", "Approved", "Approved", "Pending", "Rejected")
+# Employees are grouped in teams of this many consecutive IDs; the first ID
+# of each team is its manager and reports to the previous team's manager.
+TEAM_SIZE = 50
+
+
+@dataclass
+class MockERPConfig:
+    """Knobs for the stand-in ERP.
+
+    ``latency`` seconds (plus up to ``jitter``) are added to every
+    response; ``history_latency`` and ``summary_latency`` override it for
+    those endpoints when set. ``error_rate`` is the share of requests
+    answered with HTTP 500. ``history_size`` leave applications and
+    ``leave_types`` leave types are returned per employee, and
+    ``profile_padding`` extra bytes pad each profile.
+    """
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    history_latency: float = None
+    summary_latency: float = None
+    error_rate: float = 0.0
+    history_size: int = 40
+    leave_types: int = 8
+    profile_padding: int = 0
+    seed: int = 7
+
+
+def _rng(*parts):
+    return random.Random(zlib.crc32(":".join(str(p) for p in parts).encode()))
+
+
+def manager_of(emp_id):
+    """Return the Emp_ID of ``emp_id``'s reporting manager (``None`` for non-numeric IDs)."""
+    try:
+        emp_id = int(emp_id)
+    except (TypeError, ValueError):
+        return None
+    first = emp_id - emp_id % TEAM_SIZE
+    return first if first != emp_id else first - TEAM_SIZE
+
+
+def employee_profile(emp_id, padding=0):
+    rng = _rng("emp", emp_id)
+    profile = {
+        "Emp_ID_N": emp_id,
+        "Emp_EFullName_V": f"Employee {emp_id}",
+        "Emp_EmailID_V": f"employee{emp_id}@example.com",
+        "Emp_EmployeeReportsDesc_V": f"Employee {manager_of(emp_id)}",
+        "Emp_EmployeeReportsEmailID_V": "manager@example.com",
+        "Emp_EmployeeReportsMobileNo_V": "+000 0000 0000",
+        "Dsm_Desc_V": rng.choice(["Engineer", "Accountant", "Technician", "Supervisor"]),
+        "Dpm_Desc_V": rng.choice(["IT", "Finance", "Operations", "HR"]),
+        "Cmp_Name_V": "Example Trading LLC",
+        "Lph_Desc_V": "Standard Leave Policy",
+        "Sfh_ShiftName_V": rng.choice(["General", "Morning", "Night"]),
+        "EmpVisatype_Desc_V": rng.choice(["Employment", "Family"]),
+    }
+    if padding:
+        profile["Emp_Remarks_V"] = "x" * padding
+    return profile
+
+
+def leave_types(count):
+    names = [LEAVE_TYPE_NAMES[i % len(LEAVE_TYPE_NAMES)] for i in range(count)]
+    return [
+        {"Lpd_ID_N": i, "Lvm_Description_V": name, "Lvm_AttachRequired_N": int(name == "SICK LEAVE")}
+        for i, name in enumerate(names, 1)
+    ]
+
+
+def leave_history(emp_id, size, type_count):
+    rng = _rng("history", emp_id)
+    names = [lt["Lvm_Description_V"] for lt in leave_types(type_count)]
+    start = date.today() - timedelta(days=2 * 365)
+    records = []
+    for i in range(size):
+        from_date = start + timedelta(days=rng.randint(0, 2 * 365))
+        days = rng.randint(1, 10)
+        records.append({
+            "LeaveGrid_Ela_RefferNo_V": f"LA/{from_date.year}/{1000 + i}",
+            "LeaveGrid_Lvm_Description_V": rng.choice(names),
+            "LeaveGrid_Ela_FromDate_D": f"{from_date.isoformat()}T00:00:00",
+            "LeaveGrid_Ela_ToDate_D": f"{(from_date + timedelta(days=days - 1)).isoformat()}T00:00:00",
+            "LeaveGrid_Ela_Tot": days,
+            "LeaveGrid_Status": rng.choice(STATUSES),
+        })
+    records.sort(key=lambda r: r["LeaveGrid_Ela_FromDate_D"])
+    return records
+
+
+def leave_summary(emp_id, leave_type_id):
+    rng = _rng("summary", emp_id, leave_type_id)
+    eligible = rng.choice([0, 10, 15, 30])
+    return {
+        "Lpd_ID_N": leave_type_id,
+        "Eligible": str(eligible),
+        "Balance": str(round(rng.uniform(0, eligible), 1)),
+        "Paid": "1",
+        "UnPaid": "0",
+        "Airticket": "1" if leave_type_id == "1" else "0",
+        "AirTicketPercent": "100",
+    }
+
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections under concurrent
+    # load, which then wait a second for the client to retry.
+    request_queue_size = 512
+    daemon_threads = True
+
+
+class MockERP:
+    """Threaded HTTP server serving the stand-in ERP on ``127.0.0.1``.
+
+    Use as a context manager or call :meth:`start` / :meth:`stop`.
+    ``requests`` counts served requests per endpoint and ``errors`` the
+    injected failures.
+    """
+
+    def __init__(self, config=None, port=0, host="127.0.0.1"):
+        self.config = config or MockERPConfig()
+        self.requests = Counter()
+        self.errors = Counter()
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._server = _Server((host, port), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-erp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counts(self):
+        with self._lock:
+            self.requests.clear()
+            self.errors.clear()
+
+    def _delay(self, endpoint):
+        cfg = self.config
+        base = {"history": cfg.history_latency, "summary": cfg.summary_latency}.get(endpoint)
+        base = cfg.latency if base is None else base
+        with self._lock:
+            extra = self._random.uniform(0, cfg.jitter) if cfg.jitter else 0.0
+            fail = cfg.error_rate > 0 and self._random.random() < cfg.error_rate
+        return base + extra, fail
+
+    def respond(self, path, query):
+        """Return ``(status, body)`` for a request; also used without HTTP."""
+        cfg = self.config
+        endpoint = ENDPOINTS.get(path.rstrip("/") if path != "/" else path)
+        if endpoint is None:
+            return 404, {"Message": "No HTTP resource was found."}
+        delay, fail = self._delay(endpoint)
+        with self._lock:
+            self.requests[endpoint] += 1
+            if fail:
+                self.errors[endpoint] += 1
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return 500, {"Message": "An error has occurred."}
+        if endpoint == "employee":
+            emp_id = query.get("strEmp_ID_N", [""])[0]
+            return 200, [employee_profile(emp_id, cfg.profile_padding)] if emp_id else []
+        if endpoint == "leave_types":
+            return 200, leave_types(cfg.leave_types)
+        if endpoint == "history":
+            filt = query.get("StrFilter", [""])[0]
+            emp_id = filt.split("A.Emp_ID_N=")[-1].split()[0] if "A.Emp_ID_N=" in filt else ""
+            return 200, leave_history(emp_id, cfg.history_size, cfg.leave_types)
+        parts = query.get("StrSql", [""])[0].split(",")
+        if len(parts) < 2:
+            return 200, []
+        return 200, [leave_summary(parts[0], parts[1])]
+
+    def _handler(self):
+        erp = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; with Nagle's algorithm
+            # the body waits for the client's delayed ACK (~40 ms).
+            disable_nagle_algorithm = True
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                url = urlparse(self.path)
+                status, payload = erp.respond(url.path, parse_qs(url.query))
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _serve
+            do_POST = _serve
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def add_arguments(parser):
+    """Add the :class:`MockERPConfig` options to an ``argparse`` parser."""
+    group = parser.add_argument_group("mock ERP")
+    group.add_argument("--latency", type=float, default=0.0, help="seconds added to every ERP response")
+    group.add_argument("--jitter", type=float, default=0.0, help="extra random latency, up to this many seconds")
+    group.add_argument("--history-latency", type=float, default=None)
+    group.add_argument("--summary-latency", type=float, default=None)
+    group.add_argument("--error-rate", type=float, default=0.0, help="share of ERP requests failing with 500")
+    group.add_argument("--history-size", type=int, default=40, help="leave applications per employee")
+    group.add_argument("--leave-types", type=int, default=8, help="leave types per employee")
+    group.add_argument("--profile-padding", type=int, default=0, help="extra bytes per profile")
+    group.add_argument("--seed", type=int, default=7)
+
+
+def config_from_args(args):
+    return MockERPConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        history_latency=args.history_latency,
+        summary_latency=args.summary_latency,
+        error_rate=args.error_rate,
+        history_size=args.history_size,
+        leave_types=args.leave_types,
+        profile_padding=args.profile_padding,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--host", default="127.0.0.1")
+    add_arguments(parser)
+    args = parser.parse_args()
+    erp = MockERP(config_from_args(args), port=args.port, host=args.host)
+    print(f"Mock ERP listening on {erp.url}", flush=True)
+    try:
+        erp._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("Requests served:", dict(erp.requests), "errors:", dict(erp.errors))
+
+
+if __name__ == "__main__":
+    main()
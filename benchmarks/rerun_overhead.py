@@ -0,0 +1,147 @@
+"""Measure the CPU cost of re-executing ``app.py`` on every Streamlit rerun.
+
+Streamlit runs the whole script again for every message and widget
+interaction, so anything the script rebuilds at top level (clients, tool
+schemas, settings, cached-function wrappers) is paid on each of them
+before any ERP or LLM call starts. This benchmark opens one session
+against the local mock backends, warms it up, then times:
+
+* ``idle``: reruns with no new message, i.e. pure script overhead;
+* ``message``: a question answered from data the session already holds,
+  asked in sessions of ``--turns`` messages (every rerun also redraws the
+  conversation so far, so longer sessions cost more).
+
+For each it reports the CPU time of the script thread, next to the same
+figure for a minimal Streamlit script so the framework's own share is
+visible. ``--profile`` prints the functions that account for the app's
+idle reruns.
+
+    python benchmarks/rerun_overhead.py [--runs 200] [--profile]
+"""
+import argparse
+import cProfile
+import logging
+import os
+import pstats
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from unittest import mock
+
+from bench_app import backends, ChatSession, concurrent_apptest, latency_summary
+import mock_erp
+
+MINIMAL_SCRIPT = """\
+import streamlit as st
+st.title("ERP Leave Application Chatbot")
+if st.chat_input("Ask anything about leave, your profile, or manager…"):
+    st.markdown("ok")
+"""
+
+# Answered from the profile, which the greeting has already loaded.
+MESSAGE = "who is my manager"
+
+
+@contextmanager
+def script_cpu(profiler=None):
+    """Record the CPU seconds of every script run into the yielded list."""
+    from streamlit.runtime.scriptrunner.script_runner import ScriptRunner
+
+    original = ScriptRunner._run_script
+    samples = []
+
+    def run_script(self, rerun_data):
+        if profiler is not None:
+            profiler.enable()
+        started = time.thread_time()
+        try:
+            return original(self, rerun_data)
+        finally:
+            samples.append(time.thread_time() - started)
+            if profiler is not None:
+                profiler.disable()
+
+    with mock.patch.object(ScriptRunner, "_run_script", run_script):
+        yield samples
+
+
+def measure(session, runs, question=None, profiler=None):
+    with script_cpu(profiler) as samples:
+        for _ in range(runs):
+            if question:
+                session.ask(question)
+            else:
+                session.app.run()
+    return samples
+
+
+def measure_messages(new_session, runs, turns):
+    """Time ``runs`` messages, in fresh warmed-up sessions of ``turns`` each."""
+    samples = []
+    while len(samples) < runs:
+        session = new_session()
+        session.start()
+        session.ask(MESSAGE)
+        samples.extend(measure(session, min(turns, runs - len(samples)), MESSAGE))
+    return samples
+
+
+def _us(value):
+    return "      -" if value is None else f"{value * 1e6:7.0f}"
+
+
+def print_row(name, samples):
+    s = latency_summary(samples)
+    print(f"{name:<22} {s['n']:>5} {_us(s['p50'])} {_us(s['p95'])} {_us(s['mean'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=200, help="reruns measured per scenario")
+    parser.add_argument("--turns", type=int, default=10, help="messages per session in the message scenario")
+    parser.add_argument("--profile", action="store_true", help="profile the app's idle reruns")
+    parser.add_argument("--top", type=int, default=25, help="functions listed with --profile")
+    mock_erp.add_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    secrets = {"ERP_CACHE_BACKEND": "memory", "METRICS_PORT": 0, "METRICS_PATH": ""}
+    with backends(mock_erp.config_from_args(args)) as erp, tempfile.TemporaryDirectory() as tmp:
+        secrets["ERP_BASE_URL"] = erp.url
+        minimal_path = os.path.join(tmp, "minimal_app.py")
+        with open(minimal_path, "w", encoding="utf-8") as f:
+            f.write(MINIMAL_SCRIPT)
+
+        with concurrent_apptest(secrets):
+            session = ChatSession(1, secrets)
+            session.start()
+            session.ask(MESSAGE)
+            idle = measure(session, args.runs)
+            message = measure_messages(lambda: ChatSession(2, secrets), args.runs, args.turns)
+
+            minimal = ChatSession(3, secrets, path=minimal_path)
+            minimal.start()
+            minimal_idle = measure(minimal, args.runs)
+            minimal_message = measure_messages(
+                lambda: ChatSession(3, secrets, path=minimal_path), args.runs, args.turns)
+
+            profiler = cProfile.Profile() if args.profile else None
+            if profiler is not None:
+                measure(session, args.runs, profiler=profiler)
+
+    print(f"script thread CPU per rerun, {args.runs} runs each (microseconds)\n")
+    print("{:<22} {:>5} {:>7} {:>7} {:>7}".format("", "n", "p50", "p95", "mean"))
+    print_row("app, idle", idle)
+    print_row("app, message", message)
+    print_row("minimal, idle", minimal_idle)
+    print_row("minimal, message", minimal_message)
+    overhead = latency_summary(idle)["p50"] - latency_summary(minimal_idle)["p50"]
+    print(f"\napp overhead over a minimal script, idle p50: {overhead * 1e6:.0f} us")
+    if profiler is not None:
+        print()
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Token-budgeted conversation history for LLM requests."""
+import logging
+
+from help_index import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Roles carrying raw tool output; once the assistant has answered from them
+# the payload (and the assistant message that requested it) is no longer
+# needed in later requests.
+PAYLOAD_ROLES = ("function", "tool")
+
+
+def _clip(text, limit):
+    text = " ".join((text or "").split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def split_turns(messages):
+    """Group messages into turns, each starting at a user message."""
+    turns = []
+    for m in messages:
+        if m.get("role") == "user" or not turns:
+            turns.append([])
+        turns[-1].append(m)
+    return turns
+
+
+def summarize_turn(turn):
+    """Compress one turn into a single summary line (no LLM call)."""
+    user = next((m.get("content") for m in turn if m.get("role") == "user"), "")
+    answers = [m.get("content") for m in turn if m.get("role") == "assistant" and m.get("content")]
+    line = f"- User: {_clip(user, 160)}"
+    if answers:
+        line += f" | Assistant: {_clip(answers[-1], 240)}"
+    return line
+
+
+class HistoryManager:
+    """Build LLM requests from the chat history within a token budget.
+
+    The system prompt and the last ``keep_turns`` turns are sent verbatim.
+    Older turns are folded, once, into a running summary kept in a
+    caller-owned ``state`` dictionary (the session state), so a long
+    session costs roughly the same per request as a short one. Function
+    and tool payloads inside turns that already have an assistant answer
+    are dropped. If the request is still over ``token_budget``, more turns
+    are folded (always keeping the latest one) and the oldest summary lines
+    are discarded.
+    """
+
+    def __init__(self, token_budget=6000, keep_turns=6, summary_share=0.25):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.summary_share = summary_share
+
+    @staticmethod
+    def _tokens(messages):
+        return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
+
+    @staticmethod
+    def _drop_answered_payloads(turn):
+        answered = any(m.get("role") == "assistant" and m.get("content") for m in turn)
+        if not answered:
+            return turn, 0
+        kept = [m for m in turn if m.get("role") not in PAYLOAD_ROLES and not m.get("tool_calls")]
+        return kept, len(turn) - len(kept)
+
+    def build(self, messages, state, system_content=None):
+        """Return ``(request_messages, usage)`` for ``messages``.
+
+        ``messages[0]`` is the system prompt; ``system_content`` may replace
+        its text for this request (e.g. with per-question help excerpts).
+        ``state`` is updated in place with the running summary.
+        """
+        system = {"role": "system", "content": system_content or messages[0]["content"]}
+        state.setdefault("lines", [])
+        state.setdefault("folded", 0)
+        turns = split_turns(messages[1 + state["folded"]:])
+
+        def fold(count):
+            for turn in turns[:count]:
+                state["lines"].append(summarize_turn(turn))
+                state["folded"] += len(turn)
+            del turns[:count]
+
+        if len(turns) > self.keep_turns:
+            fold(len(turns) - self.keep_turns)
+
+        dropped = 0
+        while True:
+            recent = []
+            dropped = 0
+            for turn in turns:
+                kept, n = self._drop_answered_payloads(turn)
+                recent.extend(kept)
+                dropped += n
+            summary_budget = int(self.token_budget * self.summary_share)
+            while state["lines"] and estimate_tokens("\n".join(state["lines"])) > summary_budget:
+                state["lines"].pop(0)
+                state["trimmed"] = True
+            summary = []
+            if state["lines"]:
+                header = "Summary of the earlier conversation"
+                if state.get("trimmed"):
+                    header += " (oldest part omitted)"
+                summary = [{"role": "system", "content": header + ":\n" + "\n".join(state["lines"])}]
+            request = [system] + summary + recent
+            used = self._tokens(request)
+            if used <= self.token_budget or len(turns) <= 1:
+                break
+            fold(1)
+
+        usage = {
+            "budget": self.token_budget,
+            "used": used,
+            "system": self._tokens([system]),
+            "summary": self._tokens(summary),
+            "turns": len(turns),
+            "summarized_turns": len(state["lines"]),
+            "dropped_payloads": dropped,
+        }
+        logger.info(
+            "History budget: %d/%d tokens (system %d, summary %d over %d turns, %d turns verbatim, "
+            "%d payloads dropped)", usage["used"], usage["budget"], usage["system"],
+            usage["summary"], usage["summarized_turns"], usage["turns"], usage["dropped_payloads"]
+        )
+        if used > self.token_budget:
+            logger.warning("History over budget even after summarising: %d > %d tokens", used, self.token_budget)
+        return request, usage
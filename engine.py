@@ -0,0 +1,603 @@
+"""Leave assistant engine: a chat turn from message to reply, without a UI.
+
+:class:`LeaveAssistant` routes a message, loads the ERP data its intent
+needs into the :class:`Conversation` and answers it with the local intent
+handlers. Questions that need the LLM (procedures that are not cached yet,
+and everything the router does not recognise) are left as a sequence of
+steps that a driver runs: :meth:`LeaveAssistant.complete` with a blocking
+chat function (the Streamlit app, batch jobs) or
+:meth:`LeaveAssistant.complete_async` with an ``async`` one (the HTTP
+service). Both share the prompts, the tool round trip and the bookkeeping.
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from answer_cache import GENERAL_PROCEDURE, normalize_leave_phrase
+from conversation import HistoryManager
+from erp_client import is_unavailable
+from handlers import HANDLERS
+from intent_router import LazyContext, Route
+from leave_analytics import LeaveAnalytics
+from leave_history import LeaveHistory, as_leave_history
+from leave_type_index import LeaveTypeIndex
+from llm_stream import assistant_tool_message, message_tool_calls
+from metrics import BOOTSTRAP_SECONDS, INTENT_MATCHES, LLM_REQUEST_SECONDS, ROUTE_SECONDS, TURN_SECONDS, record_llm_usage
+from resources import (
+    current_help_doc, erp_cache, erp_client, get_answer_cache, get_employee_details_cached, get_help_index,
+    get_intent_router, get_leave_applications_cached, get_leave_summary_cached, get_leave_types_cached,
+    get_openai_client, get_warmup_executor,
+)
+from session_data import DATASETS, PROMPT_DATASETS, SessionData, describe_datasets
+from settings import (
+    ANSWER_CACHE_WARMUP, BOOTSTRAP_DEADLINE, BOOTSTRAP_MAX_WORKERS, BOOTSTRAP_RETRY_INTERVAL,
+    HELP_TOKEN_BUDGET, HELP_TOP_K, HISTORY_KEEP_TURNS, HISTORY_TOKEN_BUDGET, LLM_MODEL, LLM_TOOL_MAX_STEPS,
+    WORK_WEEKMASK,
+)
+from tools import TOOLS, execute_tool_calls
+
+logger = logging.getLogger(__name__)
+
+# Intents answered by the LLM from the help document alone (and cached).
+PROCEDURE_INTENTS = ("apply_procedure", "general_apply_procedure")
+
+
+def help_context(query):
+    """Return the help-document excerpts relevant to ``query``.
+
+    Only the top ``HELP_TOP_K`` chunks that fit in ``HELP_TOKEN_BUDGET``
+    are returned. The prompt tokens saved compared with sending the whole
+    document are logged for every call.
+    """
+    text, stats = get_help_index(current_help_doc()).context(query, k=HELP_TOP_K, token_budget=HELP_TOKEN_BUDGET)
+    logger.info("Help retrieval: %d chunks, ~%d tokens (saved ~%d of %d)",
+                stats["chunks"], stats["tokens"], stats["saved_tokens"], stats["full_tokens"])
+    return text or "No relevant section found in the help document."
+
+
+
+def procedure_messages(question):
+    """Build the help-document-only prompt for a normalised procedure question.
+
+    Returns the user message shown in the history and the messages sent to
+    the LLM. The help excerpts are retrieved for the question as the router
+    matched it ("apply for sick leave"), so BM25 alone decides which
+    sections answer it. The prompt depends only on ``question`` and the
+    help document, which is what makes the answers cacheable.
+    """
+    if question == GENERAL_PROCEDURE:
+        user_msg = (
+            "Please explain the general procedure for applying leave, "
+            "based strictly on the provided help document."
+        )
+        query = "apply for leave"
+    else:
+        user_msg = (
+            f"Please explain the procedure for applying for {question} leave, "
+            "based strictly on the provided help document."
+        )
+        query = f"apply for {question} leave"
+
+    special_system_prompt = (
+        "You are an HR assistant. "
+        "Answer strictly based on the following HELP DOCUMENT about leave application procedures. "
+        "Do not mention employee data, leave history, or balances. "
+        "If the answer is not in the document, say 'Information not available in the help document.'\n\n"
+        f"HELP DOCUMENT:\n{help_context(query)}\n"
+    )
+    messages = [
+        {"role": "system", "content": special_system_prompt},
+        {"role": "user", "content": user_msg}
+    ]
+    return user_msg, messages
+
+
+def build_system_prompt(profile, leave_types, leave_summaries):
+    """Return the system prompt holding the session's ERP data."""
+    return (
+        "You are an HR assistant. The user can ask about leave, policy, attachments, or any employee profile details "
+        "(like job post, shift, company, reporting manager, RP expiry date, nationality, pay type, designation, etc.). "
+        "You have access to this employee's full profile, available leave types, leave summaries, and the help document. "
+        "Use only these data fields when answering questions. "
+        "If a field is not available, reply 'Not available'. "
+        "If the question is about procedure, use the help document excerpts provided with the question.\n\n"
+        "EMPLOYEE PROFILE:\n"
+        f"{json.dumps(profile, indent=2)}\n\n"
+        "LEAVE TYPES:\n"
+        f"{json.dumps(leave_types, indent=2)}\n\n"
+        "LEAVE SUMMARIES:\n"
+        f"{json.dumps(leave_summaries, indent=2)}"
+    )
+
+
+def load_employee_data(emp_id, datasets=DATASETS, leave_types=None, max_workers=None, deadline=None):
+    """Load the requested ``datasets`` for ``emp_id`` in parallel.
+
+    ``datasets`` is any subset of ``profile``, ``leave_types``,
+    ``leave_history`` and ``leave_summaries``; the requested ones are
+    fetched at the same time. Summaries need the leave types: if
+    ``leave_types`` (already loaded) is not given they are fetched as well,
+    and as soon as they arrive one summary request per ``Lpd_ID_N`` is
+    fanned out on the same worker pool, so the total time tracks the
+    slowest call rather than the sum of all of them.
+
+    ``max_workers`` caps the number of concurrent ERP calls and
+    ``deadline`` is the overall budget in seconds. Calls still outstanding
+    when the deadline passes are abandoned and listed under ``"timed_out"``
+    in the returned dictionary, which also holds every requested dataset.
+    Datasets the ERP could not serve or that timed out (including any
+    missing summary) are listed under ``"unavailable"``.
+    """
+    max_workers = max_workers or BOOTSTRAP_MAX_WORKERS
+    deadline = BOOTSTRAP_DEADLINE if deadline is None else deadline
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    want_summaries = "leave_summaries" in datasets
+    fetch_types = "leave_types" in datasets or (want_summaries and leave_types is None)
+    fetchers = {
+        "profile": get_employee_details_cached,
+        "leave_types": get_leave_types_cached,
+        "leave_history": get_leave_applications_cached,
+    }
+
+    results = {}
+    summaries = {}
+    summary_ids = {}
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix="erp-bootstrap"
+    )
+
+    def fan_out_summaries(types):
+        for lt in types:
+            lpd_id = lt.get("Lpd_ID_N")
+            if lpd_id is None:
+                continue
+            summary_fut = executor.submit(
+                get_leave_summary_cached, emp_id, str(lpd_id), today_str, today_str
+            )
+            summary_ids[summary_fut] = lpd_id
+            pending.add(summary_fut)
+
+    try:
+        futures = {
+            executor.submit(fetch, emp_id): name
+            for name, fetch in fetchers.items()
+            if name in datasets or (name == "leave_types" and fetch_types)
+        }
+        pending = set(futures)
+        if want_summaries and not fetch_types:
+            fan_out_summaries(leave_types)
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    value = fut.result()
+                except Exception as e:
+                    value = {"error": str(e)}
+                if fut in summary_ids:
+                    summaries[summary_ids[fut]] = value
+                    continue
+                name = futures[fut]
+                results[name] = value
+                if name == "leave_types" and want_summaries and isinstance(value, list):
+                    fan_out_summaries(value)
+        timed_out = [futures[f] for f in pending if f in futures]
+        timed_out += [f"summary:{summary_ids[f]}" for f in pending if f in summary_ids]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if timed_out:
+        logger.warning("Load deadline (%.1fs) hit for Emp_ID=%s, missing: %s",
+                       deadline, emp_id, ", ".join(timed_out))
+    unavailable = [
+        name for name in ("profile", "leave_types", "leave_history")
+        if name in datasets and (name not in results or is_unavailable(results[name]))
+    ]
+    loaded = {}
+    if "profile" in datasets:
+        loaded["profile"] = results.get("profile", {"error": "Timed out loading employee profile."})
+    if fetch_types:
+        types = results.get("leave_types")
+        leave_types = types if isinstance(types, list) else []
+        if "leave_types" in datasets:
+            loaded["leave_types"] = leave_types
+    if "leave_history" in datasets:
+        history = results.get("leave_history")
+        loaded["leave_history"] = history if isinstance(history, list) else []
+    if want_summaries:
+        # Keep summaries in leave-type order regardless of completion order.
+        loaded["leave_summaries"] = {
+            lt["Lpd_ID_N"]: summaries[lt["Lpd_ID_N"]]
+            for lt in leave_types or [] if lt.get("Lpd_ID_N") in summaries
+        }
+        if ("leave_types" in results and not isinstance(results["leave_types"], list)) \
+                or len(summaries) < len(summary_ids) \
+                or any(is_unavailable(v) for v in summaries.values()):
+            unavailable.append("leave_summaries")
+    if unavailable:
+        logger.warning("ERP data unavailable for Emp_ID=%s: %s (circuits: %s)",
+                       emp_id, ", ".join(unavailable), erp_client.circuit_states())
+    BOOTSTRAP_SECONDS.observe(time.monotonic() - started, outcome="degraded" if unavailable else "ok")
+    logger.info("Loaded %s for Emp_ID=%s in %.2fs (%d summaries)", ", ".join(loaded), emp_id,
+                time.monotonic() - started, len(summaries))
+    flight = erp_cache.flight.stats()
+    logger.info("ERP single-flight: %d requested, %d deduplicated",
+                flight["requested"], flight["deduplicated"])
+    loaded["timed_out"] = timed_out
+    loaded["unavailable"] = unavailable
+    return loaded
+
+
+def warm_up_procedure_answers(leave_types):
+    """Precompute procedure answers for every known leave type in the background.
+
+    Prompts are built here, on the script thread; the worker only calls the
+    LLM for questions that are not cached yet.
+    """
+    names = {normalize_leave_phrase(lt.get("Lvm_Description_V", "")) for lt in leave_types}
+    questions = [GENERAL_PROCEDURE] + sorted(names - {GENERAL_PROCEDURE})
+    prompts = {q: procedure_messages(q)[1] for q in questions}
+
+    def compute(question):
+        with LLM_REQUEST_SECONDS.time(purpose="warmup", outcome="error") as span:
+            response = get_openai_client().chat.completions.create(model=LLM_MODEL, messages=prompts[question])
+            span.labels["outcome"] = "ok"
+        record_llm_usage("warmup", getattr(response, "usage", None))
+        return response.choices[0].message.content
+
+    get_warmup_executor().submit(get_answer_cache(current_help_doc()).warm_up, questions, compute)
+
+
+class Conversation:
+    """Server-side state of one chat with one employee.
+
+    Holds the message history sent to the LLM, the running summary of
+    older turns, a pending leave application awaiting its leave type and
+    the employee's ERP datasets, which :attr:`data` loads on demand.
+    """
+
+    def __init__(self, emp_id, retry_interval=BOOTSTRAP_RETRY_INTERVAL):
+        self.emp_id = emp_id
+        # The system prompt is filled in when the LLM fallback first needs it.
+        self.messages = [{"role": "system", "content": ""}]
+        self.history_summary = {}
+        self.pending_leave_application = None
+        self.last_draft_leave = None
+        self.system_prompt_version = None
+        self.answers_warmed = False
+        self.data = SessionData({}, self._load, retry_interval=retry_interval)
+        self._leave_index = None
+        self._leave_index_version = None
+        self._leave_analytics = None
+        self._leave_analytics_version = None
+
+    def _load(self, names, loaded):
+        """``SessionData`` loader: fetch ``names`` for this employee."""
+        if not self.emp_id:
+            return {}
+        result = load_employee_data(self.emp_id, names, leave_types=loaded.get("leave_types"))
+        if "leave_history" in result:
+            # Parsed and indexed once here; the history helpers are lookups.
+            result["leave_history"] = LeaveHistory(result["leave_history"])
+        if "leave_types" in result and ANSWER_CACHE_WARMUP and not self.answers_warmed:
+            self.answers_warmed = True
+            warm_up_procedure_answers(result["leave_types"])
+        return result
+
+    def leave_index(self):
+        """Return the :class:`LeaveTypeIndex` over the loaded leave types and summaries.
+
+        Built when first needed after a load and reused until the next one.
+        """
+        if self._leave_index is None or self._leave_index_version != self.data.version:
+            self._leave_index = LeaveTypeIndex(self.data.peek("leave_types", []),
+                                               self.data.peek("leave_summaries", {}))
+            self._leave_index_version = self.data.version
+        return self._leave_index
+
+    def leave_analytics(self):
+        """Return the :class:`LeaveAnalytics` over the loaded leave history, rebuilt after each load."""
+        if self._leave_analytics is None or self._leave_analytics_version != self.data.version:
+            self._leave_analytics = LeaveAnalytics(self.data.peek("leave_history", []), weekmask=WORK_WEEKMASK)
+            self._leave_analytics_version = self.data.version
+        return self._leave_analytics
+
+    def clear_history(self):
+        """Forget the messages and any pending application, keeping the loaded data."""
+        del self.messages[1:]
+        self.history_summary = {}
+        self.pending_leave_application = None
+        self.last_draft_leave = None
+
+
+def complete_chat(messages, purpose, **kwargs):
+    """Run a (non-streamed) chat completion; returns the text and the requested tool calls.
+
+    The blocking ``chat`` function for drivers without a UI to stream into.
+    """
+    with LLM_REQUEST_SECONDS.time(purpose=purpose, outcome="error") as span:
+        response = get_openai_client().chat.completions.create(model=LLM_MODEL, messages=messages, **kwargs)
+        span.labels["outcome"] = "ok"
+    record_llm_usage(purpose, getattr(response, "usage", None))
+    msg = response.choices[0].message
+    return msg.content or "", message_tool_calls(msg)
+
+
+@dataclass
+class LLMRequest:
+    """A chat completion the driver should run: ``chat(messages, purpose, **kwargs)``."""
+
+    messages: list
+    purpose: str
+    kwargs: dict = field(default_factory=dict)
+
+
+@dataclass
+class ToolRequest:
+    """Tool calls requested by the model, for the driver to execute."""
+
+    calls: list
+
+
+@dataclass
+class Turn:
+    """One user message and, once answered, its reply.
+
+    ``reply`` is set by :meth:`LeaveAssistant.begin` for messages answered
+    locally; otherwise ``llm`` is the first request of the LLM steps and
+    ``reply`` is set when a driver completes them. ``warnings`` holds
+    notices for the user, e.g. that some ERP data could not be loaded.
+    """
+
+    conversation: Conversation
+    text: str
+    lower: str
+    route: Optional[Route]
+    needed: tuple
+    started: float
+    year: int = field(default_factory=lambda: datetime.now().year)
+    warnings: List[str] = field(default_factory=list)
+    reply: Optional[str] = None
+    llm: Optional[LLMRequest] = None
+    llm_text: str = ""
+    question: Optional[str] = None
+    user_msg: Optional[str] = None
+
+    @property
+    def intent(self):
+        return self.route.intent if self.route else None
+
+    @property
+    def profile(self):
+        return self.conversation.data.peek("profile", {})
+
+    @property
+    def leave_types(self):
+        return self.conversation.data.peek("leave_types", [])
+
+    @property
+    def leave_history(self):
+        return as_leave_history(self.conversation.data.peek("leave_history", []))
+
+    @property
+    def leave_summaries(self):
+        return self.conversation.data.peek("leave_summaries", {})
+
+    @property
+    def leave_index(self):
+        return self.conversation.leave_index()
+
+    @property
+    def leave_analytics(self):
+        return self.conversation.leave_analytics()
+
+
+class LeaveAssistant:
+    """Answer chat messages for any number of :class:`Conversation` objects.
+
+    The assistant itself holds no per-conversation state and can be shared
+    by every session of a process. A conversation must not run two turns at
+    the same time; callers serialise turns per conversation.
+    """
+
+    def __init__(self, router=None, history_token_budget=HISTORY_TOKEN_BUDGET,
+                 history_keep_turns=HISTORY_KEEP_TURNS, max_tool_steps=LLM_TOOL_MAX_STEPS):
+        self.router = router or get_intent_router()
+        self.max_tool_steps = max_tool_steps
+        self.history_manager = HistoryManager(token_budget=history_token_budget, keep_turns=history_keep_turns)
+
+    def greeting(self, conversation):
+        """Return the welcome message, which needs only the employee profile."""
+        profile = conversation.data.get("profile", {})
+        full_name = profile.get("Emp_EFullName_V", "").strip() if isinstance(profile, dict) else ""
+        return f"Hello, {full_name or 'there'}! How can I assist you today?"
+
+    def begin(self, conversation, text):
+        """Route ``text``, load the data it needs and answer it locally if possible.
+
+        Blocks on ERP calls for datasets the conversation does not have yet.
+        """
+        started = time.perf_counter()
+        logger.info("User: %s", text)
+        conversation.messages.append({"role": "user", "content": text})
+        lower = text.strip().lower()
+        data = conversation.data
+
+        def leave_index():
+            data.ensure(("leave_types",))
+            return conversation.leave_index()
+
+        with ROUTE_SECONDS.time():
+            route = self.router.route(lower, LazyContext(
+                pending_leave_application=conversation.pending_leave_application,
+                leave_index=leave_index,
+            ))
+        INTENT_MATCHES.inc(intent=route.intent if route else "llm_fallback")
+        if route:
+            logger.info("Intent: %s (score %.0f)", route.intent, route.score)
+
+        # Load only what the matched handler answers from, or what the LLM
+        # fallback's system prompt is built from.
+        needed = self.router.needs(route.intent) if route else PROMPT_DATASETS
+        data.ensure(needed)
+        turn = Turn(conversation, text, lower, route, needed, started)
+        missing = [d for d in data.unavailable if d in needed]
+        if missing:
+            turn.warnings.append(
+                f"The ERP system is not responding, so {describe_datasets(missing)} could not be loaded. "
+                "This answer may be incomplete; I will try to load it again shortly."
+            )
+
+        if turn.intent in PROCEDURE_INTENTS:
+            self._begin_procedure(turn)
+        elif turn.intent is not None:
+            self.finish(turn, HANDLERS[turn.intent](turn))
+        else:
+            self._begin_fallback(turn)
+        return turn
+
+    def _begin_procedure(self, turn):
+        # Answers depend only on the help document and the leave type, so
+        # they are cached.
+        if turn.intent == "apply_procedure":
+            turn.question = normalize_leave_phrase(turn.route.match.group(2))
+        else:
+            turn.question = GENERAL_PROCEDURE
+        turn.user_msg, messages = procedure_messages(turn.question)
+        cached = get_answer_cache(current_help_doc()).get(turn.question)
+        if cached is not None:
+            logger.info("Answer cache hit for procedure question '%s'", turn.question)
+            self.finish(turn, cached)
+        else:
+            turn.llm = LLMRequest(messages, "procedure")
+
+    def _begin_fallback(self, turn):
+        # The system prompt carries the employee data. It is assembled the
+        # first time the conversation reaches the fallback and again only
+        # when a dataset has been (re)loaded since. The help excerpts for
+        # this question are added to it for this request only. Older turns
+        # are summarised so the request stays within the token budget.
+        conversation = turn.conversation
+        if conversation.system_prompt_version != conversation.data.version:
+            conversation.messages[0]["content"] = build_system_prompt(
+                turn.profile, turn.leave_types, turn.leave_summaries)
+            conversation.system_prompt_version = conversation.data.version
+        llm_messages, _ = self.history_manager.build(
+            conversation.messages,
+            conversation.history_summary,
+            system_content=conversation.messages[0]["content"]
+            + f"\n\nHELP DOCUMENT EXCERPTS:\n{help_context(turn.text)}"
+        )
+        turn.llm = LLMRequest(llm_messages, "fallback", {"tools": TOOLS, "tool_choice": "auto"})
+
+    def llm_steps(self, turn):
+        """Yield the LLM and tool requests that answer ``turn``; returns the reply.
+
+        A generator driven with ``send``: each :class:`LLMRequest` is
+        answered with ``(text, tool_calls)`` and each :class:`ToolRequest`
+        with the tool messages from :meth:`run_tools`. The model may call
+        tools for up to ``max_tool_steps`` round trips; the request after
+        the last one forbids tools so that it has to answer.
+        """
+        text, tool_calls = yield turn.llm
+        if turn.intent is not None:
+            return text
+        messages = turn.llm.messages
+        steps = 0
+        while tool_calls and steps < self.max_tool_steps:
+            steps += 1
+            messages = messages + (yield ToolRequest(tool_calls))
+            kwargs = turn.llm.kwargs
+            if steps == self.max_tool_steps:
+                kwargs = {**kwargs, "tool_choice": "none"}
+            text, tool_calls = yield LLMRequest(messages, "tool_followup", kwargs)
+        if steps:
+            logger.info("Final assistant response after %d tool step(s): %s", steps, text)
+        else:
+            logger.info("Assistant response (no function call): %s", text)
+        return text
+
+    def run_tools(self, turn, tool_calls):
+        """Execute ``tool_calls`` and return the messages that answer them."""
+        conversation = turn.conversation
+        logger.info("LLM requested function call(s): %s", ", ".join(call.name for call in tool_calls))
+        results = execute_tool_calls(tool_calls, conversation.data, conversation.emp_id)
+        tool_messages = [assistant_tool_message(tool_calls)]
+        for call, result in zip(tool_calls, results):
+            result_str = json.dumps(result)
+            logger.info("Function '%s' returned: %s", call.name, result_str)
+            tool_messages.append({"role": "tool", "tool_call_id": call.id, "content": result_str})
+        conversation.messages.extend(tool_messages)
+        return tool_messages
+
+    def complete(self, turn, chat):
+        """Answer ``turn`` through the LLM with a blocking ``chat`` function."""
+        steps = self.llm_steps(turn)
+        result = None
+        try:
+            while True:
+                step = steps.send(result)
+                if isinstance(step, ToolRequest):
+                    result = self.run_tools(turn, step.calls)
+                else:
+                    result = chat(step.messages, step.purpose, **step.kwargs)
+        except StopIteration as stop:
+            self.finish(turn, stop.value, from_llm=True)
+        return turn
+
+    async def complete_async(self, turn, chat, executor=None):
+        """Answer ``turn`` through the LLM with an ``async`` ``chat`` function.
+
+        Tools call the (blocking) ERP fetchers, so they run on ``executor``.
+        """
+        loop = asyncio.get_running_loop()
+        steps = self.llm_steps(turn)
+        result = None
+        try:
+            while True:
+                step = steps.send(result)
+                if isinstance(step, ToolRequest):
+                    result = await loop.run_in_executor(executor, self.run_tools, turn, step.calls)
+                else:
+                    result = await chat(step.messages, step.purpose, **step.kwargs)
+        except StopIteration as stop:
+            self.finish(turn, stop.value, from_llm=True)
+        return turn
+
+    def respond(self, conversation, text, chat=complete_chat):
+        """Answer ``text`` completely, using ``chat`` if the LLM is needed."""
+        turn = self.begin(conversation, text)
+        if turn.reply is None:
+            self.complete(turn, chat)
+        return turn
+
+    def finish(self, turn, text, from_llm=False):
+        """Record the reply to ``turn`` in its conversation."""
+        messages = turn.conversation.messages
+        if from_llm:
+            turn.llm_text = text or ""
+        if turn.intent in PROCEDURE_INTENTS:
+            if from_llm and text:
+                get_answer_cache(current_help_doc()).put(turn.question, text)
+            elif not text:
+                text = "Sorry, I could not find that information."
+            messages.append({"role": "user", "content": turn.user_msg})
+        turn.reply = text
+        messages.append({"role": "assistant", "content": text})
+        TURN_SECONDS.observe(time.perf_counter() - turn.started, intent=turn.intent or "llm_fallback")
+
+
+@functools.lru_cache(maxsize=None)
+def get_assistant():
+    """Return the process-wide :class:`LeaveAssistant`."""
+    return LeaveAssistant()
@@ -0,0 +1,357 @@
+"""Caching helpers that sit in front of the ERP client."""
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import ERP_CACHE_EVENTS
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight call whose result is shared with every waiter."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into a single execution.
+
+    The first caller for a key runs the function; callers arriving with
+    the same key while it is still running block and receive the same
+    result (or exception) instead of issuing their own request. Keys are
+    tuples whose first item names the endpoint, which is used to break the
+    counters down per endpoint.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._requested = Counter()
+        self._deduplicated = Counter()
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return ``fn(*args, **kwargs)``, sharing any identical call in flight."""
+        endpoint = key[0] if isinstance(key, tuple) and key else key
+        with self._lock:
+            self._requested[endpoint] += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                self._deduplicated[endpoint] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def stats(self):
+        """Return request and deduplication counters per endpoint."""
+        with self._lock:
+            endpoints = sorted(self._requested, key=str)
+            return {
+                "in_flight": len(self._in_flight),
+                "requested": sum(self._requested.values()),
+                "deduplicated": sum(self._deduplicated.values()),
+                "by_endpoint": {
+                    ep: {"requested": self._requested[ep], "deduplicated": self._deduplicated[ep]}
+                    for ep in endpoints
+                },
+            }
+
+
+def is_error(value):
+    """Return ``True`` for the ``{"error": ...}`` dictionaries the ERP client returns."""
+    return isinstance(value, dict) and "error" in value
+
+
+class MemoryBackend:
+    """In-process LRU store; the default backend.
+
+    Holds up to ``max_entries`` values and evicts the least recently used
+    one when full. Nothing is serialised, so values are shared by reference.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Return ``(value, stored_at)`` for ``key`` or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, value, stored_at, expires_at):
+        """Store ``value`` until ``expires_at`` (a ``time.time()`` timestamp)."""
+        with self._lock:
+            self._entries[key] = (value, stored_at, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteBackend:
+    """On-disk store shared by every process on the host.
+
+    Values are stored as zlib-compressed compact JSON in a WAL-mode SQLite
+    database, so Streamlit replicas on one machine share warm data and the
+    cache survives restarts. Entries past ``expires_at`` are ignored and
+    purged; when the stored payloads exceed ``max_bytes`` the least
+    recently used entries are evicted. Access times are only rewritten when
+    older than ``touch_interval`` seconds to keep reads cheap. ``table``
+    lets other caches share the same database file.
+    """
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, touch_interval=30, table="erp_cache"):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_accessed ON {self.table} (accessed_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _encode_key(key):
+        return json.dumps(list(key) if isinstance(key, tuple) else key, separators=(",", ":"))
+
+    def get(self, key):
+        """Return ``(value, stored_at)`` for ``key`` or ``None``."""
+        conn = self._conn()
+        k = self._encode_key(key)
+        row = conn.execute(
+            f"SELECT value, stored_at, expires_at, accessed_at FROM {self.table} WHERE key = ?", (k,)
+        ).fetchone()
+        if row is None:
+            return None
+        blob, stored_at, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at <= now:
+            return None
+        if now - accessed_at > self.touch_interval:
+            with conn:
+                conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, k))
+        return json.loads(zlib.decompress(blob)), stored_at
+
+    def set(self, key, value, stored_at, expires_at):
+        """Store ``value`` until ``expires_at`` and evict entries over the size bound."""
+        blob = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?, ?)",
+                (self._encode_key(key), blob, len(blob), stored_at, expires_at, time.time()),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for k, size in conn.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((k,))
+            freed += size
+        conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+
+    def clear(self):
+        """Remove every entry."""
+        conn = self._conn()
+        with conn:
+            conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+def create_backend(kind="memory", path=None, max_entries=10000, max_bytes=64 * 1024 * 1024):
+    """Build a cache backend by name (``"memory"`` or ``"sqlite"``)."""
+    if kind == "memory":
+        return MemoryBackend(max_entries=max_entries)
+    if kind == "sqlite":
+        return SQLiteBackend(path or "erp_cache.sqlite3", max_bytes=max_bytes)
+    raise ValueError(f"Unknown ERP cache backend: {kind!r}")
+
+
+class SWRCache:
+    """TTL cache for ERP responses with stale-while-revalidate.
+
+    A value younger than its ``ttl`` is served directly. Once it is older
+    but still within ``grace`` seconds past the ttl, the stale value is
+    served immediately and a refresh is queued on a small background pool.
+    Past the grace window the caller loads the value itself. All loads go
+    through a :class:`SingleFlight` group so a background refresh and a
+    foreground miss for the same key share one ERP call.
+
+    Values live in ``backend`` (a :class:`MemoryBackend` unless another
+    backend such as :class:`SQLiteBackend` is given). ``{"error": ...}``
+    results are returned to the caller but never stored, so a failed
+    refresh cannot replace a good cached value. Cached values may be shared
+    between sessions and must be treated as read-only.
+
+    Entries are kept for a further ``stale_if_error`` seconds after the
+    grace window. If a load in that window fails (for example because the
+    ERP circuit is open), the old value is served instead of the error.
+    """
+
+    def __init__(self, grace=0, refresh_workers=4, flight=None, backend=None, stale_if_error=0):
+        self.grace = grace
+        self.stale_if_error = stale_if_error
+        self.flight = flight or SingleFlight()
+        self.backend = backend if backend is not None else MemoryBackend()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._counts = Counter()
+        self._executor = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="erp-refresh"
+        )
+
+    def cached(self, name, ttl):
+        """Decorator caching ``fn(*args)`` under ``(name, *args)`` for ``ttl`` seconds."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args):
+                return self.get_or_load((name,) + args, ttl, fn, *args)
+            return wrapper
+        return decorator
+
+    def get_or_load(self, key, ttl, loader, *args):
+        """Return the cached value for ``key``, loading it with ``loader(*args)`` if needed."""
+        entry = self._backend_get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age < ttl:
+                self._count("hit", key)
+                return value
+            if age < ttl + self.grace:
+                self._count("stale", key)
+                self._schedule_refresh(key, ttl, loader, args)
+                return value
+        self._count("miss", key)
+        loaded = self._load(key, ttl, loader, args)
+        if entry is not None and is_error(loaded):
+            self._count("stale_if_error", key)
+            logger.warning("Serving expired %s after a failed load: %s", key[0], loaded["error"])
+            return entry[0]
+        return loaded
+
+    def _backend_get(self, key):
+        try:
+            return self.backend.get(key)
+        except Exception:
+            # A broken or locked cache must never take the chatbot down.
+            logger.exception("ERP cache read failed for %s", key[0])
+            return None
+
+    def _load(self, key, ttl, loader, args):
+        value = self.flight.do(key, loader, *args)
+        if not is_error(value):
+            now = time.time()
+            try:
+                self.backend.set(key, value, now, now + ttl + self.grace + self.stale_if_error)
+            except Exception:
+                logger.exception("ERP cache write failed for %s", key[0])
+        return value
+
+    def _schedule_refresh(self, key, ttl, loader, args):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        self._executor.submit(self._refresh, key, ttl, loader, args)
+
+    def _refresh(self, key, ttl, loader, args):
+        try:
+            value = self._load(key, ttl, loader, args)
+            if is_error(value):
+                self._count("refresh_error", key)
+                logger.warning("Background refresh of %s failed, keeping stale value: %s",
+                               key[0], value["error"])
+            else:
+                self._count("refreshed", key)
+        except Exception:
+            self._count("refresh_error", key)
+            logger.exception("Background refresh of %s raised", key[0])
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _count(self, event, key):
+        with self._lock:
+            self._counts[event] += 1
+        ERP_CACHE_EVENTS.inc(dataset=key[0], event=event)
+
+    def clear(self):
+        """Drop every cached value."""
+        self.backend.clear()
+
+    def stats(self):
+        """Return hit/stale/miss/refresh/stale-if-error counters and the number of cached keys."""
+        with self._lock:
+            counts = dict(self._counts)
+        counts["entries"] = len(self.backend)
+        return counts
@@ -0,0 +1,311 @@
+"""Pooled HTTP client used for every call to the ERP backend."""
+import logging
+import random
+import threading
+import time
+from datetime import datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import ERP_REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying: the gateway or the ERP itself is briefly unhealthy.
+RETRY_STATUSES = {502, 503, 504}
+
+# (connect, read) timeouts in seconds per endpoint. The history call returns
+# the full application list and is allowed a little longer.
+DEFAULT_TIMEOUTS = {
+    "employee": (3.05, 10),
+    "leave_types": (3.05, 10),
+    "history": (3.05, 15),
+    "summary": (3.05, 10),
+}
+
+
+def to_str_date(d):
+    """Convert a ``YYYY-MM-DD`` string to ``DD-MMM-YYYY`` if possible."""
+    if isinstance(d, str):
+        try:
+            dt = datetime.strptime(d, "%Y-%m-%d")
+            return dt.strftime("%d-%b-%Y")
+        except ValueError:
+            return d
+    return d
+
+
+def is_unavailable(value):
+    """Return ``True`` for error results caused by the ERP being unreachable."""
+    return isinstance(value, dict) and bool(value.get("unavailable"))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling an endpoint whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Track failures of one ERP endpoint and fail fast while it is unhealthy.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls are refused immediately. Once ``reset_timeout`` seconds have
+    passed a single probe call is let through (half-open): success closes
+    the circuit, failure opens it again for another ``reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """Return ``True`` if a call may be made now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probing = False
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("ERP circuit for %s closed", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning("ERP circuit for %s opened after %d failure(s)", self.name, self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RateLimiter:
+    """Token bucket allowing ``rate`` calls per second, in bursts of up to ``burst``.
+
+    :meth:`acquire` blocks the calling thread until a call is allowed, so
+    any number of threads share one limit.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class ERPClient:
+    """Process-wide ERP client with a keep-alive connection pool.
+
+    One ``requests.Session`` is shared by all callers so TCP connections to
+    the ERP host are reused and the bearer headers are built once. Reads
+    are retried a bounded number of times on connection errors and
+    ``RETRY_STATUSES`` with exponential backoff and full jitter.
+
+    ``urls`` maps the endpoint names ``employee``, ``leave_types``,
+    ``history`` and ``summary`` to their URLs. Every fetch method returns the
+    decoded payload on success and an ``{"error": ...}`` dictionary on
+    failure, mirroring the original per-call helpers.
+
+    Each endpoint has its own :class:`CircuitBreaker`. Connection errors,
+    timeouts and 5xx responses count as failures; while a circuit is open
+    the fetchers return ``{"error": ..., "unavailable": True}`` at once
+    instead of waiting for the timeout. Errors caused by the ERP being
+    unreachable carry the same flag.
+
+    With a :class:`RateLimiter` as ``rate_limiter`` every HTTP request,
+    retries included, waits for its turn under that limit.
+    """
+
+    def __init__(self, urls, token="", pool_size=32, timeouts=None,
+                 max_retries=2, backoff=0.25, backoff_cap=2.0,
+                 failure_threshold=5, reset_timeout=30.0, rate_limiter=None):
+        self.urls = dict(urls)
+        self.breakers = {
+            name: CircuitBreaker(name, failure_threshold, reset_timeout) for name in self.urls
+        }
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_cap = backoff_cap
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        })
+        # Retries are handled in ``_request`` so the adapter never retries.
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+    def _sleep_before_retry(self, attempt):
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff * (2 ** attempt)))
+        time.sleep(delay)
+
+    def circuit_states(self):
+        """Return the circuit state of every endpoint."""
+        return {name: breaker.state for name, breaker in self.breakers.items()}
+
+    @staticmethod
+    def _error(exc):
+        """Turn a failed call into an ``{"error": ...}`` dictionary.
+
+        Failures that mean the ERP itself is unreachable or unhealthy (an
+        open circuit, connection errors, timeouts, 5xx) are also flagged
+        with ``"unavailable": True``.
+        """
+        error = {"error": str(exc)}
+        response = getattr(exc, "response", None)
+        if isinstance(exc, (CircuitOpenError, requests.ConnectionError, requests.Timeout)) or (
+            response is not None and response.status_code >= 500
+        ):
+            error["unavailable"] = True
+        return error
+
+    def _request(self, endpoint, method, params=None, headers=None):
+        """Send a read request to ``endpoint`` through its circuit breaker."""
+        breaker = self.breakers[endpoint]
+        if not breaker.allow():
+            ERP_REQUEST_SECONDS.observe(0.0, endpoint=endpoint, outcome="circuit_open")
+            raise CircuitOpenError(f"ERP {endpoint} service is temporarily unavailable.")
+        with ERP_REQUEST_SECONDS.time(endpoint=endpoint, outcome="error") as span:
+            try:
+                data = self._send(endpoint, method, params, headers)
+            except (requests.ConnectionError, requests.Timeout):
+                breaker.record_failure()
+                raise
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                raise
+            except Exception:
+                # E.g. a 200 HTML page from the gateway that is not JSON. It
+                # must still settle a half-open probe, or the circuit never
+                # lets another call through.
+                breaker.record_failure()
+                raise
+            span.labels["outcome"] = "ok"
+        breaker.record_success()
+        return data
+
+    def _send(self, endpoint, method, params=None, headers=None):
+        """Send the request with bounded retries and return the decoded JSON."""
+        url = self.urls[endpoint]
+        timeout = self.timeouts.get(endpoint, (3.05, 10))
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                resp = self.session.request(method, url, params=params, headers=headers, timeout=timeout)
+                if resp.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    logger.warning("ERP %s returned %d, retrying", endpoint, resp.status_code)
+                else:
+                    resp.raise_for_status()
+                    return resp.json()
+            except requests.ConnectionError as e:
+                # ConnectTimeout is a ConnectionError; read timeouts are not
+                # retried because the ERP may still be working on the query.
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning("ERP %s connection failed (%s), retrying", endpoint, e)
+            self._sleep_before_retry(attempt)
+            attempt += 1
+
+    def get_employee_details(self, emp_id):
+        """Return the employee profile, or an ``{"error": ...}`` dictionary."""
+        headers = {"Content-Type": "application/json; charset=UTF-8"}
+        try:
+            data = self._request("employee", "POST", params={"strEmp_ID_N": emp_id}, headers=headers)
+            if isinstance(data, list) and data:
+                return data[0]
+            return {"error": "No employee found with that ID."}
+        except Exception as e:
+            return self._error(e)
+
+    def get_leave_types(self, emp_id):
+        """Return the list of leave types available to the employee."""
+        params = {"Emp_ID_N": emp_id, "Cgm_ID_N": 1}
+        try:
+            data = self._request("leave_types", "GET", params=params)
+            if isinstance(data, list):
+                return data
+            return {"error": "Unexpected response format."}
+        except Exception as e:
+            return self._error(e)
+
+    def get_leave_applications(self, emp_id):
+        """Fetch all leave applications for the employee except cancelled ones."""
+        str_filter = f"A.Emp_ID_N={emp_id} AND A.Ela_Status_N NOT IN (0,6) ORDER BY Ela_RefferNo_V"
+        try:
+            data = self._request("history", "POST", params={"StrFilter": str_filter})
+            if isinstance(data, list):
+                return data
+            return {"error": "Unexpected response format."}
+        except Exception as e:
+            return self._error(e)
+
+    def get_leave_summary(self, emp_id, leave_type_id, from_date, to_date):
+        """Return a leave balance summary for a specific leave type."""
+        from_str = to_str_date(from_date)
+        to_str = to_str_date(to_date)
+        strsql = f"{emp_id},{leave_type_id},'{from_str}','{to_str}',0,0,1,0"
+        try:
+            data = self._request("summary", "POST", params={"StrSql": strsql})
+            if isinstance(data, list) and data:
+                return data[0]
+            return {"error": "No leave summary found for given parameters."}
+        except Exception as e:
+            return self._error(e)
@@ -0,0 +1,580 @@
+"""Local answers to the routed intents.
+
+Each handler receives the :class:`engine.Turn` being answered and returns
+the reply text. Handlers read only the session datasets their rule lists in
+``Rule.needs`` (plus the conversation's pending leave application) and never
+call the ERP or the LLM, so the Streamlit app, the HTTP service and batch
+jobs all answer with the same code.
+"""
+import calendar
+import re
+from datetime import datetime
+
+from leave_history import as_leave_history
+from leave_type_index import format_days
+
+# Handler per intent name, filled in by the ``@handler`` decorator.
+HANDLERS = {}
+
+LETTER_REF_RE = re.compile(r"(lp|ref)?\s*(\d{3,})")
+
+
+def handler(*intents):
+    """Register the decorated function as the handler of ``intents``."""
+    def register(func):
+        for intent in intents:
+            HANDLERS[intent] = func
+        return func
+    return register
+
+
+# ===== Helper Functions for Leave History & Formatting =====
+def get_leaves_by_year(leave_history, year=None):
+    """Return all leave records from ``leave_history`` matching ``year``."""
+    year = year or datetime.now().year
+    return as_leave_history(leave_history).by_year(year)
+
+
+def get_leaves_by_month(leave_history, month=None, year=None):
+    """Filter ``leave_history`` by the given month and year."""
+    now = datetime.now()
+    month = month or now.month
+    year = year or now.year
+    return as_leave_history(leave_history).by_month(month, year)
+
+
+def format_leave_list(leaves):
+    """Convert a list of leave dictionaries into a markdown bullet list."""
+    if not leaves:
+        return "No leave applications found for this period."
+    lines = []
+    for lh in leaves:
+        ref = lh.get("LeaveGrid_Ela_RefferNo_V", "N/A")
+        ltype = lh.get("LeaveGrid_Lvm_Description_V", "N/A")
+        from_d = lh.get("LeaveGrid_Ela_FromDate_D", "").split("T")[0]
+        to_d = lh.get("LeaveGrid_Ela_ToDate_D", "").split("T")[0]
+        days = lh.get("LeaveGrid_Ela_Tot", 0)
+        status = lh.get("LeaveGrid_Status", "N/A")
+        lines.append(f"- Ref {ref}: {ltype}, {from_d} to {to_d} ({days} day(s)) — **{status}**")
+    return "\n".join(lines)
+
+
+def get_leave_by_ref(leave_history, ref_partial):
+    """Return the leave record whose reference number contains ``ref_partial``."""
+    return as_leave_history(leave_history).find_ref(ref_partial)
+
+
+def get_approved_leaves(leave_history, year=None):
+    """Get all approved leaves, optionally filtered by ``year``."""
+    return as_leave_history(leave_history).by_status("approved", year)
+
+
+# --- 1. Explicit leave application block ---
+@handler("apply_leave")
+def handle_apply_leave(turn):
+    route = turn.route
+    conversation = turn.conversation
+    num_days = int(route.match.group(1))
+    leave_type_raw = route.match.group(2).strip().upper()
+    matched = turn.leave_index.lookup(leave_type_raw)
+
+    if not matched:
+        reply = f"Could not find a leave type matching '{leave_type_raw.title()}'."
+        conversation.pending_leave_application = None
+    else:
+        desc = matched.name.title()
+        if num_days <= matched.balance:
+            reply = f"Yes, you can apply for {num_days} days of {desc}."
+            conversation.pending_leave_application = None
+        else:
+            reply = (
+                f"No, you only have {format_days(matched.balance)} days available for {desc}. "
+                f"You cannot apply for {num_days} days."
+            )
+            conversation.pending_leave_application = {
+                "num_days": num_days,
+                "leave_type": leave_type_raw
+            }
+
+    conversation.pending_leave_application = None
+    conversation.last_draft_leave = None
+    return reply
+
+
+# --- 2. User clarification - e.g. "for casual leave" ---
+@handler("clarify_leave_type")
+def handle_clarify_leave_type(turn):
+    route = turn.route
+    conversation = turn.conversation
+    prev = conversation.pending_leave_application
+    num_days = prev.get("num_days", None)
+    leave_type_raw = route.match.group(1).strip().upper()
+    matched = turn.leave_index.lookup(leave_type_raw)
+    if matched and num_days is not None:
+        desc = matched.name.title()
+        if num_days <= matched.balance:
+            reply = f"Yes, you can apply for {num_days} days of {desc}."
+        else:
+            reply = (
+                f"No, you only have {format_days(matched.balance)} days available for {desc}. "
+                f"You cannot apply for {num_days} days."
+            )
+        conversation.pending_leave_application = None
+    else:
+        reply = f"Could not find a leave type matching '{leave_type_raw.title()}'."
+    return reply
+
+
+# --- 3. Apply for X day leave (ambiguous) ---
+@handler("apply_days")
+def handle_apply_days(turn):
+    route = turn.route
+    conversation = turn.conversation
+    num_days = int(route.match.group(1))
+    eligible_types = [lt.name.title() for lt in turn.leave_index if num_days <= lt.balance]
+    if len(eligible_types) == 1:
+        reply = f"Yes, you can apply for {num_days} days of {eligible_types[0]}."
+        conversation.pending_leave_application = None
+    elif len(eligible_types) > 1:
+        reply = (
+            f"You are eligible to apply for {num_days} days under the following leave types: "
+            + ", ".join(eligible_types) + ".\nPlease specify which leave type you want."
+        )
+        conversation.pending_leave_application = {
+            "num_days": num_days,
+            "leave_type": None
+        }
+    else:
+        reply = f"You do not have enough balance for any leave type for {num_days} days."
+        conversation.pending_leave_application = None
+    return reply
+
+
+# --- Generic check for enough leave balance when no reference number is provided ---
+@handler("enough_balance")
+def handle_enough_balance(turn):
+    leave_history = turn.leave_history
+
+    leave = leave_history[-1] if leave_history else None
+    if not leave:
+        reply = "No leave applications found to check balance."
+    else:
+        leave_type = leave.get("LeaveGrid_Lvm_Description_V", "").strip()
+        days_requested = 0
+        try:
+            days_requested = float(leave.get("LeaveGrid_Ela_Tot", 0))
+        except (ValueError, TypeError):
+            days_requested = 0
+
+        matched_type = turn.leave_index.lookup(leave_type)
+        leave_balance = matched_type.balance if matched_type else 0.0
+
+        if leave_balance >= days_requested and days_requested > 0:
+            reply = (
+                f"Yes, you have enough balance to get approval for your latest leave application.\n\n"
+                f"- Leave Type: {leave_type}\n"
+                f"- Days Requested: {days_requested}\n"
+                f"- Your Current Balance: {leave_balance}"
+            )
+        elif days_requested == 0:
+            reply = "Your latest leave application does not specify any days requested."
+        else:
+            reply = (
+                f"No, you do not have enough balance to get approval for your latest leave application.\n\n"
+                f"- Leave Type: {leave_type}\n"
+                f"- Days Requested: {days_requested}\n"
+                f"- Your Current Balance: {leave_balance}"
+            )
+
+    return reply
+
+
+# --- 4. Reference check for application eligibility ---
+@handler("ref_enough_balance")
+def handle_ref_enough_balance(turn):
+    route = turn.route
+    leave_history = turn.leave_history
+    ref_partial = route.match.group(1)
+    leave = get_leave_by_ref(leave_history, ref_partial)
+    if not leave:
+        reply = f"Could not find leave application with reference {ref_partial}."
+    else:
+        leave_type = leave.get("LeaveGrid_Lvm_Description_V", "").strip()
+        days_requested = float(leave.get("LeaveGrid_Ela_Tot", 0))
+        matched_type = turn.leave_index.lookup(leave_type)
+        leave_balance = matched_type.balance if matched_type else 0.0
+        if leave_balance >= days_requested:
+            reply = (f"Yes, you have enough balance to get approval for this application.\n\n"
+                     f"- Leave Type: {leave_type}\n"
+                     f"- Days Requested: {days_requested}\n"
+                     f"- Your Current Balance: {leave_balance}")
+        else:
+            reply = (f"No, you do not have enough balance to get approval for this application.\n\n"
+                     f"- Leave Type: {leave_type}\n"
+                     f"- Days Requested: {days_requested}\n"
+                     f"- Your Current Balance: {leave_balance}")
+    return reply
+
+
+# --- 5. Draft letter/request approval blocks ---
+@handler("draft_letter")
+def handle_draft_letter(turn):
+    lower = turn.lower
+    profile = turn.profile
+    leave_history = turn.leave_history
+    ref_match = LETTER_REF_RE.search(lower)
+    if not ref_match:
+        leave = leave_history[-1] if leave_history else None
+    else:
+        ref_partial = ref_match.group(2)
+        leave = get_leave_by_ref(leave_history, ref_partial)
+    manager_name = profile.get("Emp_EmployeeReportsDesc_V", "Not available")
+    manager_email = profile.get("Emp_EmailID_V", "Not available")
+    your_name = profile.get("Emp_EFullName_V", "Not available")
+    your_position = profile.get("Dsm_Desc_V", "Not available")
+    your_department = profile.get("Dpm_Desc_V", "Not available")
+    company_name = profile.get("Cmp_Name_V", "Not available")
+    if leave is None:
+        reply = "Could not find the specified leave application."
+    else:
+        ltype = leave.get("LeaveGrid_Lvm_Description_V", "N/A")
+        from_d = leave.get("LeaveGrid_Ela_FromDate_D", "").split("T")[0]
+        to_d = leave.get("LeaveGrid_Ela_ToDate_D", "").split("T")[0]
+        days = leave.get("LeaveGrid_Ela_Tot", 0)
+        ref = leave.get("LeaveGrid_Ela_RefferNo_V", "N/A")
+        today = datetime.now().strftime("%Y-%m-%d")
+        reply = f"""
+**To:** {manager_name} (<{manager_email}>)
+
+Subject: Request for Approval of Leave Application (Ref: {ref})
+
+Dear {manager_name},
+
+I hope this message finds you well. I am writing to formally request your approval for my leave application referenced as {ref}.
+
+**Details of Leave Application:**
+- Leave Type: {ltype}
+- Requested Dates: {from_d} to {to_d}
+- Total Days: {days}
+
+Due to [brief reason, e.g., health reasons], I was unable to attend work during the above period. I have ensured all necessary handover arrangements for my responsibilities.
+
+I kindly request your approval of this leave request. Please let me know if you need any further information.
+
+Thank you for your attention.
+
+Sincerely,  
+{your_name}  
+{your_position}, {your_department}  
+{company_name}  
+Date: {today}
+"""
+    return reply
+
+
+# --- 6. Specific type leave balance query block ---
+# Matches phrases like "how many sick leave left", "casual leave left", etc.
+@handler("leave_type_left")
+def handle_leave_type_left(turn):
+    # The router's guard resolved the leave type; re-read it from the
+    # index, whose balances are loaded now.
+    lt = turn.leave_index.by_id(turn.route.data.lpd_id) or turn.route.data
+    reply = f"You have {format_days(lt.balance)} days of {lt.name.title()} remaining."
+    return reply
+
+
+@handler("air_ticket")
+def handle_air_ticket(turn):
+    # Check if user specified leave type
+    leave_type_mentioned = turn.leave_index.find_in(turn.lower)
+
+    if leave_type_mentioned:
+        if leave_type_mentioned.air_ticket:
+            percent = leave_type_mentioned.air_ticket_percent
+            percent = format_days(percent) if percent is not None else "N/A"
+            reply = (
+                f"You are eligible for an air ticket for {leave_type_mentioned.name} leave. "
+                f"Air ticket reimbursement percent: {percent}%."
+            )
+        else:
+            reply = f"You are not eligible for an air ticket for {leave_type_mentioned.name} leave."
+    else:
+        # No specific leave type mentioned: summarize all eligible types
+        eligible_types = [lt.name or "Unknown" for lt in turn.leave_index if lt.air_ticket]
+
+        if eligible_types:
+            reply = (
+                "You are eligible for air tickets under the following leave types: "
+                + ", ".join(eligible_types)
+                + "."
+            )
+        else:
+            reply = "You are not eligible for air tickets under any leave type according to your profile."
+
+    return reply
+
+
+# ------------ FUZZY SHORTCUT BLOCKS ---------------
+@handler("leaves_this_year")
+def handle_leaves_this_year(turn):
+    year = turn.year
+    leave_history = turn.leave_history
+    leaves = get_leaves_by_year(leave_history, year)
+    reply = f"You have applied for {len(leaves)} leaves this year."
+    return reply
+
+
+@handler("leaves_this_month")
+def handle_leaves_this_month(turn):
+    leave_history = turn.leave_history
+    leaves = get_leaves_by_month(leave_history)
+    reply = format_leave_list(leaves)
+    return reply
+
+
+@handler("who_approves")
+def handle_who_approves(turn):
+    profile = turn.profile
+    manager_name = profile.get("Emp_EmployeeReportsDesc_V", None)
+    if manager_name and manager_name.lower() not in ["not available", ""]:
+        reply = f"Your leave requests can be approved by your reporting manager, {manager_name}."
+    else:
+        reply = "The reporting manager information is not available in your profile."
+    return reply
+
+
+@handler("list_leaves")
+def handle_list_leaves(turn):
+    leave_history = turn.leave_history
+    reply = format_leave_list(leave_history)
+    return reply
+
+
+@handler("last_approved_leave")
+def handle_last_approved_leave(turn):
+    leave_history = turn.leave_history
+    latest = leave_history.latest(status="approved")
+    if latest is None:
+        reply = "No approved leave found in your history."
+    else:
+        from_d = latest.get("LeaveGrid_Ela_FromDate_D", "").split("T")[0]
+        to_d = latest.get("LeaveGrid_Ela_ToDate_D", "").split("T")[0]
+        days = latest.get("LeaveGrid_Ela_Tot", 0)
+        ref = latest.get("LeaveGrid_Ela_RefferNo_V", "N/A")
+        ltype = latest.get("LeaveGrid_Lvm_Description_V", "N/A")
+        reply = (
+            f"Your last approved leave was Ref {ref}: {ltype}, "
+            f"from {from_d} to {to_d} ({days} day(s))."
+        )
+    return reply
+
+
+# --- Check if user asks if they have a specific leave type (e.g. annual leave) ---
+@handler("has_leave_type")
+def handle_has_leave_type(turn):
+    leave_type_query = turn.route.match.group(1).strip().lower()
+    matched_leave = turn.leave_index.lookup(leave_type_query)
+
+    if matched_leave:
+        reply = f"You have {format_days(matched_leave.balance)} days balance for {matched_leave.name}."
+    else:
+        reply = f"I could not find information about '{leave_type_query}' leave in your profile."
+
+    return reply
+
+
+@handler("last_leave")
+def handle_last_leave(turn):
+    leave_history = turn.leave_history
+    if not leave_history:
+        reply = "⚠️ Could not fetch your leave history."
+    else:
+        try:
+            latest = leave_history.latest()
+            from_d = latest.get("LeaveGrid_Ela_FromDate_D", "").split("T")[0]
+            to_d = latest.get("LeaveGrid_Ela_ToDate_D", "").split("T")[0]
+            days = latest.get("LeaveGrid_Ela_Tot", 0)
+            status = latest.get("LeaveGrid_Status", "N/A")
+            ref = latest.get("LeaveGrid_Ela_RefferNo_V", "N/A")
+            ltype = latest.get("LeaveGrid_Lvm_Description_V", "N/A")
+            reply = (
+                f"Your last leave was Ref {ref}: {ltype}, "
+                f"from {from_d} to {to_d} ({days} day(s)) — **{status}**"
+            )
+        except Exception:
+            reply = "⚠️ Unable to determine your last leave."
+    return reply
+
+
+# ------------ LEAVE ANALYTICS ---------------
+def describe_leave(record):
+    """Describe one leave application as "Ref X (type, from to to)"."""
+    ref = record.get("LeaveGrid_Ela_RefferNo_V", "N/A")
+    ltype = record.get("LeaveGrid_Lvm_Description_V", "N/A")
+    from_d = record.get("LeaveGrid_Ela_FromDate_D", "").split("T")[0]
+    to_d = record.get("LeaveGrid_Ela_ToDate_D", "").split("T")[0]
+    return f"Ref {ref} ({ltype}, {from_d} to {to_d})"
+
+
+@handler("days_by_type")
+def handle_days_by_type(turn):
+    analytics = turn.leave_analytics
+    taken = analytics.days_by_type(turn.year)
+    pending = analytics.days_by_type(turn.year, statuses=("pending",))
+    if not taken and not pending:
+        return f"You have no approved or pending leave in {turn.year}."
+    lines = [f"Days of approved leave in {turn.year}: **{format_days(sum(taken.values()))}**"]
+    for name, days in sorted(taken.items(), key=lambda item: -item[1]):
+        lines.append(f"- {name.title()}: {format_days(days)} day(s)")
+    if pending:
+        lines.append(f"Awaiting approval: {format_days(sum(pending.values()))} day(s).")
+    return "\n".join(lines)
+
+
+@handler("monthly_usage")
+def handle_monthly_usage(turn):
+    usage = turn.leave_analytics.monthly_usage(turn.year)
+    if not usage.any():
+        return f"You have no approved leave in {turn.year}."
+    lines = [f"Approved leave days by month in {turn.year}:"]
+    for month in usage.nonzero()[0]:
+        lines.append(f"- {calendar.month_name[month + 1]}: {format_days(usage[month])} day(s)")
+    busiest = int(usage.argmax())
+    lines.append(f"You took the most leave in {calendar.month_name[busiest + 1]}.")
+    return "\n".join(lines)
+
+
+@handler("overlapping_leaves")
+def handle_overlapping_leaves(turn):
+    analytics = turn.leave_analytics
+    overlapping, back_to_back = analytics.adjacent_pairs()
+    records = analytics.records
+    if not overlapping and not back_to_back:
+        return "None of your approved or pending leaves overlap or run back to back."
+    lines = []
+    if overlapping:
+        lines.append("These approved or pending leaves overlap:")
+        lines.extend(f"- {describe_leave(records[i])} and {describe_leave(records[j])}" for i, j in overlapping)
+    if back_to_back:
+        lines.append("These leaves run back to back, with no working day between them:")
+        lines.extend(f"- {describe_leave(records[i])} then {describe_leave(records[j])}" for i, j in back_to_back)
+    return "\n".join(lines)
+
+
+@handler("leave_balance")
+def handle_leave_balance(turn):
+    leave_index = turn.leave_index
+    if not leave_index:
+        reply = "⚠️ Could not fetch your leave types."
+    else:
+        lines = ["**Your current leave balances:**"]
+        for lt in leave_index:
+            if not lt.has_summary:
+                continue
+            lines.append(f"- {lt.name or 'N/A'}: Balance **{format_days(lt.balance)}**, "
+                         f"Eligible **{format_days(lt.eligible)}**")
+        reply = "\n\n".join(lines)
+    return reply
+
+
+@handler("leave_policy")
+def handle_leave_policy(turn):
+    profile = turn.profile
+    policy_name = profile.get("Lph_Desc_V") or profile.get("Emp_LeavePolicy_V") or "Not specified"
+    lines = [f"**Your leave policy:** {policy_name}", "\n**Entitlements:**"]
+    lines.append("| Leave Type | Eligible (days/year) | Attach Required | Paid/Unpaid | Air Ticket |")
+    lines.append("|------------|----------------------|----------------|-------------|------------|")
+    for lt in turn.leave_index:
+        eligible_str = format_days(lt.eligible) if lt.eligible else "—"
+        attach_required = "Yes" if lt.attach_required else "No"
+        if lt.paid:
+            paid_str = "Paid"
+        elif lt.unpaid:
+            paid_str = "Unpaid"
+        else:
+            paid_str = "—"
+        if lt.air_ticket:
+            percent = lt.air_ticket_percent
+            air_str = f"Yes ({format_days(percent)}%)" if percent else "Yes"
+        else:
+            air_str = "No"
+        lines.append(f"| {lt.name or 'N/A'} | {eligible_str} | {attach_required} | {paid_str} | {air_str} |")
+    reply = "\n".join(lines)
+    return reply
+
+
+@handler("contact_manager")
+def handle_contact_manager(turn):
+    profile = turn.profile
+    manager_name = profile.get("Emp_EmployeeReportsDesc_V", "Not available")
+    manager_email = profile.get("Emp_ManagerEmailID_V", None)
+    manager_mobile = profile.get("Emp_ManagerMobileNo_V", None)
+    if not manager_email:
+        manager_email = profile.get("Emp_EmployeeReportsEmailID_V", None)
+    if not manager_mobile:
+        manager_mobile = profile.get("Emp_EmployeeReportsMobileNo_V", None)
+    contact_lines = [f"Contact information for your reporting manager, {manager_name}:"]
+    if manager_email:
+        contact_lines.append(f"- Email: {manager_email}")
+    if manager_mobile:
+        contact_lines.append(f"- Mobile: {manager_mobile}")
+    if not manager_email and not manager_mobile:
+        contact_lines.append("No contact details available in your profile.")
+    reply = "\n".join(contact_lines)
+    return reply
+
+
+# --- Job Post / Designation ---
+@handler("job_post")
+def handle_job_post(turn):
+    profile = turn.profile
+    job_post = profile.get("Dsm_Desc_V") or profile.get("Emp_Designation_V") or "Not available"
+    reply = f"Your job post is: {job_post}."
+    return reply
+
+
+# --- Department ---
+@handler("department")
+def handle_department(turn):
+    profile = turn.profile
+    department = profile.get("Dpm_Desc_V") or profile.get("Emp_Department_V") or "Not available"
+    reply = f"You work in the {department} department."
+    return reply
+
+
+# --- Reporting Manager ---
+@handler("manager")
+def handle_manager(turn):
+    profile = turn.profile
+    manager = profile.get("Emp_EmployeeReportsDesc_V") or profile.get("Emp_Manager_V") or "Not available"
+    reply = f"Your reporting manager is: {manager}."
+    return reply
+
+
+# --- Shift Policy ---
+@handler("shift")
+def handle_shift(turn):
+    profile = turn.profile
+    shift = (
+        profile.get("Emp_ShiftPolicy_V")
+        or profile.get("Emp_Shift_V")
+        or profile.get("Sfh_ShiftName_V")
+        or profile.get("Sfh_ShiftCode_V")
+        or "Not available"
+    )
+    reply = f"Your shift policy is: {shift}."
+    return reply
+
+
+# --- Visa Type ---
+@handler("visa_type")
+def handle_visa_type(turn):
+    profile = turn.profile
+    visa_type = (
+        profile.get("Emp_VisaType_V")
+        or profile.get("EmpVisatype_Desc_V")
+        or profile.get("Emp_VisaTypeID_N")
+        or "Not available"
+    )
+    reply = f"Your visa type is: {visa_type}."
+    return reply
@@ -0,0 +1,132 @@
+"""Offline BM25 retrieval over the leave help document.
+
+The help document is split into sections (a heading plus its body, such as
+the numbered "How to add ..." steps) and one chunk per field definition
+(``Field - description`` lines, tagged with the section they belong to).
+Only the chunks most relevant to a question are put into LLM prompts,
+within a token budget, instead of the whole document.
+"""
+import math
+import re
+from collections import Counter, namedtuple
+
+Chunk = namedtuple("Chunk", ["title", "text", "tokens"])
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_DEFINITION_RE = re.compile(r"^([A-Z][\w %/().,-]{1,40}?)\s*(?:-|:)\s+\S")
+_STEP_RE = re.compile(r"^\d+\.\s")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it of on or please "
+    "the this to what when which with you your my me".split()
+)
+
+
+def estimate_tokens(text):
+    """Rough token count for ``text`` (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def tokenize(text):
+    """Lower-case, drop stopwords and truncate words to a 4-letter stem.
+
+    Truncation is crude but keeps "apply", "applying" and "application"
+    together without a stemming dependency.
+    """
+    return [w[:4] for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def split_help_doc(text):
+    """Split the help document into section and field-definition chunks."""
+    chunks = []
+    title = ""
+    body = []
+
+    def flush():
+        if body:
+            content = "\n".join(([title] if title else []) + body)
+            chunks.append(Chunk(title, content, estimate_tokens(content)))
+            body.clear()
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        definition = _DEFINITION_RE.match(line)
+        if definition and not _STEP_RE.match(line):
+            flush()
+            content = f"[{title}] {line}" if title else line
+            chunks.append(Chunk(definition.group(1).strip(), content, estimate_tokens(content)))
+        elif len(line) <= 60 and not _STEP_RE.match(line) and not line.endswith("."):
+            flush()
+            title = line
+        else:
+            body.append(line)
+    flush()
+    return chunks
+
+
+class HelpIndex:
+    """BM25 index over help-document chunks."""
+
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.chunks = list(chunks)
+        self.k1 = k1
+        self.b = b
+        self.full_tokens = sum(c.tokens for c in self.chunks)
+        self._tf = [Counter(tokenize(c.text)) for c in self.chunks]
+        self._len = [sum(tf.values()) for tf in self._tf]
+        self._avg_len = (sum(self._len) / len(self._len)) if self._len else 0.0
+        df = Counter()
+        for tf in self._tf:
+            df.update(tf.keys())
+        n = len(self.chunks)
+        self._idf = {t: math.log(1 + (n - f + 0.5) / (f + 0.5)) for t, f in df.items()}
+
+    @classmethod
+    def from_text(cls, text, **kwargs):
+        """Build an index straight from the help document text."""
+        return cls(split_help_doc(text), **kwargs)
+
+    def search(self, query, k=4):
+        """Return up to ``k`` ``(score, chunk)`` pairs, best first, with score > 0."""
+        terms = set(tokenize(query))
+        scored = []
+        for i, tf in enumerate(self._tf):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._len[i] / (self._avg_len or 1))
+            for t in terms:
+                f = tf.get(t)
+                if f:
+                    score += self._idf[t] * f * (self.k1 + 1) / (f + norm)
+            if score > 0:
+                scored.append((score, i))
+        scored.sort(reverse=True)
+        return [(score, self.chunks[i]) for score, i in scored[:k]]
+
+    def context(self, query, k=4, token_budget=600, min_ratio=0.3):
+        """Return ``(text, stats)`` with the top chunks that fit in ``token_budget``.
+
+        Chunks scoring below ``min_ratio`` of the best score are dropped and
+        the rest keep their document order in the returned text. ``stats``
+        reports the chunks used, their token estimate and the tokens saved
+        compared with pasting the whole document.
+        """
+        picked = []
+        used = 0
+        results = self.search(query, k)
+        best = results[0][0] if results else 0
+        for score, chunk in results:
+            if score < best * min_ratio or used + chunk.tokens > token_budget:
+                continue
+            picked.append(chunk)
+            used += chunk.tokens
+        order = {id(c): i for i, c in enumerate(self.chunks)}
+        picked.sort(key=lambda c: order[id(c)])
+        text = "\n\n".join(c.text for c in picked)
+        stats = {
+            "chunks": len(picked),
+            "tokens": used,
+            "full_tokens": self.full_tokens,
+            "saved_tokens": max(self.full_tokens - used, 0),
+        }
+        return text, stats
@@ -0,0 +1,122 @@
+"""Character n-gram TF-IDF nearest-neighbour intent classifier.
+
+Catches paraphrases of the locally answered intents that the hand-written
+rules miss ("how many days off do i have left" for ``leave_balance``), so
+they do not fall through to the LLM. Every training phrase is a vector of
+TF-IDF weighted character n-grams taken within words, which tolerates
+typos and inflections. A message gets the intent of its most similar
+phrase (cosine similarity) if that similarity reaches the threshold.
+
+Phrases labelled :data:`FALLBACK` are open-ended questions that must go to
+the LLM; a message closest to one of them is not classified.
+"""
+import json
+import math
+import re
+from collections import Counter
+
+import numpy as np
+
+# Label of training phrases that should be answered by the LLM.
+FALLBACK = "llm_fallback"
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def char_ngrams(text, sizes=(3, 4, 5)):
+    """Return the character n-grams of each word of ``text``, words padded with spaces."""
+    grams = []
+    for word in _NON_WORD_RE.sub(" ", text.lower()).split():
+        padded = f" {word} "
+        for n in sizes:
+            if len(padded) < n:
+                continue
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def load_examples(path):
+    """Return ``(text, intent)`` pairs from a JSONL file of ``{"text", "intent"}`` objects."""
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                record = json.loads(line)
+                examples.append((record["text"], record["intent"]))
+    return examples
+
+
+class IntentClassifier:
+    """Nearest-neighbour classifier over labelled phrases.
+
+    ``examples`` is an iterable of ``(text, intent)`` pairs. The weights
+    are sublinear term frequency times smoothed inverse document
+    frequency, and every vector is L2-normalised so a dot product is the
+    cosine similarity.
+    """
+
+    def __init__(self, examples, threshold=0.5, sizes=(3, 4, 5)):
+        self.threshold = threshold
+        self.sizes = sizes
+        texts, labels = [], []
+        for text, intent in dict.fromkeys(examples):
+            texts.append(text)
+            labels.append(intent)
+        self.labels = labels
+        counts = [Counter(char_ngrams(t, sizes)) for t in texts]
+        vocabulary = {}
+        for c in counts:
+            for gram in c:
+                vocabulary.setdefault(gram, len(vocabulary))
+        self.vocabulary = vocabulary
+        df = np.zeros(len(vocabulary), dtype=np.float32)
+        for c in counts:
+            df[[vocabulary[g] for g in c]] += 1
+        n = len(texts)
+        self.idf = np.log((1 + n) / (1 + df)) + 1
+        # Weight of n-grams never seen in training, which still count
+        # towards a message's norm.
+        self.unseen_idf = math.log(1 + n) + 1
+        matrix = np.zeros((n, len(vocabulary)), dtype=np.float32)
+        for row, c in enumerate(counts):
+            cols = [vocabulary[g] for g in c]
+            matrix[row, cols] = (1 + np.log(np.fromiter(c.values(), dtype=np.float32))) * self.idf[cols]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Stored by n-gram so a message's few n-grams select contiguous rows.
+        self.matrix = np.ascontiguousarray((matrix / np.where(norms == 0, 1, norms)).T)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def similarities(self, text):
+        """Return the cosine similarity of ``text`` to every training phrase."""
+        counts = Counter(char_ngrams(text, self.sizes))
+        if not counts:
+            return np.zeros(len(self.labels), dtype=np.float32)
+        known = [(self.vocabulary[g], 1 + math.log(c)) for g, c in counts.items() if g in self.vocabulary]
+        unseen = [(1 + math.log(c)) * self.unseen_idf for g, c in counts.items() if g not in self.vocabulary]
+        if not known:
+            return np.zeros(len(self.labels), dtype=np.float32)
+        cols = np.array([col for col, _ in known], dtype=np.intp)
+        weights = np.array([tf for _, tf in known], dtype=np.float32) * self.idf[cols]
+        norm = math.sqrt(float(weights @ weights) + sum(w * w for w in unseen))
+        return (weights / norm) @ self.matrix[cols]
+
+    def nearest(self, text):
+        """Return ``(intent, similarity)`` of the training phrase closest to ``text``."""
+        if not self.labels:
+            return FALLBACK, 0.0
+        sims = self.similarities(text)
+        best = int(np.argmax(sims))
+        return self.labels[best], float(sims[best])
+
+    def classify(self, text):
+        """Return ``(intent, similarity)`` for a confident match, else ``None``.
+
+        Messages closest to a :data:`FALLBACK` phrase are never classified.
+        """
+        intent, score = self.nearest(text)
+        if intent == FALLBACK or score < self.threshold:
+            return None
+        return intent, score
@@ -0,0 +1,475 @@
+"""Precompiled intent router for chat messages.
+
+All regular expressions are compiled and all fuzzy keyword lists are merged
+into a single table when the router is built. Routing a message evaluates
+the rules in priority order. The fuzzy rules are scored in blocks of about
+``FUZZY_BLOCK`` keywords, one batched ``rapidfuzz.process.cdist`` call per
+block, and a block is only scored once routing reaches one of its rules.
+
+Fuzzy matching still costs time linear in the keywords a message is scored
+against. In ``benchmarks/bench_router.py``, 200 extra two-keyword intents
+take a message no rule matches from about 0.2 ms to 1.2-1.4 ms, and the
+mixed messages from about 0.12 ms to 0.3 ms, against 1.5-1.9 ms and
+0.45-0.5 ms for the per-keyword loop the router replaced.
+
+Messages no rule matches can be handed to a local
+:class:`~intent_classifier.IntentClassifier`, trained on the keywords of
+the rules marked ``learned`` plus labelled examples, which routes
+confident paraphrases of those intents instead of leaving them to the LLM.
+"""
+import re
+from collections import namedtuple
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Callable, Optional, Pattern, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from intent_classifier import FALLBACK, IntentClassifier
+
+Route = namedtuple("Route", ["intent", "score", "match", "data"])
+
+# Fuzzy keywords scored per ``cdist`` call.
+FUZZY_BLOCK = 32
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One intent and the ways it can be recognised.
+
+    A rule fires when its ``pattern`` matches, any of its ``substrings``
+    occurs in the text, or its best fuzzy ``keywords`` score reaches
+    ``threshold``. ``exclude`` vetoes the rule when it matches, and
+    ``guard(text, match, context)`` may veto it too by returning a falsy
+    value; any other non-``True`` return value is passed on as
+    ``Route.data``. ``needs`` names the session datasets (``profile``,
+    ``leave_types``, ``leave_history``, ``leave_summaries``) the intent's
+    handler answers from. ``learned`` rules may also be matched by the
+    router's classifier; their handlers must not depend on ``Route.match``
+    or ``Route.data``, which are ``None`` for such matches.
+    """
+
+    name: str
+    pattern: Optional[Pattern] = None
+    substrings: Tuple[str, ...] = ()
+    keywords: Tuple[str, ...] = ()
+    threshold: int = 85
+    exclude: Optional[Pattern] = None
+    guard: Optional[Callable] = None
+    needs: Tuple[str, ...] = ()
+    learned: bool = False
+
+
+class LazyContext(Mapping):
+    """Routing context whose callable values are evaluated on first access.
+
+    Lets a caller offer data that is expensive to obtain (such as leave
+    types fetched from the ERP) to the guards that need it without paying
+    for it on messages that never reach those guards.
+    """
+
+    def __init__(self, **items):
+        self._items = items
+        self._resolved = {}
+
+    def __getitem__(self, key):
+        if key not in self._resolved:
+            value = self._items[key]
+            self._resolved[key] = value() if callable(value) else value
+        return self._resolved[key]
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class IntentRouter:
+    """Resolve a lower-cased message to the first matching :class:`Rule`.
+
+    When no rule matches, the optional ``classifier`` gets the message; its
+    confident matches are routed with the similarity (0-100) as the score.
+    ``fuzzy_block`` is the number of keywords scored per ``cdist`` call:
+    larger blocks favour messages that reach the end of the rules, smaller
+    ones messages an early fuzzy rule matches.
+    """
+
+    def __init__(self, rules, classifier=None, fuzzy_block=FUZZY_BLOCK):
+        self.rules = tuple(rules)
+        self.classifier = classifier
+        self._rules = {rule.name: rule for rule in self.rules}
+        self._needs = {rule.name: rule.needs for rule in self.rules}
+        self._keywords = []
+        self._blocks = []
+        self._block_of = {}
+        names = []
+        for rule in self.rules:
+            if not rule.keywords:
+                continue
+            if not names:
+                block_start, starts = len(self._keywords), []
+            starts.append(len(self._keywords) - block_start)
+            names.append(rule.name)
+            self._keywords.extend(rule.keywords)
+            if len(self._keywords) - block_start >= fuzzy_block:
+                self._add_block(block_start, names, starts)
+                names = []
+        if names:
+            self._add_block(block_start, names, starts)
+        self._cutoff = min((r.threshold for r in self.rules if r.keywords), default=0)
+
+    def _add_block(self, start, names, starts):
+        for name in names:
+            self._block_of[name] = len(self._blocks)
+        self._blocks.append((start, len(self._keywords), tuple(names), np.array(starts, dtype=np.intp)))
+
+    def _score_block(self, text, index):
+        """Return the best keyword score of every rule in fuzzy block ``index``."""
+        start, stop, names, starts = self._blocks[index]
+        scores = process.cdist(
+            [text], self._keywords[start:stop], scorer=fuzz.partial_ratio,
+            score_cutoff=self._cutoff, dtype=np.float32
+        )[0]
+        return dict(zip(names, np.maximum.reduceat(scores, starts).tolist()))
+
+    def fuzzy_scores(self, text):
+        """Return the best keyword score of every fuzzy rule."""
+        fuzzy = {}
+        for index in range(len(self._blocks)):
+            fuzzy.update(self._score_block(text, index))
+        return fuzzy
+
+    def needs(self, intent):
+        """Return the datasets the handler of ``intent`` depends on."""
+        return self._needs.get(intent, ())
+
+    def route(self, text, context=None):
+        """Return the :class:`Route` for ``text`` or ``None`` when nothing matches.
+
+        ``context`` is handed to rule guards that depend on session state,
+        such as a pending leave application or the employee's leave type
+        index (``leave_index``); a :class:`LazyContext` defers loading the
+        latter until a guard asks.
+        """
+        context = context or {}
+        fuzzy = {}
+        for rule in self.rules:
+            match = None
+            score = 0
+            if rule.pattern is not None:
+                match = rule.pattern.search(text)
+                if match:
+                    score = 100
+            if not score and rule.substrings and any(s in text for s in rule.substrings):
+                score = 100
+            if not score and rule.keywords:
+                if rule.name not in fuzzy:
+                    fuzzy.update(self._score_block(text, self._block_of[rule.name]))
+                if fuzzy[rule.name] >= rule.threshold:
+                    score = fuzzy[rule.name]
+            if not score and rule.pattern is None and not rule.substrings and not rule.keywords:
+                score = 100
+            if not score:
+                continue
+            if rule.exclude is not None and rule.exclude.search(text):
+                continue
+            data = None
+            if rule.guard is not None:
+                data = rule.guard(text, match, context)
+                if not data:
+                    continue
+                if data is True:
+                    data = None
+            return Route(rule.name, score, match, data)
+        return self.classify(text)
+
+    def classify(self, text):
+        """Return the classifier's :class:`Route` for ``text``, or ``None``."""
+        if self.classifier is None:
+            return None
+        result = self.classifier.classify(text)
+        if result is None:
+            return None
+        intent, similarity = result
+        rule = self._rules.get(intent)
+        if rule is None or not rule.learned:
+            return None
+        if rule.exclude is not None and rule.exclude.search(text):
+            return None
+        return Route(intent, round(similarity * 100, 1), None, None)
+
+
+# ---------------------------------------------------------------------------
+# Keyword tables and default rules. Built once per process on import.
+# ---------------------------------------------------------------------------
+
+PROCEDURE_KEYWORDS = (
+    "procedure to apply leave",
+    "how to apply leave",
+    "leave application procedure",
+    "apply for leave process"
+)
+
+ENOUGH_BALANCE_KEYWORDS = (
+    "enough leave", "enough balance", "get approved", "sufficient leave", "sufficient balance"
+)
+
+HOW_MANY_LEAVES_KEYWORDS = (
+    "how many leaves did i apply",
+    "leaves did i apply this year",
+    "leaves did i take this year",
+    "how many leaves have i taken this year",
+    "number of leaves this year",
+    "total leaves this year"
+)
+
+LEAVE_MONTH_KEYWORDS = (
+    "did i apply for any leaves this month",
+    "leaves this month",
+    "did i take leave this month",
+    "leave applications this month",
+    "leaves in current month"
+)
+
+WHO_APPROVES_KEYWORDS = (
+    "who can approve my leave",
+    "who approves my leaves",
+    "who is the leave approver",
+    "who can approve my leaves",
+    "who approves leave",
+    "leave approval authority"
+)
+
+LEAVE_KEYWORDS = (
+    "all my leaves",
+    "all my leaves i have applied for",
+    "all leaves",
+    "show me all my leave applications",
+    "all my previous leave applications",
+    "leave applications",
+    "all leave applications",
+    "what are those",
+    "which are these leaves",
+    "what leaves did i take this year",
+    "list my leaves",
+    "what were my leaves this year",
+    "my leaves for this year",
+    "leaves for this year",
+    "leaves this year",
+    "show my leaves this year",
+    "which leaves did i take this year",
+    "leaves applied this year",
+    "my leaves taken this year",
+    "which leaves have i taken this year"
+)
+
+LAST_APPROVED_LEAVE_KEYWORDS = (
+    "last approved leave",
+    "most recent approved leave",
+    "latest approved leave",
+    "previous approved leave"
+)
+
+LAST_LEAVE_KEYWORDS = (
+    "last leave",
+    "most recent leave",
+    "previous leave",
+    "latest leave"
+)
+
+DAYS_BY_TYPE_KEYWORDS = (
+    "days taken per leave type",
+    "leave days by type",
+    "how many days of each leave type",
+    "total days per leave type",
+    "breakdown of my leave days",
+    "days used per leave type this year"
+)
+
+MONTHLY_USAGE_KEYWORDS = (
+    "month by month leave",
+    "monthly leave usage",
+    "leave usage by month",
+    "leave days per month",
+    "which month did i take the most leave",
+    "leave breakdown by month"
+)
+
+OVERLAPPING_LEAVES_KEYWORDS = (
+    "overlapping leaves",
+    "do any of my leaves overlap",
+    "back to back leaves",
+    "consecutive leaves",
+    "leaves that overlap"
+)
+
+LEAVE_BALANCE_KEYWORDS = (
+    "leave balance",
+    "how many leaves left",
+    "balance leaves",
+    "my leave balance",
+    "available leaves",
+    "leaves remaining"
+)
+
+LEAVE_POLICY_KEYWORDS = (
+    "leave policy",
+    "my leave policy",
+    "what is my leave policy",
+    "show my leave policy",
+    "explain leave policy",
+    "leave entitlements",
+    "leave rules",
+    "leave policy details",
+    "policy for leaves",
+    "leave policy information"
+)
+
+CONTACT_MANAGER_KEYWORDS = (
+    "how can i contact my manager",
+    "how can i contact him",
+    "how do i reach my manager",
+    "contact my reporting manager",
+    "manager contact",
+    "contact details for my manager"
+)
+
+JOB_POST_KEYWORDS = (
+    "job post", "job title", "designation", "what is my job post", "what is my designation", "position"
+)
+
+DEPARTMENT_KEYWORDS = (
+    "department", "which department", "my department", "where do i work", "which team", "department do i work"
+)
+
+MANAGER_KEYWORDS = (
+    "manager", "reporting manager", "who is my manager", "who is my reporting manager", "supervisor"
+)
+
+SHIFT_KEYWORDS = (
+    "shift policy", "my shift policy", "what is my shift", "shift", "work shift"
+)
+
+VISA_TYPE_KEYWORDS = (
+    "visa", "visa type", "what is my visa", "what is my visa type", "work visa", "residence permit", "rp type"
+)
+
+REF_RE = re.compile(r"(?:lp|ref)[^\d]*(\d{3,})")
+DAYS_BY_TYPE_RE = re.compile(r"\b(?:per|each|by)\s+(?:leave\s+)?type\b")
+MONTHLY_USAGE_RE = re.compile(
+    r"\b(?:leaves?|days? off)\b.*\b(?:(?:per|each|by|every)\s+month\b|month[- ]by[- ]month)"
+    r"|\bmonthly leave|\bwhich month\b.*\bleaves?\b")
+OVERLAPPING_LEAVES_RE = re.compile(r"overlap|back[- ]to[- ]back")
+# Analytics wording the fuzzy history rules leave to the analytics rules after them.
+ANALYTICS_RE = re.compile("|".join(p.pattern for p in (DAYS_BY_TYPE_RE, MONTHLY_USAGE_RE, OVERLAPPING_LEAVES_RE)))
+# Vetoes messages that do not mention leave at all, e.g. "my monthly salary".
+NO_LEAVE_RE = re.compile(r"^(?!.*\b(?:leaves?|days?|off|holidays?|vacations?)\b)")
+BALANCE_RE = re.compile(r"\b(?:balance|left|remaining)\b")
+_LETTERS_RE = re.compile(r"[a-zA-Z]+")
+_DAYS_LEAVE_RE = re.compile(r"\b(?:days?|leave)\b")
+
+
+def _has_pending_application(text, match, context):
+    return bool(context.get("pending_leave_application"))
+
+
+def _no_type_after_days(text, match, context):
+    between = _DAYS_LEAVE_RE.sub("", text[match.end(1):match.end()])
+    return not _LETTERS_RE.search(between)
+
+
+def _asks_enough_balance(text, match, context):
+    return any(kw in text for kw in ENOUGH_BALANCE_KEYWORDS)
+
+
+def _leave_type_left(text, match, context):
+    """Return the leave type asked about in "how many <type> leave left" questions."""
+    if "left" not in text:
+        return None
+    leave_index = context.get("leave_index")
+    return leave_index.find_in(text) if leave_index is not None else None
+
+
+# Datasets the intent handlers answer from.
+PROFILE = ("profile",)
+HISTORY = ("leave_history",)
+BALANCES = ("leave_types", "leave_summaries")
+
+DEFAULT_RULES = (
+    Rule("apply_procedure", pattern=re.compile(r"how (do i|can i|to) apply for (.+?) leave")),
+    Rule("general_apply_procedure", pattern=re.compile(r"how (do i|can i|to) apply for leave"),
+         substrings=PROCEDURE_KEYWORDS, learned=True),
+    Rule("apply_leave", pattern=re.compile(
+        r"\b(?:can\s+i\s+)?apply\s+for\s+(\d+)\s*(?:days?\b)?\s*(?!days?\b)([a-zA-Z][a-zA-Z ]*?)\s*leave\b"),
+         needs=BALANCES),
+    Rule("clarify_leave_type", pattern=re.compile(r"for\s+([a-zA-Z ]+?)\s*leave\b"),
+         guard=_has_pending_application, needs=BALANCES),
+    Rule("apply_days", pattern=re.compile(r"apply\s+for\s+(\d+)\s*(?:day|days)?\s*leave\b"),
+         guard=_no_type_after_days, needs=BALANCES),
+    Rule("enough_balance", substrings=ENOUGH_BALANCE_KEYWORDS, exclude=REF_RE,
+         needs=HISTORY + BALANCES, learned=True),
+    Rule("ref_enough_balance", pattern=REF_RE, guard=_asks_enough_balance,
+         needs=HISTORY + BALANCES),
+    Rule("draft_letter", substrings=("draft a letter", "requesting to approve"),
+         needs=PROFILE + HISTORY, learned=True),
+    Rule("leave_type_left", guard=_leave_type_left, needs=BALANCES),
+    Rule("air_ticket", pattern=re.compile(r"air ?ticket"), needs=BALANCES, learned=True),
+    Rule("leaves_this_year", keywords=HOW_MANY_LEAVES_KEYWORDS, exclude=ANALYTICS_RE, needs=HISTORY,
+         learned=True),
+    Rule("leaves_this_month", keywords=LEAVE_MONTH_KEYWORDS, exclude=ANALYTICS_RE, needs=HISTORY,
+         learned=True),
+    Rule("who_approves", keywords=WHO_APPROVES_KEYWORDS, threshold=80, needs=PROFILE, learned=True),
+    Rule("list_leaves", keywords=LEAVE_KEYWORDS, threshold=80, exclude=ANALYTICS_RE, needs=HISTORY,
+         learned=True),
+    Rule("last_approved_leave", keywords=LAST_APPROVED_LEAVE_KEYWORDS, exclude=ANALYTICS_RE, needs=HISTORY,
+         learned=True),
+    Rule("has_leave_type", pattern=re.compile(r"do i have (.+?) leave"), needs=BALANCES),
+    Rule("last_leave", keywords=LAST_LEAVE_KEYWORDS, exclude=ANALYTICS_RE, needs=HISTORY, learned=True),
+    Rule("days_by_type", pattern=DAYS_BY_TYPE_RE, keywords=DAYS_BY_TYPE_KEYWORDS, exclude=BALANCE_RE,
+         needs=HISTORY, learned=True),
+    Rule("monthly_usage", pattern=MONTHLY_USAGE_RE, keywords=MONTHLY_USAGE_KEYWORDS, exclude=NO_LEAVE_RE,
+         needs=HISTORY, learned=True),
+    Rule("overlapping_leaves", pattern=OVERLAPPING_LEAVES_RE,
+         keywords=OVERLAPPING_LEAVES_KEYWORDS, needs=HISTORY, learned=True),
+    Rule("leave_balance", keywords=LEAVE_BALANCE_KEYWORDS, needs=BALANCES, learned=True),
+    Rule("leave_policy", keywords=LEAVE_POLICY_KEYWORDS, threshold=80, needs=PROFILE + BALANCES, learned=True),
+    Rule("contact_manager", keywords=CONTACT_MANAGER_KEYWORDS, threshold=80, needs=PROFILE, learned=True),
+    Rule("job_post", substrings=JOB_POST_KEYWORDS, needs=PROFILE, learned=True),
+    Rule("department", substrings=DEPARTMENT_KEYWORDS, needs=PROFILE, learned=True),
+    Rule("manager", substrings=MANAGER_KEYWORDS, needs=PROFILE, learned=True),
+    Rule("shift", substrings=SHIFT_KEYWORDS, needs=PROFILE, learned=True),
+    Rule("visa_type", substrings=VISA_TYPE_KEYWORDS, needs=PROFILE, learned=True),
+)
+
+
+def rule_examples(rules):
+    """Yield ``(phrase, intent)`` training pairs from the keywords of ``learned`` rules.
+
+    Single words ("visa", "shift") are left out: as whole training phrases
+    they make any short question sharing a few n-grams look like a match.
+    """
+    for rule in rules:
+        if rule.learned:
+            for phrase in rule.keywords + rule.substrings:
+                if len(phrase.split()) > 1:
+                    yield phrase, rule.name
+
+
+def build_default_router(examples=(), classifier_threshold=None):
+    """Return an :class:`IntentRouter` over the chatbot's built-in intents.
+
+    With a ``classifier_threshold`` the router also gets an
+    :class:`~intent_classifier.IntentClassifier` trained on the rules'
+    keywords and the labelled ``examples`` (``(text, intent)`` pairs).
+    """
+    classifier = None
+    if classifier_threshold is not None:
+        learned = {rule.name for rule in DEFAULT_RULES if rule.learned}
+        unknown = {intent for _, intent in examples if intent not in learned} - {FALLBACK}
+        if unknown:
+            raise ValueError(f"Examples for intents the classifier cannot route: {', '.join(sorted(unknown))}")
+        training = list(rule_examples(DEFAULT_RULES)) + [(text.lower(), intent) for text, intent in examples]
+        classifier = IntentClassifier(training, threshold=classifier_threshold)
+    return IntentRouter(DEFAULT_RULES, classifier)
@@ -0,0 +1,123 @@
+"""Vectorised aggregates over an employee's leave applications.
+
+:class:`LeaveAnalytics` turns the fields a
+:class:`~leave_history.LeaveHistory` has already parsed into NumPy columns
+once per load: dates as ``datetime64[D]``, ``LeaveGrid_Ela_Tot`` as floats
+and the leave type and status as integer codes. Every aggregate is then a
+handful of array operations (``bincount``, ``maximum.accumulate``,
+``busday_count``) rather than a Python loop that reparses dates, so they
+are cheap enough to compute on every turn for histories of many years.
+"""
+import numpy as np
+
+from leave_history import as_leave_history
+
+# Statuses of applications whose days count as leave taken.
+TAKEN_STATUSES = ("approved",)
+# Statuses of applications that still block their dates.
+ACTIVE_STATUSES = ("approved", "pending")
+
+# Working days, Monday first, as ``numpy.busday_count`` expects them.
+DEFAULT_WEEKMASK = "1111100"
+
+_ONE_DAY = np.timedelta64(1, "D")
+# ``date.toordinal()`` of 1970-01-01, day 0 of ``datetime64[D]``.
+_EPOCH_ORDINAL = 719163
+_NAT = np.datetime64("NaT", "D").view(np.int64)
+
+
+def _days(dates):
+    """Return ``date`` objects as ``datetime64[D]``, NaT for ``None``.
+
+    Goes through the day ordinals: NumPy converts ``date`` objects one
+    by one and far more slowly.
+    """
+    ordinals = np.fromiter((d.toordinal() - _EPOCH_ORDINAL if d is not None else _NAT for d in dates),
+                           dtype=np.int64, count=len(dates))
+    return ordinals.view("datetime64[D]")
+
+
+def _codes(values):
+    """Return ``(names, codes)`` with ``names[codes]`` equal to ``values``."""
+    names, codes = np.unique(np.array(values, dtype=str), return_inverse=True)
+    return names, codes.astype(np.intp).reshape(-1)
+
+
+class LeaveAnalytics:
+    """An employee's leave applications as NumPy columns, with their aggregates.
+
+    Built from a :class:`~leave_history.LeaveHistory`, reusing its parsed
+    fields, or from a list of raw ERP records, which is indexed first; row
+    ``i`` of every column is ``records[i]``. Aggregates that take a
+    ``year`` place an application in the year and month of its from-date,
+    like :meth:`LeaveHistory.by_year <leave_history.LeaveHistory.by_year>`.
+    ``weekmask`` gives the working days used to tell whether two
+    applications are back to back.
+    """
+
+    def __init__(self, records=None, weekmask=DEFAULT_WEEKMASK):
+        history = as_leave_history(records)
+        self.records = list(history)
+        self.weekmask = weekmask
+        parsed = history.records
+        self.from_date = _days([r.from_date for r in parsed])
+        self.to_date = _days([r.to_date for r in parsed])
+        self.days = np.array([r.days for r in parsed], dtype=np.float64)
+        self.refs = [r.ref for r in parsed]
+        self.types, self.type_codes = _codes([r.leave_type for r in parsed])
+        self.statuses, self.status_codes = _codes([r.status for r in parsed])
+        # NaT dates give a year no application has.
+        self.year = self.from_date.astype("datetime64[Y]").astype(np.int64) + 1970
+        self.month = self.from_date.astype("datetime64[M]").astype(np.int64) % 12
+
+    def __len__(self):
+        return len(self.records)
+
+    def mask(self, year=None, statuses=TAKEN_STATUSES, month=None):
+        """Return a boolean row mask for ``statuses`` and, if given, ``year`` and ``month`` (1-12)."""
+        mask = np.isin(self.statuses, statuses)[self.status_codes]
+        if year is not None:
+            mask &= self.year == year
+        if month is not None:
+            mask &= (self.month == month - 1) & ~np.isnat(self.from_date)
+        return mask
+
+    def days_by_type(self, year=None, statuses=TAKEN_STATUSES, month=None):
+        """Return ``{leave type: days}`` for the types with applications in ``statuses``."""
+        mask = self.mask(year, statuses, month)
+        codes = self.type_codes[mask]
+        totals = np.bincount(codes, weights=self.days[mask], minlength=len(self.types))
+        counts = np.bincount(codes, minlength=len(self.types))
+        return {str(name): float(total) for name, total, n in zip(self.types, totals, counts) if n}
+
+    def monthly_usage(self, year, statuses=TAKEN_STATUSES):
+        """Return the days of leave in each month of ``year`` as an array of 12 floats."""
+        mask = self.mask(year, statuses)
+        return np.bincount(self.month[mask], weights=self.days[mask], minlength=12).astype(np.float64)
+
+    def adjacent_pairs(self, statuses=ACTIVE_STATUSES, holidays=()):
+        """Return ``(overlapping, back_to_back)`` lists of ``(i, j)`` row pairs.
+
+        Applications are taken in from-date order; ``j`` is paired with the
+        earlier application ``i`` that ends last. They overlap when ``j``
+        starts on or before that end, and are back to back when no working
+        day (per the weekmask and ``holidays``) lies between them.
+        """
+        rows = np.flatnonzero(self.mask(None, statuses)
+                              & ~np.isnat(self.from_date) & ~np.isnat(self.to_date))
+        if rows.size < 2:
+            return [], []
+        rows = rows[np.argsort(self.from_date[rows], kind="stable")]
+        starts, ends = self.from_date[rows], self.to_date[rows]
+        running_end = np.maximum.accumulate(ends)
+        position = np.arange(rows.size)
+        # Position of the application that holds each running end.
+        owner = np.maximum.accumulate(np.where(ends == running_end, position, 0))
+        previous_end, following = running_end[:-1], starts[1:]
+        overlapping = following <= previous_end
+        gap_start = np.where(overlapping, following, previous_end + _ONE_DAY)
+        back_to_back = ~overlapping & (
+            np.busday_count(gap_start, following, weekmask=self.weekmask, holidays=list(holidays)) == 0)
+        earlier, later = rows[owner[:-1]], rows[1:]
+        return (list(zip(earlier[overlapping].tolist(), later[overlapping].tolist())),
+                list(zip(earlier[back_to_back].tolist(), later[back_to_back].tolist())))
@@ -0,0 +1,125 @@
+"""Indexed, pre-parsed view of an employee's leave applications."""
+from collections import defaultdict
+from datetime import date
+
+
+def parse_erp_date(value):
+    """Parse an ERP ``YYYY-MM-DDTHH:MM:SS`` string into a ``date`` (or ``None``)."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.split("T")[0])
+    except (ValueError, AttributeError):
+        return None
+
+
+class LeaveRecord:
+    """One leave application with its fields parsed once."""
+
+    __slots__ = ("raw", "index", "ref", "leave_type", "status", "from_date", "to_date", "days", "from_key")
+
+    def __init__(self, raw, index):
+        self.raw = raw
+        self.index = index
+        self.ref = str(raw.get("LeaveGrid_Ela_RefferNo_V", ""))
+        self.leave_type = raw.get("LeaveGrid_Lvm_Description_V", "").strip()
+        self.status = raw.get("LeaveGrid_Status", "").strip().lower()
+        self.from_key = raw.get("LeaveGrid_Ela_FromDate_D", "") or ""
+        self.from_date = parse_erp_date(self.from_key)
+        self.to_date = parse_erp_date(raw.get("LeaveGrid_Ela_ToDate_D", ""))
+        try:
+            self.days = float(raw.get("LeaveGrid_Ela_Tot", 0))
+        except (ValueError, TypeError):
+            self.days = 0.0
+
+
+class LeaveHistory:
+    """Leave applications indexed by year, month, status, type and reference.
+
+    Built once when the history loads; every lookup afterwards is a
+    dictionary access instead of a scan that reparses dates. Lookups return
+    the original ERP dictionaries in their original order, and iterating or
+    indexing the object behaves like the raw list it was built from.
+    """
+
+    def __init__(self, raw_records=None):
+        raw_records = raw_records if isinstance(raw_records, list) else []
+        self.records = [LeaveRecord(r, i) for i, r in enumerate(raw_records)]
+        self._by_year = defaultdict(list)
+        self._by_month = defaultdict(list)
+        self._by_status = defaultdict(list)
+        self._by_type = defaultdict(list)
+        self._by_ref = {}
+        for rec in self.records:
+            if rec.from_date is not None:
+                self._by_year[rec.from_date.year].append(rec)
+                self._by_month[(rec.from_date.year, rec.from_date.month)].append(rec)
+            self._by_status[rec.status].append(rec)
+            self._by_type[rec.leave_type.lower()].append(rec)
+            self._by_ref.setdefault(rec.ref, rec)
+            digits = "".join(ch for ch in rec.ref if ch.isdigit())
+            if digits:
+                self._by_ref.setdefault(digits, rec)
+        # Ordered by the raw from-date string like the ``max()`` calls this
+        # replaces; ties keep the earliest record last so it wins ``latest``.
+        self.by_date = sorted(self.records, key=lambda r: (r.from_key, -r.index))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __bool__(self):
+        return bool(self.records)
+
+    def __iter__(self):
+        return (rec.raw for rec in self.records)
+
+    def __getitem__(self, i):
+        return self.records[i].raw
+
+    @staticmethod
+    def _raw(records):
+        return [rec.raw for rec in records]
+
+    def by_year(self, year):
+        """Return applications whose from-date falls in ``year``."""
+        return self._raw(self._by_year.get(year, []))
+
+    def by_month(self, month, year):
+        """Return applications whose from-date falls in ``month`` of ``year``."""
+        return self._raw(self._by_month.get((year, month), []))
+
+    def by_status(self, status, year=None):
+        """Return applications with ``status`` (case-insensitive), optionally in ``year``."""
+        records = self._by_status.get(status.strip().lower(), [])
+        if year:
+            records = [r for r in records if r.from_date is not None and r.from_date.year == year]
+        return self._raw(records)
+
+    def by_type(self, leave_type):
+        """Return applications of the given leave type description."""
+        return self._raw(self._by_type.get(leave_type.strip().lower(), []))
+
+    def find_ref(self, ref_partial):
+        """Return the application whose reference number contains ``ref_partial``."""
+        rec = self._by_ref.get(ref_partial)
+        if rec is None:
+            rec = next((r for r in self.records if ref_partial in r.ref), None)
+        return rec.raw if rec is not None else None
+
+    def latest(self, status=None):
+        """Return the application with the latest from-date, optionally for one status."""
+        if status is None:
+            return self.by_date[-1].raw if self.by_date else None
+        status = status.strip().lower()
+        for rec in reversed(self.by_date):
+            if rec.status == status:
+                return rec.raw
+        return None
+
+
+def as_leave_history(leave_history):
+    """Return ``leave_history`` as a :class:`LeaveHistory`, indexing raw lists."""
+    if isinstance(leave_history, LeaveHistory):
+        return leave_history
+    return LeaveHistory(leave_history)
+
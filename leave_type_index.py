@@ -0,0 +1,169 @@
+"""Per-employee index of leave types by name, abbreviation and alias."""
+import re
+
+from rapidfuzz import fuzz, process
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_LEAVE_WORDS = ("leaves", "leave")
+# Words too generic to name a leave type on their own.
+GENERIC_WORDS = frozenset(("leave", "leaves", "day", "days"))
+
+# Extra names for leave types whose description contains the key word.
+COMMON_ALIASES = {
+    "annual": ("al", "vacation", "holiday", "holidays", "yearly"),
+    "sick": ("sl", "medical", "illness"),
+    "casual": ("cl",),
+    "emergency": ("el", "urgent"),
+    "maternity": ("ml", "pregnancy"),
+    "paternity": ("pl",),
+    "unpaid": ("lwp", "lop", "without pay", "no pay", "loss of pay"),
+    "compassionate": ("bereavement", "funeral"),
+    "hajj": ("haj", "pilgrimage"),
+    "study": ("exam", "examination"),
+}
+
+# Lowest rapidfuzz ratio (0-100) at which a misspelt name still resolves.
+FUZZY_CUTOFF = 85
+
+
+def normalize_leave_name(text):
+    """Lower-case ``text``, keep only words and drop a trailing "leave"."""
+    words = _NON_WORD_RE.sub(" ", str(text).lower()).split()
+    while len(words) > 1 and words[-1] in _LEAVE_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _flag(value):
+    return str(value).strip() == "1"
+
+
+class LeaveType:
+    """One leave type with its balance summary parsed once."""
+
+    __slots__ = ("raw", "lpd_id", "atm_id", "name", "key", "summary", "has_summary",
+                 "balance", "eligible", "air_ticket", "air_ticket_percent", "paid", "unpaid",
+                 "attach_required")
+
+    def __init__(self, raw, summary):
+        self.raw = raw
+        self.lpd_id = raw.get("Lpd_ID_N")
+        self.atm_id = raw.get("Atm_ID_N")
+        self.name = raw.get("Lvm_Description_V", "").strip()
+        self.key = normalize_leave_name(self.name)
+        # Summaries the ERP could not serve hold an "error" entry.
+        self.has_summary = isinstance(summary, dict) and bool(summary) and "error" not in summary
+        self.summary = summary if self.has_summary else {}
+        self.balance = _number(self.summary.get("Balance", 0))
+        self.eligible = _number(self.summary.get("Eligible", 0))
+        self.air_ticket = _flag(self.summary.get("Airticket"))
+        percent = self.summary.get("AirTicketPercent")
+        self.air_ticket_percent = _number(percent) if percent not in (None, "") else None
+        self.paid = _flag(self.summary.get("Paid"))
+        self.unpaid = _flag(self.summary.get("UnPaid"))
+        self.attach_required = _flag(raw.get("Lvm_AttachRequired_N", "0"))
+
+
+class LeaveTypeIndex:
+    """An employee's leave types and balances, looked up by any of their names.
+
+    Built once from the raw leave types and the summaries keyed by
+    ``Lpd_ID_N``. Each type is reachable by its normalised description
+    ("annual" for "ANNUAL LEAVE"), its first word when no other type
+    shares it, its initials ("al") and the :data:`COMMON_ALIASES` of the
+    words in its name. Names are checked in that order, so an exact name
+    always wins over an alias; :data:`GENERIC_WORDS` are never names.
+    :meth:`lookup` is a dictionary access; only names that miss fall back
+    to fuzzy matching, whose result is then remembered.
+    """
+
+    def __init__(self, leave_types=None, leave_summaries=None):
+        leave_types = leave_types if isinstance(leave_types, list) else []
+        leave_summaries = leave_summaries if isinstance(leave_summaries, dict) else {}
+        self.types = [LeaveType(lt, leave_summaries.get(lt.get("Lpd_ID_N"))) for lt in leave_types]
+        self._by_id = {str(t.lpd_id): t for t in self.types}
+        self._names = {}
+        # Names too loose to spot in free text unless "leave" follows them:
+        # first words and two-letter initials.
+        self._loose = set()
+        first_words = {}
+        for t in self.types:
+            if t.key:
+                first_words.setdefault(t.key.split()[0], []).append(t)
+        for t in self.types:
+            self._add(t.key, t)
+            self._add(f"{t.key} leave", t)
+        for word, types in first_words.items():
+            if len(types) == 1:
+                self._add(word, types[0], loose=True)
+        for t in self.types:
+            words = t.key.split()
+            if len(words) > 1:
+                self._add("".join(w[0] for w in words), t)
+            self._add("".join(w[0] for w in words) + "l", t)
+            for word in words:
+                for alias in COMMON_ALIASES.get(word, ()):
+                    self._add(alias, t)
+        self._choices = list(self._names)
+        self._fuzzy = {}
+
+    def _add(self, name, leave_type, loose=False):
+        if not name or len(name) < 2 or name in GENERIC_WORDS or name in self._names:
+            return
+        self._names[name] = leave_type
+        if loose or len(name) == 2:
+            self._loose.add(name)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __bool__(self):
+        return bool(self.types)
+
+    def __iter__(self):
+        return iter(self.types)
+
+    def by_id(self, lpd_id):
+        """Return the leave type with ``Lpd_ID_N`` ``lpd_id`` (``None`` if unknown)."""
+        return self._by_id.get(str(lpd_id))
+
+    def lookup(self, name):
+        """Return the :class:`LeaveType` called ``name``, tolerating aliases and typos."""
+        key = normalize_leave_name(name)
+        found = self._names.get(key)
+        if found is not None or len(key) < 3:
+            return found
+        if key not in self._fuzzy:
+            match = process.extractOne(key, self._choices, scorer=fuzz.ratio, score_cutoff=FUZZY_CUTOFF)
+            self._fuzzy[key] = self._names[match[0]] if match else None
+        return self._fuzzy[key]
+
+    def find_in(self, text, max_words=3):
+        """Return the first leave type named anywhere in ``text`` (exact names and aliases only).
+
+        First words and two-letter initials only count when followed by
+        "leave" ("sl leave", not "sl").
+        """
+        words = _NON_WORD_RE.sub(" ", str(text).lower()).split()
+        for size in range(min(max_words, len(words)), 0, -1):
+            for i in range(len(words) - size + 1):
+                name = " ".join(words[i:i + size])
+                found = self._names.get(name)
+                if found is None:
+                    continue
+                if name in self._loose and (i + size >= len(words) or words[i + size] not in _LEAVE_WORDS):
+                    continue
+                return found
+        return None
+
+
+def format_days(value):
+    """Format a day count without a needless ``.0`` ("12", "12.5")."""
+    return f"{value:g}"
@@ -0,0 +1,96 @@
+"""Helpers for streamed and non-streamed chat completions."""
+import logging
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+ToolCall = namedtuple("ToolCall", ["id", "name", "arguments"])
+
+
+class ChatStream:
+    """Iterate over the text of a streamed chat completion.
+
+    Wraps the iterator returned by ``chat.completions.create(stream=True)``
+    and yields content deltas as they arrive, so it can be handed straight
+    to ``st.write_stream``. Tool-call deltas (and legacy ``function_call``
+    deltas) are accumulated along the way and available as
+    :attr:`tool_calls` once the stream is exhausted, as is the token
+    :attr:`usage` when the request asked for it with
+    ``stream_options={"include_usage": True}``.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._started = time.monotonic()
+        self._parts = []
+        self._calls = {}
+        self.first_token_seconds = None
+        self.finish_reason = None
+        self.usage = None
+
+    def __iter__(self):
+        for chunk in self._stream:
+            if getattr(chunk, "usage", None) is not None:
+                self.usage = chunk.usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta
+            if choice.finish_reason:
+                self.finish_reason = choice.finish_reason
+            for tc in getattr(delta, "tool_calls", None) or []:
+                call = self._calls.setdefault(tc.index, {"id": None, "name": "", "arguments": ""})
+                if tc.id:
+                    call["id"] = tc.id
+                if tc.function is not None:
+                    call["name"] += tc.function.name or ""
+                    call["arguments"] += tc.function.arguments or ""
+            fc = getattr(delta, "function_call", None)
+            if fc is not None:
+                call = self._calls.setdefault(-1, {"id": None, "name": "", "arguments": ""})
+                call["name"] += fc.name or ""
+                call["arguments"] += fc.arguments or ""
+            if delta.content:
+                if self.first_token_seconds is None:
+                    self.first_token_seconds = time.monotonic() - self._started
+                    logger.info("LLM time to first token: %.2fs", self.first_token_seconds)
+                self._parts.append(delta.content)
+                yield delta.content
+
+    @property
+    def text(self):
+        """The content received so far."""
+        return "".join(self._parts)
+
+    @property
+    def tool_calls(self):
+        """Tool calls requested by the model, in the order it sent them."""
+        return [
+            ToolCall(c["id"] or f"call_{i}", c["name"], c["arguments"])
+            for i, c in sorted(self._calls.items())
+        ]
+
+
+def message_tool_calls(message):
+    """Return the tool calls of a non-streamed completion message as ``ToolCall``s."""
+    calls = [
+        ToolCall(tc.id, tc.function.name, tc.function.arguments)
+        for tc in getattr(message, "tool_calls", None) or []
+    ]
+    fc = getattr(message, "function_call", None)
+    if fc is not None:
+        calls.append(ToolCall(f"call_{len(calls)}", fc.name, fc.arguments))
+    return calls
+
+
+def assistant_tool_message(tool_calls):
+    """Build the assistant message that records ``tool_calls`` in the history."""
+    return {
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [
+            {"id": c.id, "type": "function", "function": {"name": c.name, "arguments": c.arguments}}
+            for c in tool_calls
+        ],
+    }
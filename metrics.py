@@ -0,0 +1,342 @@
+"""In-process latency spans and counters with Prometheus text export.
+
+Metrics are module-level objects registered in :data:`REGISTRY`, much like
+loggers: any module imports the metric it records and calls ``inc`` or
+``observe`` (or times a block with :meth:`Histogram.time`). Values are kept
+per process; :class:`MetricsExporter` serves them in the Prometheus text
+format over HTTP and/or writes them to a file for scraping or collection.
+Percentiles per label (e.g. p95 turn time per intent) are derived from the
+histogram buckets with ``histogram_quantile`` on the Prometheus side, or
+with :meth:`Histogram.quantile` locally.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans from a sub-millisecond cache hit up to a slow LLM reply.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        """Return a snapshot of the raw values keyed by label-value tuples."""
+        with self._lock:
+            return {k: (list(v[0]), v[1], v[2]) if isinstance(v, list) else v for k, v in self._values.items()}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic count, e.g. cache hits or LLM tokens."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class _Span:
+    """Times a ``with`` block; ``labels`` may be amended before it exits."""
+
+    __slots__ = ("histogram", "labels", "started", "seconds")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.started = None
+        self.seconds = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.started
+        self.histogram.observe(self.seconds, **self.labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Latency distribution in cumulative buckets, plus sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Return a context manager observing the duration of its block."""
+        return _Span(self, labels)
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def quantile(self, q, **labels):
+        """Estimate the ``q`` quantile from the buckets, as ``histogram_quantile`` does."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if not state or not state[2]:
+                return None
+            counts = list(state[0])
+            total = state[2]
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets, counts):
+            if n and cumulative + n >= rank:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / n
+            cumulative += n
+            lower = bound
+        return lower
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """A named set of metrics rendered together."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Streamlit re-executes the script; hand back the same metric.
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def clear(self):
+        """Reset every metric's values (the metrics stay registered)."""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write :meth:`render` output to ``path`` atomically."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+REGISTRY = Registry()
+
+ERP_REQUEST_SECONDS = REGISTRY.histogram(
+    "leavebot_erp_request_seconds", "ERP HTTP calls, including retries.", ("endpoint", "outcome")
+)
+ERP_CACHE_EVENTS = REGISTRY.counter(
+    "leavebot_erp_cache_events_total", "ERP cache lookups and refreshes by outcome.", ("dataset", "event")
+)
+BOOTSTRAP_SECONDS = REGISTRY.histogram(
+    "leavebot_bootstrap_seconds", "Loading a new session's ERP data.", ("outcome",)
+)
+TEAM_LOAD_SECONDS = REGISTRY.histogram(
+    "leavebot_team_load_seconds", "Loading the ERP data of a manager's team.", ("outcome",)
+)
+ROUTE_SECONDS = REGISTRY.histogram(
+    "leavebot_intent_route_seconds", "Intent routing of one message."
+)
+INTENT_MATCHES = REGISTRY.counter(
+    "leavebot_intent_matches_total", "Messages per resolved intent.", ("intent",)
+)
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "leavebot_llm_request_seconds", "Chat completion calls, until the last token.", ("purpose", "outcome")
+)
+LLM_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "leavebot_llm_first_token_seconds", "Time to the first streamed token.", ("purpose",)
+)
+LLM_TOKENS = REGISTRY.counter(
+    "leavebot_llm_tokens_total", "Tokens reported by the LLM API.", ("purpose", "kind")
+)
+TOOL_CALLS = REGISTRY.counter(
+    "leavebot_tool_calls_total",
+    "LLM tool calls by where they were answered; source=\"session\" is an ERP round trip saved.",
+    ("tool", "source"),
+)
+SCRIPT_CPU_SECONDS = REGISTRY.histogram(
+    "leavebot_script_cpu_seconds", "CPU time of a Streamlit rerun before the message is dispatched.", ("run",),
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+)
+TURN_SECONDS = REGISTRY.histogram(
+    "leavebot_turn_seconds", "A whole chat turn, from user message to finished reply.", ("intent",)
+)
+
+
+def record_llm_usage(purpose, usage):
+    """Add the ``usage`` block of a completion (if any) to :data:`LLM_TOKENS`."""
+    if usage is None:
+        return
+    LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, purpose=purpose, kind="prompt")
+    LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, purpose=purpose, kind="completion")
+
+
+class MetricsExporter:
+    """Expose a registry over HTTP (``/metrics``) and/or as a file.
+
+    With ``port`` a daemon thread serves the Prometheus text format on
+    ``addr:port``. ``addr`` defaults to the loopback interface, so other
+    hosts can only scrape the metrics when it is set explicitly. With
+    ``path`` another daemon thread rewrites that file every ``interval``
+    seconds, for node-exporter's textfile collector or offline analysis.
+    """
+
+    def __init__(self, registry=REGISTRY, port=0, addr="127.0.0.1", path="", interval=15.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.server = None
+        self._stop = threading.Event()
+        if port:
+            self.server = ThreadingHTTPServer((addr, port), self._handler())
+            self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info("Serving metrics on http://%s:%d/metrics", addr, self.server.server_port)
+        if path:
+            threading.Thread(target=self._write_loop, name="metrics-file", daemon=True).start()
+            logger.info("Writing metrics to %s every %.0fs", path, interval)
+
+    def _handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            self.registry.write(self.path)
+        except OSError:
+            logger.exception("Writing metrics to %s failed", self.path)
+
+    def close(self):
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.path:
+            self.write()
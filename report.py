@@ -0,0 +1,307 @@
+"""Monthly leave report across many employees.
+
+Reads employee IDs, one per line, and fetches each employee's profile,
+leave history, leave types and balances through the cached ERP fetchers.
+It writes three tables to the output directory:
+
+* ``employees/``: one row per employee with their department, the leave
+  days taken in the month, their pending applications and their
+  outstanding balance;
+* ``pending/``: one row per application awaiting approval;
+* ``departments``: leave taken, outstanding balances and pending
+  approvals per department and leave type.
+
+IDs are read in batches of ``--batch-size``. Each batch is fetched by
+``--workers`` threads, with at most ``--rate`` ERP requests per second
+for the whole process. The batch is then written as one part file per
+table and added to the department totals. After every batch, the totals
+and the number of finished batches are saved to ``checkpoint.json``. A
+rerun with the same arguments skips the finished batches and carries on
+after a crash. Memory holds one batch and the department totals,
+whatever the number of employees.
+
+Tables are CSV files, or Parquet with ``--format parquet`` (needs pyarrow).
+
+    python report.py employees.txt -o reports/2026-09 [--month 2026-09] [--workers 16] [--rate 20]
+"""
+import argparse
+import calendar
+import csv
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+
+from erp_client import RateLimiter
+from leave_analytics import LeaveAnalytics
+from leave_type_index import LeaveTypeIndex
+from resources import (
+    erp_client, get_employee_details_cached, get_leave_applications_cached, get_leave_summary_cached,
+    get_leave_types_cached,
+)
+
+logger = logging.getLogger(__name__)
+
+EMPLOYEE_COLUMNS = ("emp_id", "name", "department", "days_taken", "applications_taken",
+                    "pending_applications", "pending_days", "outstanding_balance", "unavailable")
+PENDING_COLUMNS = ("emp_id", "department", "ref", "leave_type", "from_date", "to_date", "days")
+DEPARTMENT_COLUMNS = ("department", "leave_type", "employees", "outstanding_balance", "days_taken",
+                      "applications_taken", "pending_applications", "pending_days")
+# Department totals per leave type, in DEPARTMENT_COLUMNS order after the key.
+_TOTALS = DEPARTMENT_COLUMNS[2:]
+
+CHECKPOINT = "checkpoint.json"
+
+EmployeeReport = namedtuple("EmployeeReport", ["row", "pending", "totals"])
+
+
+def read_employee_ids(lines):
+    """Yield the employee IDs in ``lines``, skipping blank lines and ``#`` comments."""
+    for line in lines:
+        emp_id = line.strip()
+        if emp_id and not emp_id.startswith("#"):
+            yield emp_id
+
+
+def batches(items, size):
+    """Yield lists of up to ``size`` consecutive items."""
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_month(text=None, today=None):
+    """Return ``(year, month)`` for a ``YYYY-MM`` string, or the previous month when empty."""
+    if text:
+        year, month = (int(part) for part in text.split("-"))
+        if not 1 <= month <= 12:
+            raise ValueError(f"Invalid month: {text}")
+        return year, month
+    today = today or date.today()
+    return (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+
+def _day(value):
+    return str(value or "").split("T")[0]
+
+
+def employee_report(emp_id, year, month, as_of):
+    """Fetch one employee's data and return their :class:`EmployeeReport`.
+
+    Leave counts as taken in the month when an approved application
+    starts in it, as in the chat's monthly figures. Balances are the ERP
+    summaries as of ``as_of`` (``YYYY-MM-DD``).
+    """
+    unavailable = []
+
+    def fetched(name, value, expected):
+        if isinstance(value, expected):
+            return value
+        unavailable.append(name)
+        return expected()
+
+    profile = fetched("profile", get_employee_details_cached(emp_id), dict)
+    if "error" in profile:
+        unavailable.append("profile")
+        profile = {}
+    history = fetched("leave_history", get_leave_applications_cached(emp_id), list)
+    leave_types = fetched("leave_types", get_leave_types_cached(emp_id), list)
+    summaries = {}
+    for lt in leave_types:
+        lpd_id = lt.get("Lpd_ID_N")
+        if lpd_id is not None:
+            summaries[lpd_id] = get_leave_summary_cached(emp_id, str(lpd_id), as_of, as_of)
+    if any(not isinstance(v, dict) or "error" in v for v in summaries.values()):
+        unavailable.append("leave_summaries")
+
+    department = (profile.get("Dpm_Desc_V") or "").strip() or "Unknown"
+    analytics = LeaveAnalytics(history)
+    types = len(analytics.types)
+    taken = analytics.mask(year, month=month)
+    pending = analytics.mask(None, ("pending",))
+    days_taken = np.bincount(analytics.type_codes[taken], weights=analytics.days[taken], minlength=types)
+    applications_taken = np.bincount(analytics.type_codes[taken], minlength=types)
+    pending_days = np.bincount(analytics.type_codes[pending], weights=analytics.days[pending], minlength=types)
+    pending_applications = np.bincount(analytics.type_codes[pending], minlength=types)
+
+    totals = {}
+    for leave_type in LeaveTypeIndex(leave_types, summaries):
+        if leave_type.has_summary:
+            totals[leave_type.name] = [1, leave_type.balance, 0.0, 0, 0, 0.0]
+    for code, name in enumerate(analytics.types):
+        if applications_taken[code] or pending_applications[code]:
+            row = totals.setdefault(str(name), [0, 0.0, 0.0, 0, 0, 0.0])
+            row[2:] = [float(days_taken[code]), int(applications_taken[code]),
+                       int(pending_applications[code]), float(pending_days[code])]
+
+    row = {
+        "emp_id": emp_id,
+        "name": profile.get("Emp_EFullName_V", ""),
+        "department": department,
+        "days_taken": float(days_taken.sum()),
+        "applications_taken": int(applications_taken.sum()),
+        "pending_applications": int(pending_applications.sum()),
+        "pending_days": float(pending_days.sum()),
+        "outstanding_balance": sum(t[1] for t in totals.values()),
+        "unavailable": ",".join(unavailable),
+    }
+    pending_rows = [
+        {
+            "emp_id": emp_id,
+            "department": department,
+            "ref": analytics.refs[i],
+            "leave_type": str(analytics.types[analytics.type_codes[i]]),
+            "from_date": _day(analytics.records[i].get("LeaveGrid_Ela_FromDate_D")),
+            "to_date": _day(analytics.records[i].get("LeaveGrid_Ela_ToDate_D")),
+            "days": float(analytics.days[i]),
+        }
+        for i in np.flatnonzero(pending)
+    ]
+    return EmployeeReport(row, pending_rows, {(department, name): t for name, t in totals.items()})
+
+
+class DepartmentTotals:
+    """Running totals per ``(department, leave type)``, updated one employee at a time."""
+
+    def __init__(self, rows=()):
+        self.totals = {}
+        for row in rows:
+            self.totals[(row["department"], row["leave_type"])] = [row[c] for c in _TOTALS]
+
+    def add(self, totals):
+        for key, values in totals.items():
+            current = self.totals.setdefault(key, [0] * len(_TOTALS))
+            for i, value in enumerate(values):
+                current[i] += value
+
+    def rows(self):
+        return [dict(zip(DEPARTMENT_COLUMNS, key + tuple(values))) for key, values in sorted(self.totals.items())]
+
+
+def write_table(path, rows, columns, fmt):
+    """Write ``rows`` to ``path`` as CSV or Parquet, replacing any previous file atomically."""
+    tmp = f"{path}.tmp"
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(pa.table({c: [row.get(c) for row in rows] for c in columns}), tmp)
+    else:
+        with open(tmp, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(out_dir, params):
+    """Return the checkpoint in ``out_dir``, or a fresh one; ``params`` must match a saved one."""
+    path = os.path.join(out_dir, CHECKPOINT)
+    if not os.path.exists(path):
+        return {"params": params, "batches": 0, "employees": 0, "incomplete": 0, "departments": []}
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint["params"] != params:
+        raise ValueError(f"{path} was written for {checkpoint['params']}, not {params}; "
+                         "use another output directory")
+    return checkpoint
+
+
+def save_checkpoint(out_dir, checkpoint):
+    path = os.path.join(out_dir, CHECKPOINT)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def run(employee_ids, out_dir, month=None, workers=16, batch_size=200, fmt="csv"):
+    """Build the report for ``employee_ids`` in ``out_dir``, resuming any earlier run; returns the checkpoint."""
+    year, month = parse_month(month)
+    last_day = date(year, month, calendar.monthrange(year, month)[1])
+    as_of = min(last_day, date.today()).isoformat()
+    params = {"month": f"{year}-{month:02d}", "batch_size": batch_size, "format": fmt}
+    for table in ("employees", "pending"):
+        os.makedirs(os.path.join(out_dir, table), exist_ok=True)
+    checkpoint = load_checkpoint(out_dir, params)
+    totals = DepartmentTotals(checkpoint["departments"])
+    if checkpoint["batches"]:
+        logger.info("Resuming after %d batches (%d employees)", checkpoint["batches"], checkpoint["employees"])
+    done = checkpoint["batches"]
+    employee_ids = itertools.islice(employee_ids, done * batch_size, None)
+
+    def report(emp_id):
+        try:
+            return employee_report(emp_id, year, month, as_of)
+        except Exception as exc:
+            logger.exception("Failed to report on Emp_ID=%s", emp_id)
+            row = dict.fromkeys(EMPLOYEE_COLUMNS, "")
+            row.update(emp_id=emp_id, unavailable=f"error: {exc}")
+            return EmployeeReport(row, [], {})
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report") as executor:
+        for number, batch in enumerate(batches(employee_ids, batch_size), done):
+            started = time.perf_counter()
+            reports = list(executor.map(report, batch))
+            part = f"part-{number:05d}.{fmt}"
+            write_table(os.path.join(out_dir, "employees", part), [r.row for r in reports], EMPLOYEE_COLUMNS, fmt)
+            write_table(os.path.join(out_dir, "pending", part), [p for r in reports for p in r.pending],
+                        PENDING_COLUMNS, fmt)
+            for r in reports:
+                totals.add(r.totals)
+            checkpoint.update(
+                batches=number + 1,
+                employees=checkpoint["employees"] + len(reports),
+                incomplete=checkpoint["incomplete"] + sum(bool(r.row["unavailable"]) for r in reports),
+                departments=totals.rows(),
+            )
+            save_checkpoint(out_dir, checkpoint)
+            logger.info("Batch %d: %d employees in %.1fs (%d so far)",
+                        number, len(batch), time.perf_counter() - started, checkpoint["employees"])
+    write_table(os.path.join(out_dir, f"departments.{fmt}"), totals.rows(), DEPARTMENT_COLUMNS, fmt)
+    return checkpoint
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="file of employee IDs, one per line (default: stdin)")
+    parser.add_argument("-o", "--output", required=True, help="directory for the tables and the checkpoint")
+    parser.add_argument("--month", help="YYYY-MM (default: the previous month)")
+    parser.add_argument("--workers", type=int, default=16, help="employees fetched concurrently")
+    parser.add_argument("--rate", type=float, default=20, help="ERP requests per second (0 for no limit)")
+    parser.add_argument("--batch-size", type=int, default=200, help="employees per part file and checkpoint")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        parser.error("--format parquet needs pyarrow (pip install pyarrow)")
+    if args.rate > 0:
+        erp_client.rate_limiter = RateLimiter(args.rate)
+    started = time.perf_counter()
+    source = open(args.input, encoding="utf-8") if args.input else sys.stdin
+    try:
+        checkpoint = run(read_employee_ids(source), args.output, month=args.month, workers=args.workers,
+                         batch_size=args.batch_size, fmt=args.format)
+    except ValueError as exc:
+        parser.error(str(exc))
+    finally:
+        if args.input:
+            source.close()
+    elapsed = time.perf_counter() - started
+    logger.info("Report for %s done: %d employees (%d incomplete) in %.1fs",
+                checkpoint["params"]["month"], checkpoint["employees"], checkpoint["incomplete"], elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
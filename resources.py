@@ -0,0 +1,214 @@
+"""Process-wide resources shared by every session and rerun of the app.
+
+Streamlit re-executes ``app.py`` for every message, but an imported module
+runs once per process, so the cached-resource getters below are defined
+(and their cache keys computed) only once. Each getter builds its object
+on first use and returns the same instance afterwards.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+import streamlit as st
+
+from answer_cache import AnswerCache
+from erp_cache import SWRCache, create_backend
+from erp_client import ERPClient, RateLimiter
+from help_index import HelpIndex
+from intent_classifier import load_examples
+from intent_router import build_default_router
+from metrics import MetricsExporter
+from settings import (
+    ANSWER_CACHE_MAX_MB, ANSWER_CACHE_PATH, EMP_API_URL, ERP_BEARER_TOKEN, ERP_BREAKER_FAILURES,
+    ERP_BREAKER_RESET, ERP_CACHE_BACKEND, ERP_CACHE_GRACE, ERP_CACHE_MAX_ENTRIES, ERP_CACHE_MAX_MB,
+    ERP_CACHE_PATH, ERP_MAX_RETRIES, ERP_POOL_SIZE, ERP_RATE_LIMIT, ERP_REFRESH_WORKERS, ERP_STALE_IF_ERROR,
+    FILL_LEAVE_TYPE_URL, HELP_TOKEN_BUDGET, HELP_TOP_K, HISTORY_API_URL, INTENT_CLASSIFIER,
+    INTENT_CLASSIFIER_THRESHOLD, INTENT_EXAMPLES_PATH, LEAVE_API_URL, LLM_MODEL, LLM_TOOL_WORKERS,
+    METRICS_EXPORT_INTERVAL, METRICS_HOST, METRICS_PATH, METRICS_PORT, OPENAI_API_KEY, TEAM_WORKERS,
+)
+
+# -------- SET UP LOGGING --------
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+logger = logging.getLogger(__name__)
+logger.info("Starting Streamlit ERP Leave Application Chatbot...")
+
+# -------- OPENAI CLIENT --------
+@st.cache_resource
+def get_openai_client():
+    """Return the process-wide OpenAI client (one HTTP connection pool)."""
+    return openai.OpenAI(api_key=OPENAI_API_KEY)
+
+# -------- LOAD HELP TEXT --------
+def help_doc_version():
+    """Return the modification time of ``leave_help.txt`` (``None`` if missing)."""
+    try:
+        return os.path.getmtime("leave_help.txt")
+    except OSError:
+        return None
+
+@st.cache_data
+def load_help_doc(version=None):
+    """Load the local help document used for answering policy questions.
+
+    The function reads ``leave_help.txt`` from disk and returns its
+    contents. When the file does not exist a short message is returned
+    instead. ``st.cache_data`` is used so the file is only read once per
+    ``version`` (the file's modification time), which lets edits to the
+    document invalidate the help index and cached answers without a restart.
+    """
+    try:
+        with open("leave_help.txt", "r", encoding="utf-8") as f:
+            text = f.read()
+            logger.info("Help document loaded (chars: %d)", len(text))
+            return text
+    except FileNotFoundError:
+        logger.error("leave_help.txt not found")
+        return "Help document not found. Please add leave_help.txt."
+
+def current_help_doc():
+    """Return the help document text, reloaded when the file changes."""
+    return load_help_doc(help_doc_version())
+
+@st.cache_resource
+def get_help_index(text):
+    """Return the BM25 retrieval index over the help document text."""
+    index = HelpIndex.from_text(text)
+    logger.info("Help index built (%d chunks, ~%d tokens)", len(index.chunks), index.full_tokens)
+    return index
+
+@st.cache_resource
+def get_answer_cache(text):
+    """Return the persistent procedure-answer cache for this help document text."""
+    return AnswerCache.sqlite(
+        ANSWER_CACHE_PATH, text, LLM_MODEL, max_bytes=int(ANSWER_CACHE_MAX_MB * 1024 * 1024),
+        retrieval=(HELP_TOP_K, HELP_TOKEN_BUDGET),
+    )
+
+# -------- METRICS EXPORT --------
+@st.cache_resource
+def get_metrics_exporter():
+    """Start the process-wide metrics endpoint and/or file writer once."""
+    return MetricsExporter(port=METRICS_PORT, addr=METRICS_HOST, path=METRICS_PATH,
+                           interval=METRICS_EXPORT_INTERVAL)
+
+if METRICS_PORT or METRICS_PATH:
+    get_metrics_exporter()
+
+# -------- SHARED ERP CLIENT --------
+@st.cache_resource
+def get_erp_client():
+    """Return the process-wide pooled ERP client.
+
+    ``st.cache_resource`` keeps a single instance for all sessions so TCP
+    connections to the ERP host are kept alive and reused across reruns.
+    """
+    logger.info("Creating shared ERP client (pool size %d)", ERP_POOL_SIZE)
+    return ERPClient(
+        urls={
+            "employee": EMP_API_URL,
+            "leave_types": FILL_LEAVE_TYPE_URL,
+            "history": HISTORY_API_URL,
+            "summary": LEAVE_API_URL,
+        },
+        token=ERP_BEARER_TOKEN,
+        pool_size=ERP_POOL_SIZE,
+        max_retries=ERP_MAX_RETRIES,
+        failure_threshold=ERP_BREAKER_FAILURES,
+        reset_timeout=ERP_BREAKER_RESET,
+        rate_limiter=RateLimiter(ERP_RATE_LIMIT) if ERP_RATE_LIMIT > 0 else None,
+    )
+
+@st.cache_resource
+def get_erp_cache():
+    """Return the process-wide ERP response cache.
+
+    Values past their ttl but within ``ERP_CACHE_GRACE`` seconds are served
+    stale while a background worker refreshes them. Concurrent misses for
+    the same key share a single ERP call. ``ERP_CACHE_BACKEND`` selects the
+    in-memory store (default) or the shared on-disk SQLite store. When a
+    load fails, an expired value up to ``ERP_STALE_IF_ERROR`` seconds old
+    is served instead.
+    """
+    backend = create_backend(
+        ERP_CACHE_BACKEND,
+        path=ERP_CACHE_PATH,
+        max_entries=ERP_CACHE_MAX_ENTRIES,
+        max_bytes=int(ERP_CACHE_MAX_MB * 1024 * 1024),
+    )
+    logger.info("ERP cache backend: %s", type(backend).__name__)
+    return SWRCache(
+        grace=ERP_CACHE_GRACE,
+        refresh_workers=ERP_REFRESH_WORKERS,
+        backend=backend,
+        stale_if_error=ERP_STALE_IF_ERROR,
+    )
+
+erp_client = get_erp_client()
+erp_cache = get_erp_cache()
+
+# -------- ERP API CALLS (all cached per emp) --------
+@erp_cache.cached("employee", ttl=300)
+def get_employee_details_cached(emp_id):
+    """Retrieve employee details from the ERP API.
+
+    The response is cached for five minutes. If the call succeeds and
+    returns a list, the first item is assumed to contain the profile
+    information. On failure an ``{"error": ...}`` dictionary is
+    returned.
+    """
+    return erp_client.get_employee_details(emp_id)
+
+@erp_cache.cached("leave_types", ttl=300)
+def get_leave_types_cached(emp_id):
+    """Return the list of leave types available to the employee."""
+    return erp_client.get_leave_types(emp_id)
+
+@erp_cache.cached("history", ttl=300)
+def get_leave_applications_cached(emp_id):
+    """Fetch all leave applications for the employee except cancelled ones."""
+    return erp_client.get_leave_applications(emp_id)
+
+@erp_cache.cached("summary", ttl=180)
+def get_leave_summary_cached(emp_id, leave_type_id, from_date, to_date):
+    """Return a leave balance summary for a specific leave type."""
+    return erp_client.get_leave_summary(emp_id, leave_type_id, from_date, to_date)
+
+# --- INTENT ROUTER ---
+@st.cache_resource
+def get_intent_router():
+    """Return the intent router, compiled (and its classifier trained) once per process."""
+    if not INTENT_CLASSIFIER:
+        return build_default_router()
+    try:
+        examples = load_examples(INTENT_EXAMPLES_PATH)
+    except FileNotFoundError:
+        logger.warning("%s not found; training the intent classifier on rule keywords only",
+                       INTENT_EXAMPLES_PATH)
+        examples = []
+    router = build_default_router(examples, classifier_threshold=INTENT_CLASSIFIER_THRESHOLD)
+    logger.info("Intent classifier trained on %d phrases (threshold %.2f)",
+                len(router.classifier), INTENT_CLASSIFIER_THRESHOLD)
+    return router
+
+# --- ANSWER WARM-UP ---
+@st.cache_resource
+def get_warmup_executor():
+    """Return the background pool used to precompute cached answers."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="answer-warmup")
+
+# --- TOOL CALLS ---
+@st.cache_resource
+def get_tool_executor():
+    """Return the pool that runs an LLM reply's tool calls concurrently."""
+    return ThreadPoolExecutor(max_workers=LLM_TOOL_WORKERS, thread_name_prefix="llm-tools")
+
+# --- TEAM MODE ---
+@st.cache_resource
+def get_team_executor():
+    """Return the pool, shared by all team loads, that bounds their concurrent ERP calls."""
+    return ThreadPoolExecutor(max_workers=TEAM_WORKERS, thread_name_prefix="erp-team")
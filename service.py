@@ -0,0 +1,189 @@
+"""Asynchronous HTTP API for the leave assistant.
+
+Serves the same :mod:`engine` as the Streamlit app over a small Starlette
+application:
+
+* ``POST /chat`` with ``{"emp_id": ..., "message": ..., "session_id": ...}``
+  answers one message. ``emp_id`` must be the numeric employee ID and
+  ``session_id`` is optional; the response carries the one to send with
+  the next message of the conversation, along with the ``reply``, the
+  matched ``intent``, any ``warnings`` and the time taken.
+  When the LLM cannot be reached the answer is a 503 (502 for any other
+  failure) with an ``error``, and the message is not kept in the session.
+* ``GET /health`` reports the number of open sessions.
+
+Conversations are kept server side in a :class:`SessionStore`. LLM calls go
+through ``openai.AsyncOpenAI`` on the event loop. The ERP client is
+synchronous, so routing, data loading and tool calls run on a bounded
+thread pool (``SERVICE_WORKERS``), where they share the process-wide ERP
+cache, single-flight and circuit breakers with every other session.
+
+    python service.py [--host 127.0.0.1] [--port 8000]
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from engine import Conversation, get_assistant
+from llm_stream import message_tool_calls
+from metrics import LLM_REQUEST_SECONDS, record_llm_usage
+from settings import LLM_MODEL, OPENAI_API_KEY, SERVICE_MAX_SESSIONS, SERVICE_SESSION_TTL, SERVICE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Conversations by session id, expired after ``ttl`` idle seconds.
+
+    Holds at most ``max_sessions``; the least recently used session is
+    dropped first. Each session has a lock so that its turns run one at a
+    time even when a client sends several messages at once.
+    """
+
+    def __init__(self, ttl=SERVICE_SESSION_TTL, max_sessions=SERVICE_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, (_, _, last_used) = next(iter(self._sessions.items()))
+            if now - last_used < self.ttl and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id, emp_id):
+        """Return ``(session_id, conversation, lock)``, starting a session if needed.
+
+        A new session is started when ``session_id`` is unknown, has
+        expired or belongs to another employee.
+        """
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._sessions.pop(session_id, None) if session_id else None
+        if entry is None or entry[0].emp_id != emp_id:
+            session_id = uuid.uuid4().hex
+            entry = (Conversation(emp_id), asyncio.Lock(), now)
+        conversation, lock, _ = entry
+        self._sessions[session_id] = (conversation, lock, now)
+        self._expire(now)
+        return session_id, conversation, lock
+
+
+async def complete_chat(client, messages, purpose, **kwargs):
+    """Run a chat completion; returns the reply text and the requested tool calls."""
+    with LLM_REQUEST_SECONDS.time(purpose=purpose, outcome="error") as span:
+        response = await client.chat.completions.create(model=LLM_MODEL, messages=messages, **kwargs)
+        span.labels["outcome"] = "ok"
+    record_llm_usage(purpose, getattr(response, "usage", None))
+    msg = response.choices[0].message
+    return msg.content or "", message_tool_calls(msg)
+
+
+async def chat(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        return JSONResponse({"error": "request body must be JSON"}, status_code=400)
+    if not isinstance(body, dict):
+        return JSONResponse({"error": "request body must be a JSON object"}, status_code=400)
+    emp_id = str(body.get("emp_id") or "").strip()
+    message = str(body.get("message") or "").strip()
+    if not emp_id or not message:
+        return JSONResponse({"error": "emp_id and message are required"}, status_code=400)
+    if not (emp_id.isascii() and emp_id.isdigit()):
+        # The ERP client splices the ID into its filter and SQL parameters.
+        return JSONResponse({"error": "emp_id must be a numeric employee ID"}, status_code=400)
+
+    session_id = body.get("session_id")
+    if session_id is not None and not isinstance(session_id, str):
+        return JSONResponse({"error": "session_id must be a string"}, status_code=400)
+
+    state = request.app.state
+    session_id, conversation, lock = state.sessions.get(session_id, emp_id)
+    started = time.perf_counter()
+    async with lock:
+        # A failed turn is rolled back so the next one does not see a user
+        # message without a reply, or a summary or pending application it
+        # changed.
+        history_length = len(conversation.messages)
+        history_summary = copy.deepcopy(conversation.history_summary)
+        pending = conversation.pending_leave_application
+        last_draft = conversation.last_draft_leave
+        try:
+            loop = asyncio.get_running_loop()
+            turn = await loop.run_in_executor(state.executor, state.assistant.begin, conversation, message)
+            if turn.reply is None:
+                async def chat_fn(messages, purpose, **kwargs):
+                    return await complete_chat(state.llm, messages, purpose, **kwargs)
+                await state.assistant.complete_async(turn, chat_fn, state.executor)
+        except Exception as exc:
+            del conversation.messages[history_length:]
+            conversation.history_summary = history_summary
+            conversation.pending_leave_application = pending
+            conversation.last_draft_leave = last_draft
+            if isinstance(exc, openai.APIError):
+                logger.warning("LLM request failed for Emp_ID=%s: %s", emp_id, exc)
+                return JSONResponse({"session_id": session_id, "error": "the language model is unavailable"},
+                                    status_code=503)
+            logger.exception("Failed to answer a message for Emp_ID=%s", emp_id)
+            return JSONResponse({"session_id": session_id, "error": "the message could not be answered"},
+                                status_code=502)
+    return JSONResponse({
+        "session_id": session_id,
+        "reply": turn.reply,
+        "intent": turn.intent or "llm_fallback",
+        "warnings": turn.warnings,
+        "seconds": round(time.perf_counter() - started, 4),
+    })
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "sessions": len(request.app.state.sessions)})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    app.state.assistant = get_assistant()
+    app.state.sessions = SessionStore()
+    app.state.executor = ThreadPoolExecutor(max_workers=SERVICE_WORKERS, thread_name_prefix="service")
+    app.state.llm = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    try:
+        yield
+    finally:
+        await app.state.llm.close()
+        app.state.executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[Route("/chat", chat, methods=["POST"]), Route("/health", health, methods=["GET"])],
+    lifespan=lifespan,
+)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
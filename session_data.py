@@ -0,0 +1,102 @@
+"""Lazily loaded, memoized ERP datasets for one chat session."""
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Every dataset a session can hold, in the order they are usually needed.
+DATASETS = ("profile", "leave_types", "leave_history", "leave_summaries")
+# Datasets the LLM fallback's system prompt is built from. Leave history
+# is left out; the model fetches it through a tool when it needs it.
+PROMPT_DATASETS = ("profile", "leave_types", "leave_summaries")
+
+# Labels used when telling the user which ERP data could not be loaded.
+DATASET_LABELS = {
+    "profile": "your employee profile",
+    "leave_types": "your leave types",
+    "leave_history": "your leave history",
+    "leave_summaries": "your leave balances",
+}
+
+
+def describe_datasets(names):
+    """Return a readable list such as "your leave history and your leave balances"."""
+    labels = [DATASET_LABELS.get(n, n) for n in names]
+    if len(labels) <= 1:
+        return "".join(labels)
+    return ", ".join(labels[:-1]) + " and " + labels[-1]
+
+
+class SessionData:
+    """Load each ERP dataset the first time something asks for it.
+
+    ``state`` is a caller-owned dictionary (a key in the Streamlit session
+    state) so loaded values survive reruns; this object is a cheap view
+    over it and can be rebuilt on every run. ``loader(names, loaded)``
+    fetches the datasets in ``names`` (concurrently) and returns a
+    dictionary with their values plus an ``"unavailable"`` list; ``loaded``
+    holds what the session already has, so dependent datasets such as the
+    leave summaries can reuse the leave types.
+
+    A dataset the ERP could not serve keeps its fallback value and is
+    fetched again when next needed, but not before ``retry_interval``
+    seconds have passed.
+    """
+
+    def __init__(self, state, loader, retry_interval=30.0):
+        self.state = state
+        self.loader = loader
+        self.retry_interval = retry_interval
+        state.setdefault("values", {})
+        state.setdefault("failed_at", {})
+        state.setdefault("version", 0)
+
+    @property
+    def version(self):
+        """Incremented whenever a load changes any dataset."""
+        return self.state["version"]
+
+    @property
+    def unavailable(self):
+        """Datasets whose last load failed because the ERP was unreachable."""
+        return [name for name in DATASETS if name in self.state["failed_at"]]
+
+    def is_loaded(self, name):
+        return name in self.state["values"] and name not in self.state["failed_at"]
+
+    def _due(self, name):
+        failed_at = self.state["failed_at"].get(name)
+        if failed_at is not None:
+            return time.time() - failed_at >= self.retry_interval
+        return name not in self.state["values"]
+
+    def ensure(self, names):
+        """Load whichever of ``names`` the session does not have yet, in one batch."""
+        missing = [name for name in DATASETS if name in names and self._due(name)]
+        if not missing:
+            return []
+        values = self.state["values"]
+        loaded = {name: values[name] for name in values if self.is_loaded(name)}
+        result = self.loader(missing, loaded)
+        unavailable = set(result.get("unavailable", ()))
+        now = time.time()
+        for name in missing:
+            if name in result:
+                values[name] = result[name]
+            if name in unavailable:
+                self.state["failed_at"][name] = now
+            else:
+                self.state["failed_at"].pop(name, None)
+        self.state["version"] += 1
+        logger.info("Loaded %s on demand (unavailable: %s)", ", ".join(missing),
+                    ", ".join(sorted(unavailable)) or "none")
+        return missing
+
+    def get(self, name, default=None):
+        """Return dataset ``name``, loading it first if needed."""
+        self.ensure((name,))
+        return self.state["values"].get(name, default)
+
+    def peek(self, name, default=None):
+        """Return dataset ``name`` if it has been loaded, without loading it."""
+        return self.state["values"].get(name, default)
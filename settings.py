@@ -0,0 +1,153 @@
+"""Application settings, read once per process.
+
+Every value can be overridden in ``.streamlit/secrets.toml`` or, for the
+headless entry points (``service.py``, ``batch.py``, ``report.py``), with
+an environment variable of the same name, which takes precedence.
+Environment values are parsed as JSON when they are valid JSON (numbers,
+``true``/``false``, lists, objects) and used as plain strings otherwise.
+No secrets file is needed when every setting has a default or comes from
+the environment. This module is imported rather than executed by the
+script, so Streamlit reruns do not read the settings again; restart the
+app after changing them.
+"""
+import json
+import os
+
+import streamlit as st
+
+
+def _setting(name, default=None):
+    """Return ``name`` from the environment, else from Streamlit secrets, else ``default``."""
+    value = os.environ.get(name)
+    if value is not None:
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    try:
+        return st.secrets.get(name, default)
+    except FileNotFoundError:
+        # No secrets.toml at all.
+        return default
+
+
+# -------- CONFIGURATION (Credentials via secrets) --------
+# Only needed by the entry points that call the LLM; without it the OpenAI
+# client raises when it is first created.
+OPENAI_API_KEY = _setting("OPENAI_API_KEY")
+ERP_BEARER_TOKEN = ""
+# Scheme, host and port of the ERP API; overridable to point at a test server.
+ERP_BASE_URL = str(_setting("ERP_BASE_URL", "http://117.247.187.131:8085")).rstrip("/")
+EMP_API_URL = f"{ERP_BASE_URL}/api/EmployeeMasterApi/HrmGetEmployeeDetails/"
+LEAVE_API_URL = f"{ERP_BASE_URL}/api/LeaveApplicationApi"
+FILL_LEAVE_TYPE_URL = f"{ERP_BASE_URL}/api/LeaveApplicationApi/FillLeaveType"
+HISTORY_API_URL = f"{ERP_BASE_URL}/api/LeaveApplicationApi/HrmGetLeaveApplicationDetails"
+
+# Connection pool shared by every session talking to the ERP, and the number
+# of retries for read calls that fail with a connection error or a 5xx.
+ERP_POOL_SIZE = int(_setting("ERP_POOL_SIZE", 32))
+ERP_MAX_RETRIES = int(_setting("ERP_MAX_RETRIES", 2))
+# Most ERP requests per second this process sends (0 for no limit).
+ERP_RATE_LIMIT = float(_setting("ERP_RATE_LIMIT", 0))
+# Seconds past the ttl during which a cached ERP value is still served while
+# it is refreshed in the background (0 restores hard expiry), and the size of
+# the refresh pool.
+ERP_CACHE_GRACE = float(_setting("ERP_CACHE_GRACE", 300))
+ERP_REFRESH_WORKERS = int(_setting("ERP_REFRESH_WORKERS", 4))
+# Where cached ERP responses live: "memory" (per process) or "sqlite" (an
+# on-disk file shared by every replica on the host, surviving restarts).
+ERP_CACHE_BACKEND = _setting("ERP_CACHE_BACKEND", "memory")
+ERP_CACHE_PATH = _setting("ERP_CACHE_PATH", ".cache/erp_cache.sqlite3")
+ERP_CACHE_MAX_ENTRIES = int(_setting("ERP_CACHE_MAX_ENTRIES", 10000))
+ERP_CACHE_MAX_MB = float(_setting("ERP_CACHE_MAX_MB", 64))
+# Consecutive failures that open an endpoint's circuit, and the seconds it
+# stays open before a single probe call is allowed through. While a circuit
+# is open, ERP values up to ERP_STALE_IF_ERROR seconds past their expiry are
+# served instead of an error.
+ERP_BREAKER_FAILURES = int(_setting("ERP_BREAKER_FAILURES", 5))
+ERP_BREAKER_RESET = float(_setting("ERP_BREAKER_RESET", 30))
+ERP_STALE_IF_ERROR = float(_setting("ERP_STALE_IF_ERROR", 24 * 3600))
+
+# -------- BOOTSTRAP SETTINGS --------
+# Upper bound on concurrent ERP calls made while loading a new session and
+# the overall time (seconds) the session bootstrap may take before it gives
+# up on the calls that are still outstanding.
+BOOTSTRAP_MAX_WORKERS = int(_setting("BOOTSTRAP_MAX_WORKERS", 8))
+BOOTSTRAP_DEADLINE = float(_setting("BOOTSTRAP_DEADLINE", 15))
+# Seconds before a session that is missing ERP data tries to load it again.
+BOOTSTRAP_RETRY_INTERVAL = float(_setting("BOOTSTRAP_RETRY_INTERVAL", 30))
+
+# -------- METRICS SETTINGS --------
+# Latency histograms and counters are exported in the Prometheus text format
+# on http://METRICS_HOST:METRICS_PORT/metrics and/or rewritten to
+# METRICS_PATH every METRICS_EXPORT_INTERVAL seconds. Both are off by
+# default. The endpoint listens on the loopback interface only; set
+# METRICS_HOST to "0.0.0.0" (or one interface's address) to let a scraper
+# on another host reach it.
+METRICS_PORT = int(_setting("METRICS_PORT", 0))
+METRICS_HOST = _setting("METRICS_HOST", "127.0.0.1")
+METRICS_PATH = _setting("METRICS_PATH", "")
+METRICS_EXPORT_INTERVAL = float(_setting("METRICS_EXPORT_INTERVAL", 15))
+
+# -------- LLM SETTINGS --------
+# Stream completions into the chat as tokens arrive instead of waiting for
+# the full reply.
+LLM_STREAMING = bool(_setting("LLM_STREAMING", True))
+LLM_MODEL = "gpt-3.5-turbo"
+# Tool round trips the model may make per fallback answer before it is asked
+# to answer without tools, and the threads running parallel tool calls.
+LLM_TOOL_MAX_STEPS = int(_setting("LLM_TOOL_MAX_STEPS", 3))
+LLM_TOOL_WORKERS = int(_setting("LLM_TOOL_WORKERS", 8))
+
+# -------- ANSWER CACHE SETTINGS --------
+# Procedure answers are stored on disk keyed on the help document hash. With
+# ANSWER_CACHE_WARMUP the answers for every leave type of a newly loaded
+# employee are precomputed in the background.
+ANSWER_CACHE_PATH = _setting("ANSWER_CACHE_PATH", ".cache/answers.sqlite3")
+ANSWER_CACHE_MAX_MB = float(_setting("ANSWER_CACHE_MAX_MB", 8))
+ANSWER_CACHE_WARMUP = bool(_setting("ANSWER_CACHE_WARMUP", False))
+
+# -------- CONVERSATION HISTORY SETTINGS --------
+# Token budget for each fallback LLM request and the number of most recent
+# turns sent verbatim; older turns are folded into a running summary.
+HISTORY_TOKEN_BUDGET = int(_setting("HISTORY_TOKEN_BUDGET", 6000))
+HISTORY_KEEP_TURNS = int(_setting("HISTORY_KEEP_TURNS", 6))
+
+# -------- HELP RETRIEVAL SETTINGS --------
+# Number of help-document chunks and the token budget for the excerpts that
+# are placed into each LLM prompt instead of the whole document.
+HELP_TOP_K = int(_setting("HELP_TOP_K", 4))
+HELP_TOKEN_BUDGET = int(_setting("HELP_TOKEN_BUDGET", 600))
+
+# -------- INTENT CLASSIFIER SETTINGS --------
+# Messages no intent rule matches are classified locally (character n-gram
+# TF-IDF, nearest neighbour) against the rules' keywords and the labelled
+# phrases in INTENT_EXAMPLES_PATH; matches at least INTENT_CLASSIFIER_THRESHOLD
+# similar (0-1) are answered by the intent's handler instead of the LLM.
+INTENT_CLASSIFIER = bool(_setting("INTENT_CLASSIFIER", True))
+INTENT_CLASSIFIER_THRESHOLD = float(_setting("INTENT_CLASSIFIER_THRESHOLD", 0.5))
+INTENT_EXAMPLES_PATH = _setting("INTENT_EXAMPLES_PATH", "intent_examples.jsonl")
+
+# -------- LEAVE ANALYTICS SETTINGS --------
+# Working days, Monday first ("1111100" is Monday to Friday). Two leave
+# applications with no working day between them count as back to back.
+WORK_WEEKMASK = str(_setting("WORK_WEEKMASK", "1111100"))
+
+# -------- TEAM MODE SETTINGS --------
+# A manager's direct reports are listed in TEAM_ROSTER ({manager Emp_ID:
+# [Emp_ID, ...]}). Managers it does not list get the employees among
+# TEAM_CANDIDATE_IDS whose reporting manager (Emp_EmployeeReportsDesc_V) is
+# the manager's name. Team loads share TEAM_WORKERS concurrent ERP calls and
+# each gets TEAM_DEADLINE seconds.
+TEAM_ROSTER = {str(k): [str(e) for e in v] for k, v in _setting("TEAM_ROSTER", {}).items()}
+TEAM_CANDIDATE_IDS = [str(e) for e in _setting("TEAM_CANDIDATE_IDS", [])]
+TEAM_WORKERS = int(_setting("TEAM_WORKERS", 32))
+TEAM_DEADLINE = float(_setting("TEAM_DEADLINE", 30))
+
+# -------- HTTP SERVICE SETTINGS --------
+# Threads that run the blocking ERP work of service requests, and how long
+# (seconds) an idle chat session is kept. At most SERVICE_MAX_SESSIONS
+# sessions are held; the least recently used is dropped beyond that.
+SERVICE_WORKERS = int(_setting("SERVICE_WORKERS", 16))
+SERVICE_SESSION_TTL = float(_setting("SERVICE_SESSION_TTL", 1800))
+SERVICE_MAX_SESSIONS = int(_setting("SERVICE_MAX_SESSIONS", 10000))
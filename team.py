@@ -0,0 +1,255 @@
+"""Team mode: a manager's direct reports, their leave and their balances.
+
+The ERP has no endpoint listing an employee's reports. They come from the
+configured ``TEAM_ROSTER``, or else from the profiles of
+``TEAM_CANDIDATE_IDS`` whose reporting manager is the manager's name.
+
+:func:`load_team` fetches the team through one pipeline on the shared,
+bounded team pool instead of one bootstrap per member. Every member's
+requests are submitted at once, and summary requests are fanned out as
+each member's leave types arrive. A member is yielded as soon as all of
+their requests are done, so callers can show the team while it loads.
+With enough workers, a team loads in about the time of its longest chain
+of ERP round trips (leave types, then summaries), whatever its size.
+Availability and balances are then aggregated in memory from the loaded
+members.
+"""
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from functools import cached_property
+from typing import List
+
+import numpy as np
+
+from leave_analytics import ACTIVE_STATUSES, LeaveAnalytics
+from leave_type_index import LeaveTypeIndex
+from metrics import TEAM_LOAD_SECONDS
+from resources import (
+    get_employee_details_cached, get_leave_applications_cached, get_leave_summary_cached,
+    get_leave_types_cached, get_team_executor,
+)
+from settings import TEAM_CANDIDATE_IDS, TEAM_DEADLINE, TEAM_ROSTER, WORK_WEEKMASK
+
+logger = logging.getLogger(__name__)
+
+# Datasets a team view can load for every member; profiles always are.
+TEAM_DATASETS = ("leave_types", "leave_history", "leave_summaries")
+
+_FETCHERS = {
+    "profile": get_employee_details_cached,
+    "leave_types": get_leave_types_cached,
+    "leave_history": get_leave_applications_cached,
+}
+
+Availability = namedtuple("Availability", ["days", "members", "off", "leaves"])
+
+
+def _result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _mark(member, name):
+    if name not in member.unavailable:
+        member.unavailable.append(name)
+
+
+def _same_name(a, b):
+    return " ".join(str(a).lower().split()) == " ".join(str(b).lower().split())
+
+
+@dataclass
+class TeamMember:
+    """One direct report and the ERP datasets loaded for them.
+
+    ``unavailable`` lists the datasets the ERP could not serve or that
+    were still loading when the deadline passed.
+    """
+
+    emp_id: str
+    profile: dict = field(default_factory=dict)
+    leave_types: list = field(default_factory=list)
+    leave_history: list = field(default_factory=list)
+    leave_summaries: dict = field(default_factory=dict)
+    unavailable: List[str] = field(default_factory=list)
+
+    @property
+    def name(self):
+        return self.profile.get("Emp_EFullName_V") or f"Employee {self.emp_id}"
+
+    @cached_property
+    def leave_index(self):
+        return LeaveTypeIndex(self.leave_types, self.leave_summaries)
+
+    @cached_property
+    def leave_analytics(self):
+        return LeaveAnalytics(self.leave_history, weekmask=WORK_WEEKMASK)
+
+
+def direct_reports(manager_id, roster=None, candidates=None, executor=None):
+    """Return ``{emp_id: profile}`` for the direct reports of ``manager_id``.
+
+    Reports listed in ``roster`` (default ``TEAM_ROSTER``) map to ``None``;
+    their profiles are loaded with the rest of their data. Otherwise the
+    manager's and all ``candidates``' (default ``TEAM_CANDIDATE_IDS``)
+    profiles are fetched concurrently, and the candidates whose
+    ``Emp_EmployeeReportsDesc_V`` is the manager's name are kept.
+    """
+    manager_id = str(manager_id)
+    roster = TEAM_ROSTER if roster is None else roster
+    if manager_id in roster:
+        return {str(emp_id): None for emp_id in roster[manager_id] if str(emp_id) != manager_id}
+    candidates = TEAM_CANDIDATE_IDS if candidates is None else candidates
+    executor = executor or get_team_executor()
+    manager = executor.submit(get_employee_details_cached, manager_id)
+    profiles = {str(emp_id): executor.submit(get_employee_details_cached, str(emp_id))
+                for emp_id in candidates if str(emp_id) != manager_id}
+    manager_name = _result(manager).get("Emp_EFullName_V")
+    if not manager_name:
+        logger.warning("No profile name for manager Emp_ID=%s; cannot resolve direct reports", manager_id)
+        for future in profiles.values():
+            future.cancel()
+        return {}
+    reports = {}
+    for emp_id, future in profiles.items():
+        profile = _result(future)
+        if isinstance(profile, dict) and _same_name(profile.get("Emp_EmployeeReportsDesc_V", ""), manager_name):
+            reports[emp_id] = profile
+    return reports
+
+
+def load_team(reports, datasets=TEAM_DATASETS, executor=None, deadline=None):
+    """Yield a :class:`TeamMember` for each of ``reports`` as soon as their data is loaded.
+
+    ``reports`` maps Emp_IDs to already known profiles (or ``None``), as
+    returned by :func:`direct_reports`. All requests run on ``executor``
+    (default: the shared team pool), which bounds the concurrent ERP
+    calls. Members whose requests are still outstanding when
+    ``deadline`` seconds (default ``TEAM_DEADLINE``) have passed are
+    yielded last, with the missing datasets marked unavailable.
+    """
+    executor = executor or get_team_executor()
+    deadline = TEAM_DEADLINE if deadline is None else deadline
+    today_str = datetime.now().strftime("%Y-%m-%d")
+    want_summaries = "leave_summaries" in datasets
+    members = {str(emp_id): TeamMember(str(emp_id), profile=profile or {}) for emp_id, profile in reports.items()}
+    outstanding = dict.fromkeys(members, 0)
+    futures = {}
+    started = time.monotonic()
+
+    def submit(emp_id, name, fetch, *args, lpd_id=None):
+        future = executor.submit(fetch, *args)
+        futures[future] = (emp_id, name, lpd_id)
+        outstanding[emp_id] += 1
+        return future
+
+    def finish(member):
+        if not isinstance(member.profile, dict) or not member.profile or "error" in member.profile:
+            member.profile = {}
+            _mark(member, "profile")
+        for name in ("leave_types", "leave_history"):
+            if name in datasets and not isinstance(getattr(member, name), list):
+                setattr(member, name, [])
+                _mark(member, name)
+        if want_summaries and any(not isinstance(v, dict) or "error" in v for v in member.leave_summaries.values()):
+            _mark(member, "leave_summaries")
+        return member
+
+    pending = set()
+    for emp_id, member in members.items():
+        for name, fetch in _FETCHERS.items():
+            if (name == "profile" and not member.profile) or name in datasets \
+                    or (name == "leave_types" and want_summaries):
+                pending.add(submit(emp_id, name, fetch, emp_id))
+    for emp_id in [e for e, n in outstanding.items() if not n]:
+        yield finish(members[emp_id])
+
+    try:
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                emp_id, name, lpd_id = futures.pop(future)
+                member = members[emp_id]
+                value = _result(future)
+                if lpd_id is not None:
+                    member.leave_summaries[lpd_id] = value
+                else:
+                    setattr(member, name, value)
+                if name == "leave_types" and want_summaries and isinstance(value, list):
+                    for lt in value:
+                        if lt.get("Lpd_ID_N") is not None:
+                            pending.add(submit(emp_id, "leave_summaries", get_leave_summary_cached, emp_id,
+                                               str(lt["Lpd_ID_N"]), today_str, today_str,
+                                               lpd_id=lt["Lpd_ID_N"]))
+                outstanding[emp_id] -= 1
+                if not outstanding[emp_id]:
+                    yield finish(member)
+    finally:
+        for future in pending:
+            future.cancel()
+
+    timed_out = [emp_id for emp_id, n in outstanding.items() if n]
+    for emp_id, name, _ in futures.values():
+        _mark(members[emp_id], name)
+    for emp_id in timed_out:
+        yield finish(members[emp_id])
+    if timed_out:
+        logger.warning("Team load deadline (%.1fs) hit, %d of %d members incomplete",
+                       deadline, len(timed_out), len(members))
+    TEAM_LOAD_SECONDS.observe(time.monotonic() - started, outcome="degraded" if timed_out else "ok")
+    logger.info("Loaded %d team members in %.2fs", len(members), time.monotonic() - started)
+
+
+def next_week(today=None):
+    """Return the Monday and Sunday of the week after ``today``."""
+    today = today or date.today()
+    start = today + timedelta(days=7 - today.weekday())
+    return start, start + timedelta(days=6)
+
+
+def availability(members, start, end, statuses=ACTIVE_STATUSES):
+    """Return who in ``members`` is on leave on each day from ``start`` to ``end``.
+
+    The result's ``off`` is a boolean matrix of members by ``days``, and
+    ``leaves[i]`` lists the raw records of member ``i`` overlapping the
+    period. Pending applications count as leave by default.
+    """
+    days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    off = np.zeros((len(members), len(days)), dtype=bool)
+    leaves = []
+    for i, member in enumerate(members):
+        analytics = member.leave_analytics
+        rows = np.flatnonzero(analytics.mask(None, statuses)
+                              & (analytics.from_date <= days[-1]) & (analytics.to_date >= days[0]))
+        leaves.append([analytics.records[r] for r in rows])
+        if rows.size:
+            covered = (analytics.from_date[rows, None] <= days) & (analytics.to_date[rows, None] >= days)
+            off[i] = covered.any(axis=0)
+    return Availability(days, list(members), off, leaves)
+
+
+def balance_table(members):
+    """Return ``(leave type names, rows)`` of the members' balances.
+
+    Each row holds the member's name and their balance per leave type
+    name; types a member does not have are left out of their row.
+    """
+    names = {}
+    rows = []
+    for member in members:
+        row = {"Employee": member.name}
+        for leave_type in member.leave_index:
+            if leave_type.has_summary:
+                names.setdefault(leave_type.name, None)
+                row[leave_type.name] = leave_type.balance
+        rows.append(row)
+    return list(names), rows
@@ -0,0 +1,24 @@
+from answer_cache import GENERAL_PROCEDURE, AnswerCache, normalize_leave_phrase
+
+
+def make_cache(path, help_doc="Apply from the leave screen.", model="gpt-4o", retrieval=(4, 600)):
+    return AnswerCache.sqlite(str(path), help_doc, model, retrieval=retrieval)
+
+
+def test_answers_are_served_for_the_same_document_model_and_retrieval(tmp_path):
+    make_cache(tmp_path / "answers.db").put("sick", "Open the leave screen.")
+    assert make_cache(tmp_path / "answers.db").get("sick") == "Open the leave screen."
+
+
+def test_changing_the_prompt_inputs_misses(tmp_path):
+    path = tmp_path / "answers.db"
+    make_cache(path).put("sick", "Open the leave screen.")
+    assert make_cache(path, help_doc="Apply in the new portal.").get("sick") is None
+    assert make_cache(path, model="gpt-4.1").get("sick") is None
+    assert make_cache(path, retrieval=(2, 600)).get("sick") is None
+    assert make_cache(path, retrieval=(4, 300)).get("sick") is None
+
+
+def test_normalize_leave_phrase():
+    assert normalize_leave_phrase("Sick  Leave?") == "sick"
+    assert normalize_leave_phrase("leave") == GENERAL_PROCEDURE
@@ -0,0 +1,93 @@
+from conversation import HistoryManager, split_turns, summarize_turn
+
+SYSTEM = {"role": "system", "content": "You are an HR assistant."}
+
+
+def chat(turns, words=20):
+    messages = [dict(SYSTEM)]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i} " + "word " * words})
+        messages.append({"role": "assistant", "content": f"answer {i} " + "word " * words})
+    return messages
+
+
+def contents(request):
+    return [m["content"] for m in request]
+
+
+def test_split_turns_starts_a_turn_at_each_user_message():
+    messages = chat(2)[1:]
+    assert [len(turn) for turn in split_turns(messages)] == [2, 2]
+
+
+def test_short_history_is_sent_verbatim():
+    messages = chat(3)
+    state = {}
+    request, usage = HistoryManager(token_budget=6000, keep_turns=6).build(messages, state)
+    assert request == messages
+    assert usage["summarized_turns"] == 0 and usage["used"] <= 6000
+
+
+def test_turns_beyond_keep_turns_are_folded_into_the_summary_once():
+    messages = chat(5)
+    state = {}
+    manager = HistoryManager(token_budget=6000, keep_turns=2)
+    request, usage = manager.build(messages, state)
+    assert usage["turns"] == 2 and usage["summarized_turns"] == 3
+    assert request[1]["role"] == "system" and request[1]["content"].startswith("Summary of the earlier conversation")
+    assert contents(request[2:]) == contents(messages[-4:])
+    assert state["folded"] == 6
+
+    messages += chat(1)[1:]
+    _, usage = manager.build(messages, state)
+    assert usage["summarized_turns"] == 4
+    assert state["lines"][0] == summarize_turn(messages[1:3])
+
+
+def test_request_is_trimmed_to_the_token_budget_keeping_the_latest_turn():
+    messages = chat(6, words=100)
+    manager = HistoryManager(token_budget=400, keep_turns=6)
+    request, usage = manager.build(messages, {})
+    assert usage["used"] <= 400
+    assert contents(request[-2:]) == contents(messages[-2:])
+    assert usage["turns"] < 6
+
+
+def test_oldest_summary_lines_are_dropped_past_the_summary_share():
+    state = {}
+    manager = HistoryManager(token_budget=400, keep_turns=1, summary_share=0.25)
+    request, _ = manager.build(chat(20, words=30), state)
+    assert state.get("trimmed")
+    summary = request[1]["content"]
+    assert "(oldest part omitted)" in summary
+    assert "question 0 " not in summary and "question 18 " in summary
+
+
+def test_latest_turn_is_kept_even_when_over_budget():
+    messages = chat(1, words=1000)
+    request, usage = HistoryManager(token_budget=100).build(messages, {})
+    assert contents(request) == contents(messages)
+    assert usage["used"] > 100
+
+
+def test_tool_payloads_of_answered_turns_are_dropped():
+    messages = [
+        dict(SYSTEM),
+        {"role": "user", "content": "what is my balance"},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "1"}]},
+        {"role": "tool", "tool_call_id": "1", "content": "{\"balance\": 5}"},
+        {"role": "assistant", "content": "You have 5 days."},
+        {"role": "user", "content": "and sick leave?"},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "2"}]},
+        {"role": "tool", "tool_call_id": "2", "content": "{\"balance\": 3}"},
+    ]
+    request, usage = HistoryManager().build(messages, {})
+    assert usage["dropped_payloads"] == 2
+    assert [m["role"] for m in request] == ["system", "user", "assistant", "user", "assistant", "tool"]
+
+
+def test_system_content_replaces_the_prompt_for_this_request_only():
+    messages = chat(1)
+    request, _ = HistoryManager().build(messages, {}, system_content="With excerpts")
+    assert request[0]["content"] == "With excerpts"
+    assert messages[0]["content"] == SYSTEM["content"]
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from erp_cache import MemoryBackend, SingleFlight, SWRCache
+
+KEY = ("leave_types", "7000")
+
+
+class Loader:
+    """Returns the queued results in order and counts its calls."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = 0
+
+    def __call__(self, emp_id):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+def make_cache(**kwargs):
+    return SWRCache(backend=MemoryBackend(), **kwargs)
+
+
+def store(cache, value, age, ttl=60):
+    now = time.time()
+    cache.backend.set(KEY, value, now - age, now - age + ttl + cache.grace + cache.stale_if_error)
+
+
+def wait_for_refresh(cache):
+    cache._executor.shutdown(wait=True)
+
+
+def test_fresh_values_are_served_without_loading():
+    cache = make_cache(grace=300)
+    store(cache, ["fresh"], age=10)
+    loader = Loader()
+    assert cache.get_or_load(KEY, 60, loader, "7000") == ["fresh"]
+    assert loader.calls == 0
+    assert cache.stats()["hit"] == 1
+
+
+def test_stale_values_are_served_and_refreshed_in_the_background():
+    cache = make_cache(grace=300)
+    store(cache, ["stale"], age=120)
+    loader = Loader(["new"])
+    assert cache.get_or_load(KEY, 60, loader, "7000") == ["stale"]
+    wait_for_refresh(cache)
+    assert loader.calls == 1
+    assert cache.stats()["refreshed"] == 1
+    assert cache.get_or_load(KEY, 60, Loader(), "7000") == ["new"]
+
+
+def test_failed_refresh_keeps_the_stale_value():
+    cache = make_cache(grace=300)
+    store(cache, ["stale"], age=120)
+    assert cache.get_or_load(KEY, 60, Loader({"error": "down"}), "7000") == ["stale"]
+    wait_for_refresh(cache)
+    assert cache.stats()["refresh_error"] == 1
+    assert cache.backend.get(KEY)[0] == ["stale"]
+
+
+def test_values_past_the_grace_window_are_loaded_by_the_caller():
+    cache = make_cache(grace=30)
+    store(cache, ["old"], age=120)
+    loader = Loader(["new"])
+    assert cache.get_or_load(KEY, 60, loader, "7000") == ["new"]
+    assert loader.calls == 1
+    assert cache.stats()["miss"] == 1
+
+
+def test_errors_are_returned_but_never_stored():
+    cache = make_cache()
+    assert cache.get_or_load(KEY, 60, Loader({"error": "down"}), "7000") == {"error": "down"}
+    assert cache.backend.get(KEY) is None
+    assert cache.get_or_load(KEY, 60, Loader(["ok"]), "7000") == ["ok"]
+
+
+def test_stale_if_error_serves_the_expired_value_when_the_load_fails():
+    cache = make_cache(grace=30, stale_if_error=3600)
+    store(cache, ["expired"], age=600)
+    assert cache.get_or_load(KEY, 60, Loader({"error": "circuit open", "unavailable": True}), "7000") == ["expired"]
+    assert cache.stats()["stale_if_error"] == 1
+
+
+def test_without_stale_if_error_the_error_is_returned():
+    cache = make_cache(grace=30)
+    store(cache, ["expired"], age=600)
+    # The entry has expired in the backend as well.
+    assert cache.get_or_load(KEY, 60, Loader({"error": "down"}), "7000") == {"error": "down"}
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ["value"] * 4
+    assert len(calls) == 1
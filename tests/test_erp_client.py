@@ -0,0 +1,108 @@
+from unittest import mock
+
+import pytest
+import requests
+
+from erp_client import CircuitBreaker, ERPClient
+
+URLS = {"employee": "http://erp.test/employee", "leave_types": "http://erp.test/leave_types",
+        "history": "http://erp.test/history", "summary": "http://erp.test/summary"}
+
+
+def make_client(**kwargs):
+    kwargs.setdefault("max_retries", 0)
+    return ERPClient(URLS, failure_threshold=2, **kwargs)
+
+
+def response(status=200, payload=None, json_error=None):
+    resp = mock.Mock(status_code=status)
+    resp.raise_for_status.side_effect = (
+        requests.HTTPError(f"{status} error", response=resp) if status >= 400 else None)
+    resp.json.side_effect = json_error
+    resp.json.return_value = payload
+    return resp
+
+
+def test_breaker_opens_after_threshold_and_refuses_calls():
+    breaker = CircuitBreaker("employee", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("employee", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker("employee", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_half_open_probe_success_closes_and_failure_reopens():
+    breaker = CircuitBreaker("employee", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    breaker.reset_timeout = 60
+    breaker._opened_at -= 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_connection_errors_open_the_circuit_and_fail_fast():
+    client = make_client(reset_timeout=60)
+    with mock.patch.object(client.session, "request", side_effect=requests.ConnectionError("refused")) as send:
+        assert client.get_leave_types("7000")["unavailable"]
+        assert client.get_leave_types("7000")["unavailable"]
+        result = client.get_leave_types("7000")
+    assert send.call_count == 2
+    assert result == {"error": "ERP leave_types service is temporarily unavailable.", "unavailable": True}
+    assert client.circuit_states()["leave_types"] == CircuitBreaker.OPEN
+    assert client.circuit_states()["history"] == CircuitBreaker.CLOSED
+
+
+def test_client_errors_do_not_count_as_failures():
+    client = make_client()
+    with mock.patch.object(client.session, "request", return_value=response(404)):
+        for _ in range(3):
+            assert "error" in client.get_leave_types("7000")
+    assert client.circuit_states()["leave_types"] == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_raising_a_non_requests_error_does_not_lock_the_endpoint():
+    client = make_client(reset_timeout=0)
+    html = response(200, json_error=ValueError("Expecting value: line 1 column 1 (char 0)"))
+    with mock.patch.object(client.session, "request", side_effect=requests.ConnectionError("refused")):
+        client.get_leave_types("7000")
+        client.get_leave_types("7000")
+    assert client.circuit_states()["leave_types"] == CircuitBreaker.HALF_OPEN
+
+    with mock.patch.object(client.session, "request", return_value=html):
+        assert "error" in client.get_leave_types("7000")
+    with mock.patch.object(client.session, "request", return_value=response(200, [{"Lpd_ID_N": 1}])) as send:
+        assert client.get_leave_types("7000") == [{"Lpd_ID_N": 1}]
+    send.assert_called_once()
+    assert client.circuit_states()["leave_types"] == CircuitBreaker.CLOSED
+
+
+def test_unexpected_error_propagates_from_request():
+    client = make_client()
+    with mock.patch.object(client.session, "request", return_value=response(200, json_error=ValueError("bad"))):
+        with pytest.raises(ValueError):
+            client._request("employee", "POST")
+    assert client.breakers["employee"]._failures == 1
@@ -0,0 +1,46 @@
+import pytest
+
+import engine
+from answer_cache import GENERAL_PROCEDURE
+from help_index import HelpIndex
+
+HELP_DOC = """In this form the user enters the leave applied by employees.
+
+
+How to add Leave Application details?
+1. Go to the HRMS module.
+2. From the TRANSACTION menu select Leave Application.
+3. Fill in the fields and click Submit.
+
+
+Overview
+
+Employee Code - Select the employee the Leave Application is created for.
+Medical Certificate - Attach a certificate for sick leave of more than two days.
+Air Ticket Eligibility % - The percentage of leave eligible for an air ticket.
+"""
+
+
+@pytest.fixture
+def help_doc(monkeypatch):
+    monkeypatch.setattr(engine, "current_help_doc", lambda: HELP_DOC)
+    monkeypatch.setattr(engine, "get_help_index", HelpIndex.from_text)
+
+
+def prompt(question):
+    _, messages = engine.procedure_messages(question)
+    return messages[0]["content"]
+
+
+def test_procedure_steps_are_found_for_a_question_worded_unlike_the_heading(help_doc):
+    # Nothing in "apply for sick leave" says "how to add ... details".
+    text = prompt("sick")
+    assert "How to add Leave Application details?" in text
+    assert "Medical Certificate" in text
+    assert "Air Ticket" not in text
+
+
+def test_general_procedure_question_gets_the_steps(help_doc):
+    text = prompt(GENERAL_PROCEDURE)
+    assert "1. Go to the HRMS module." in text
+    assert "Medical Certificate" not in text
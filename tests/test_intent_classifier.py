@@ -0,0 +1,45 @@
+import pytest
+
+from intent_classifier import FALLBACK, IntentClassifier, char_ngrams
+
+EXAMPLES = [
+    ("what is my leave balance", "leave_balance"),
+    ("how many leaves do i have left", "leave_balance"),
+    ("who is my manager", "manager"),
+    ("who is my reporting manager", "manager"),
+    ("can i carry forward unused leave", FALLBACK),
+]
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier(EXAMPLES, threshold=0.5)
+
+
+def test_char_ngrams_are_taken_within_padded_words():
+    assert char_ngrams("Hi!", sizes=(3,)) == [" hi", "hi "]
+    assert char_ngrams("a b", sizes=(3,)) == [" a ", " b "]
+
+
+def test_similarity_is_one_for_a_training_phrase(classifier):
+    intent, score = classifier.nearest("who is my manager")
+    assert intent == "manager" and score == pytest.approx(1.0, abs=1e-5)
+
+
+def test_paraphrases_and_typos_get_the_nearest_intent(classifier):
+    assert classifier.classify("whats my leave balanse")[0] == "leave_balance"
+    assert classifier.classify("who is my reportng manager")[0] == "manager"
+
+
+def test_messages_below_the_threshold_are_not_classified(classifier):
+    assert classifier.classify("good morning") is None
+    assert classifier.classify("") is None
+
+
+def test_messages_closest_to_a_fallback_phrase_are_not_classified(classifier):
+    assert classifier.nearest("can i carry forward my unused leave")[0] == FALLBACK
+    assert classifier.classify("can i carry forward my unused leave") is None
+
+
+def test_duplicate_examples_are_kept_once():
+    assert len(IntentClassifier(EXAMPLES + EXAMPLES[:2])) == len(EXAMPLES)
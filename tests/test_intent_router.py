@@ -0,0 +1,195 @@
+import re
+
+import pytest
+
+from intent_classifier import FALLBACK, IntentClassifier
+from intent_router import IntentRouter, LazyContext, Rule, build_default_router
+from leave_type_index import LeaveTypeIndex
+
+CONTEXT = {"pending_leave_application": None, "leave_index": LeaveTypeIndex()}
+
+
+@pytest.fixture(scope="module")
+def router():
+    return build_default_router()
+
+
+def intent(router, text):
+    route = router.route(text, CONTEXT)
+    return route.intent if route else None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("what is my monthly salary", None),
+    ("my monthly pay slip", None),
+    ("each month", None),
+    ("my last leave", "last_leave"),
+    ("how many leaves did i take this year", "leaves_this_year"),
+    ("show me my leave days per month", "monthly_usage"),
+    ("which month did i take the most leave", "monthly_usage"),
+    ("monthly leave usage", "monthly_usage"),
+    ("how many days of each leave type did i take this year", "days_by_type"),
+])
+def test_analytics_rules_do_not_take_over_other_messages(router, text, expected):
+    assert intent(router, text) == expected
+
+
+HISTORY_INTENTS = {"leaves_this_year", "leaves_this_month", "list_leaves", "last_approved_leave", "last_leave"}
+
+
+@pytest.mark.parametrize("text", [
+    "leave applications",
+    "all leave applications",
+    "show me all my leave applications",
+])
+def test_leave_application_listings_are_not_overlap_reports(router, text):
+    assert intent(router, text) in HISTORY_INTENTS
+
+
+@pytest.mark.parametrize("text", [
+    "do any of my leave applications overlap",
+    "back to back leaves",
+    "are any of my leaves back-to-back",
+])
+def test_overlap_questions_reach_the_overlap_report(router, text):
+    assert intent(router, text) == "overlapping_leaves"
+
+
+def test_approval_time_questions_go_to_the_llm(router):
+    assert intent(router, "how long does leave approval take") is None
+    assert "approval_lag" not in {rule.name for rule in router.rules}
+
+
+class StubClassifier:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def classify(self, text):
+        self.calls += 1
+        return self.result
+
+
+def test_rules_are_tried_in_order():
+    router = IntentRouter([Rule("first", substrings=("leave",)), Rule("second", substrings=("leave balance",))])
+    assert router.route("my leave balance").intent == "first"
+
+
+def test_exclude_vetoes_a_rule_and_the_next_one_is_tried():
+    router = IntentRouter([Rule("first", substrings=("leave",), exclude=re.compile("balance")),
+                           Rule("second", substrings=("leave balance",))])
+    assert router.route("my leave balance").intent == "second"
+
+
+def test_guard_can_veto_a_rule_or_pass_data_on():
+    router = IntentRouter([
+        Rule("pending", pattern=re.compile(r"for (\w+) leave"), guard=lambda t, m, c: c.get("pending")),
+        Rule("typed", pattern=re.compile(r"for (\w+) leave"), guard=lambda t, m, c: m.group(1)),
+    ])
+    assert router.route("apply for sick leave", {"pending": None}).intent == "typed"
+    assert router.route("apply for sick leave", {"pending": None}).data == "sick"
+    assert router.route("apply for sick leave", {"pending": {"days": 2}}).intent == "pending"
+
+
+def test_fuzzy_rules_need_their_threshold():
+    router = IntentRouter([Rule("balance", keywords=("leave balance",), threshold=90)])
+    assert router.route("what is my leave balance").intent == "balance"
+    assert router.route("what is my leave policy") is None
+
+
+@pytest.mark.parametrize("fuzzy_block", [1, 5, 1000])
+def test_fuzzy_block_size_does_not_change_the_route(fuzzy_block):
+    rules = [
+        Rule("balance", keywords=("leave balance", "leaves remaining"), threshold=90),
+        Rule("manager", substrings=("manager",)),
+        Rule("policy", keywords=("leave policy", "leave rules", "leave entitlements"), threshold=90),
+        Rule("approver", keywords=("who approves my leave",), threshold=80),
+    ]
+    router = IntentRouter(rules, fuzzy_block=fuzzy_block)
+    assert router.route("what is my leave balance").intent == "balance"
+    assert router.route("who is my manager").intent == "manager"
+    assert router.route("what are the leave rules").intent == "policy"
+    assert router.route("who approves my leave request").intent == "approver"
+    assert router.route("tell me a joke") is None
+    assert set(router.fuzzy_scores("leave rules")) == {"balance", "policy", "approver"}
+
+
+def test_classifier_is_only_asked_when_no_rule_matches():
+    classifier = StubClassifier(("balance", 0.8))
+    router = IntentRouter([Rule("manager", substrings=("manager",)),
+                           Rule("balance", keywords=("leave balance",), learned=True)], classifier)
+    assert router.route("who is my manager").intent == "manager"
+    assert classifier.calls == 0
+    route = router.route("how much time off remains")
+    assert (route.intent, route.score, route.match, route.data) == ("balance", 80.0, None, None)
+
+
+def test_classifier_cannot_route_to_rules_that_are_not_learned():
+    router = IntentRouter([Rule("apply_leave", pattern=re.compile(r"apply for (\d+)"))],
+                          StubClassifier(("apply_leave", 0.9)))
+    assert router.route("i want some days off") is None
+
+
+def test_classifier_matches_respect_the_rule_exclude():
+    router = IntentRouter([Rule("balance", keywords=("leave balance",), exclude=re.compile("salary"),
+                                learned=True)], StubClassifier(("balance", 0.9)))
+    assert router.route("how much salary remains") is None
+
+
+def test_lazy_context_values_are_computed_on_first_access_only():
+    calls = []
+    context = LazyContext(leave_index=lambda: calls.append(1) or "index", pending=None)
+    router = IntentRouter([Rule("first", substrings=("leave",)),
+                           Rule("needs_index", guard=lambda t, m, c: c["leave_index"])])
+    router.route("leave", context)
+    assert calls == []
+    assert router.route("hello", context).intent == "needs_index"
+    assert context["leave_index"] == "index" and calls == [1]
+
+
+@pytest.fixture(scope="module")
+def classifying_router():
+    examples = [("how much time off do i have", "leave_balance"), ("tell me a joke", FALLBACK)]
+    return build_default_router(examples, classifier_threshold=0.5)
+
+
+def test_default_router_prefers_rules_over_the_classifier(classifying_router):
+    route = classifying_router.route("what is my leave balance", CONTEXT)
+    assert route.intent == "leave_balance" and route.match is None and route.score >= 85
+
+
+def test_default_router_classifies_paraphrases_the_rules_miss(classifying_router, router):
+    assert intent(router, "how much time off do i have left") is None
+    assert intent(classifying_router, "how much time off do i have left") == "leave_balance"
+    assert intent(classifying_router, "tell me a joke please") is None
+
+
+def test_default_router_rejects_examples_for_unroutable_intents():
+    with pytest.raises(ValueError):
+        build_default_router([("apply for 2 days sick leave", "apply_leave")], classifier_threshold=0.5)
+
+
+def test_default_classifier_is_trained_on_learned_rule_phrases(classifying_router):
+    assert isinstance(classifying_router.classifier, IntentClassifier)
+    labels = set(classifying_router.classifier.labels)
+    assert {"leave_balance", "list_leaves", FALLBACK} <= labels
+    assert "apply_leave" not in labels
+
+
+def test_single_word_phrases_are_not_training_examples():
+    from intent_router import DEFAULT_RULES, rule_examples
+
+    phrases = [phrase for phrase, _ in rule_examples(DEFAULT_RULES)]
+    assert "visa" not in phrases and "shift" not in phrases
+    assert "visa type" in phrases
+
+
+@pytest.mark.parametrize("text", ["what is my pay type", "what's my staff category", "my rp number"])
+def test_unrelated_profile_questions_go_to_the_llm(text):
+    import os
+
+    from intent_classifier import load_examples
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "intent_examples.jsonl")
+    router = build_default_router(load_examples(path), classifier_threshold=0.5)
+    assert intent(router, text) is None
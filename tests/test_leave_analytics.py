@@ -0,0 +1,50 @@
+import numpy as np
+
+from leave_analytics import LeaveAnalytics
+from leave_history import LeaveHistory
+
+
+def application(ref, leave_type, status, start, end, days):
+    return {
+        "LeaveGrid_Ela_RefferNo_V": ref,
+        "LeaveGrid_Lvm_Description_V": leave_type,
+        "LeaveGrid_Status": status,
+        "LeaveGrid_Ela_FromDate_D": start,
+        "LeaveGrid_Ela_ToDate_D": end,
+        "LeaveGrid_Ela_Tot": days,
+    }
+
+
+RECORDS = [
+    application("LP-1", "ANNUAL LEAVE", "Approved", "2024-01-08T00:00:00", "2024-01-12T00:00:00", "5"),
+    # Friday to Monday: back to back with the next one over the weekend.
+    application("LP-2", "SICK LEAVE ", "Approved", "2024-03-01T00:00:00", "2024-03-01T00:00:00", "1"),
+    application("LP-3", "ANNUAL LEAVE", "Pending", "2024-03-04T00:00:00", "2024-03-06T00:00:00", "3"),
+    application("LP-4", "ANNUAL LEAVE", "Approved", "2024-03-05T00:00:00", "2024-03-07T00:00:00", "x"),
+    application("LP-5", "SICK LEAVE", "Approved", "", None, "2"),
+]
+
+
+def test_columns_reuse_the_parsed_history():
+    analytics = LeaveAnalytics(LeaveHistory(RECORDS))
+    assert analytics.records == RECORDS
+    assert analytics.from_date[:2].tolist() == [np.datetime64("2024-01-08"), np.datetime64("2024-03-01")]
+    assert np.isnat(analytics.from_date[4]) and np.isnat(analytics.to_date[4])
+    assert analytics.days.tolist() == [5.0, 1.0, 3.0, 0.0, 2.0]
+    assert analytics.types.tolist() == ["ANNUAL LEAVE", "SICK LEAVE"]
+
+
+def test_raw_records_give_the_same_columns():
+    from_list, from_history = LeaveAnalytics(RECORDS), LeaveAnalytics(LeaveHistory(RECORDS))
+    for column in ("from_date", "to_date", "days", "type_codes", "status_codes", "year", "month"):
+        np.testing.assert_array_equal(getattr(from_list, column), getattr(from_history, column))
+    assert len(LeaveAnalytics()) == 0
+
+
+def test_aggregates():
+    analytics = LeaveAnalytics(RECORDS)
+    assert analytics.days_by_type(2024) == {"ANNUAL LEAVE": 5.0, "SICK LEAVE": 1.0}
+    assert analytics.monthly_usage(2024)[[0, 2]].tolist() == [5.0, 1.0]
+    overlapping, back_to_back = analytics.adjacent_pairs()
+    assert overlapping == [(2, 3)]
+    assert back_to_back == [(1, 2)]
@@ -0,0 +1,61 @@
+import pytest
+
+from intent_router import build_default_router
+from leave_type_index import LeaveTypeIndex, normalize_leave_name
+
+LEAVE_TYPES = [
+    {"Lpd_ID_N": 1, "Lvm_Description_V": "ANNUAL LEAVE"},
+    {"Lpd_ID_N": 2, "Lvm_Description_V": "SICK LEAVE"},
+    {"Lpd_ID_N": 3, "Lvm_Description_V": "LEAVE WITHOUT PAY"},
+    {"Lpd_ID_N": 4, "Lvm_Description_V": "EMERGENCY LEAVE"},
+]
+SUMMARIES = {i: {"Balance": str(i * 2), "Eligible": "30"} for i in range(1, 5)}
+
+
+@pytest.fixture(scope="module")
+def index():
+    return LeaveTypeIndex(LEAVE_TYPES, SUMMARIES)
+
+
+def name(leave_type):
+    return leave_type.name if leave_type is not None else None
+
+
+def test_normalize_leave_name():
+    assert normalize_leave_name("Annual  Leave") == "annual"
+    assert normalize_leave_name("leave") == "leave"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("annual", "ANNUAL LEAVE"),
+    ("Annual Leave", "ANNUAL LEAVE"),
+    ("al", "ANNUAL LEAVE"),
+    ("vacation", "ANNUAL LEAVE"),
+    ("lwp", "LEAVE WITHOUT PAY"),
+    ("leave without pay", "LEAVE WITHOUT PAY"),
+    ("emergancy", "EMERGENCY LEAVE"),
+    ("leave", None),
+    ("days", None),
+])
+def test_lookup(index, query, expected):
+    assert name(index.lookup(query)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("how much leave do i have left", None),
+    ("leave left", None),
+    ("how many days left", None),
+    ("how many sl left", None),
+    ("how many sl leave left", "SICK LEAVE"),
+    ("how many sick leaves left", "SICK LEAVE"),
+    ("how many vacation days left", "ANNUAL LEAVE"),
+    ("how much leave without pay is left", "LEAVE WITHOUT PAY"),
+])
+def test_find_in_needs_the_type_to_be_named(index, text, expected):
+    assert name(index.find_in(text)) == expected
+
+
+@pytest.mark.parametrize("text", ["how much leave do i have left", "leave left"])
+def test_generic_leave_left_questions_are_not_routed_to_one_type(index, text):
+    route = build_default_router().route(text, {"pending_leave_application": None, "leave_index": index})
+    assert route is None or route.intent != "leave_type_left"
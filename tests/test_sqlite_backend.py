@@ -0,0 +1,80 @@
+import os
+import time
+
+from erp_cache import SQLiteBackend, create_backend
+
+# Incompressible enough that every payload is stored at roughly this size.
+PAYLOAD = os.urandom(600).hex()
+
+
+def make_backend(tmp_path, max_bytes, **kwargs):
+    return SQLiteBackend(str(tmp_path / "cache.sqlite3"), max_bytes=max_bytes, **kwargs)
+
+
+def put(backend, key, value=PAYLOAD, ttl=3600):
+    now = time.time()
+    backend.set(key, value, now, now + ttl)
+
+
+def entry_size(backend, key):
+    k = backend._encode_key(key)
+    return backend._conn().execute(f"SELECT size FROM {backend.table} WHERE key = ?", (k,)).fetchone()[0]
+
+
+def test_values_round_trip(tmp_path):
+    backend = make_backend(tmp_path, max_bytes=1024 * 1024)
+    now = time.time()
+    backend.set(("history", "7000"), [{"LeaveGrid_Ela_Tot": 2}], now, now + 60)
+    assert backend.get(("history", "7000")) == ([{"LeaveGrid_Ela_Tot": 2}], now)
+    assert backend.get(("history", "7001")) is None
+
+
+def test_expired_entries_are_ignored_and_purged(tmp_path):
+    backend = make_backend(tmp_path, max_bytes=1024 * 1024)
+    put(backend, ("a",), ttl=-1)
+    assert backend.get(("a",)) is None
+    put(backend, ("b",))
+    assert len(backend) == 1
+
+
+def test_least_recently_used_entries_are_evicted_by_size(tmp_path):
+    backend = make_backend(tmp_path, max_bytes=1024 * 1024, touch_interval=0)
+    put(backend, ("probe",))
+    size = entry_size(backend, ("probe",))
+    backend.clear()
+    backend.max_bytes = 3 * size
+
+    for name in ("a", "b", "c"):
+        put(backend, (name,))
+        time.sleep(0.01)
+    # Reading "a" makes "b" the least recently used entry.
+    assert backend.get(("a",)) is not None
+    time.sleep(0.01)
+    put(backend, ("d",))
+
+    assert backend.get(("b",)) is None
+    assert all(backend.get((name,)) is not None for name in ("a", "c", "d"))
+    assert len(backend) == 3
+
+
+def test_total_size_stays_within_the_bound(tmp_path):
+    backend = make_backend(tmp_path, max_bytes=10 * 1024)
+    for i in range(100):
+        put(backend, ("employee", str(i)))
+    total = backend._conn().execute(f"SELECT SUM(size) FROM {backend.table}").fetchone()[0]
+    assert total <= 10 * 1024
+    assert backend.get(("employee", "99")) is not None
+
+
+def test_tables_share_a_file_independently(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    erp = SQLiteBackend(path)
+    answers = SQLiteBackend(path, table="answers")
+    put(erp, ("k",), "erp")
+    assert answers.get(("k",)) is None
+    answers.clear()
+    assert erp.get(("k",))[0] == "erp"
+
+
+def test_create_backend_by_name(tmp_path):
+    assert type(create_backend("sqlite", str(tmp_path / "c.sqlite3"))) is SQLiteBackend
@@ -0,0 +1,184 @@
+"""Tools offered to the LLM fallback and their execution.
+
+Tool calls are answered from the conversation's already-loaded session
+data when it holds the requested dataset for the same employee, and
+otherwise dispatched to the cached ERP fetchers. :func:`execute_tool_calls`
+runs all the calls of one model reply at the same time.
+"""
+import json
+import logging
+from datetime import datetime
+
+from metrics import TOOL_CALLS
+from resources import (
+    get_employee_details_cached, get_leave_applications_cached, get_leave_summary_cached,
+    get_leave_types_cached, get_tool_executor,
+)
+
+logger = logging.getLogger(__name__)
+
+# Session dataset holding the full result of a tool (for the same employee).
+TOOL_DATASETS = {
+    "get_employee_details": "profile",
+    "get_leave_types": "leave_types",
+    "get_leave_applications": "leave_history",
+}
+
+# OpenAI tool schema, built once per process.
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_employee_details",
+            "description": "Fetch ERP employee details using employee ID",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "emp_id": {"type": "string", "description": "Employee ID"}
+                },
+                "required": ["emp_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_leave_types",
+            "description": "Fetch all leave types available for an employee",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "emp_id": {"type": "string", "description": "Employee ID"}
+                },
+                "required": ["emp_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_leave_applications",
+            "description": "Fetch all leave applications for a given employee (excluding status 0 and 6)",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "emp_id": {"type": "string", "description": "Employee ID"}
+                },
+                "required": ["emp_id"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_leave_summary",
+            "description": "Fetch leave summary for an employee between two dates",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "emp_id": {"type": "string", "description": "Employee ID"},
+                    "leave_type_id": {"type": "string", "description": "Leave type ID"},
+                    "from_date": {"type": "string", "description": "Start date (YYYY-MM-DD)"},
+                    "to_date": {"type": "string", "description": "End date (YYYY-MM-DD)"}
+                },
+                "required": ["emp_id", "leave_type_id", "from_date", "to_date"]
+            }
+        }
+    }
+]
+
+
+def tool_arguments(call):
+    """Return the arguments of ``call`` as a dictionary."""
+    args = call.arguments if not isinstance(call.arguments, str) else json.loads(call.arguments or "{}")
+    return args if isinstance(args, dict) else {}
+
+
+def session_result(name, args, data, emp_id):
+    """Return the result of tool ``name`` from loaded session ``data``, or ``None``.
+
+    Only calls about the session's own employee are answered, and only from
+    datasets that loaded successfully. Leave summaries are held for today's
+    date, so summary calls are answered for that range only.
+    """
+    if data is None or str(args.get("emp_id", "")).strip() != str(emp_id):
+        return None
+    dataset = TOOL_DATASETS.get(name)
+    if dataset is not None:
+        if not data.is_loaded(dataset):
+            return None
+        value = data.peek(dataset)
+        return list(value) if dataset == "leave_history" else value
+    if name == "get_leave_summary" and data.is_loaded("leave_summaries"):
+        today = datetime.now().strftime("%Y-%m-%d")
+        if args.get("from_date") == today and args.get("to_date") == today:
+            wanted = str(args.get("leave_type_id", "")).strip()
+            for lpd_id, summary in data.peek("leave_summaries", {}).items():
+                if str(lpd_id) == wanted:
+                    return summary
+    return None
+
+
+def _call_erp(call, args):
+    try:
+        result = handle_function_call(call, args)
+    except Exception as exc:
+        logger.exception("Tool '%s' failed", call.name)
+        TOOL_CALLS.inc(tool=call.name, source="error")
+        return {"error": str(exc) or type(exc).__name__}
+    TOOL_CALLS.inc(tool=call.name, source="erp")
+    return result
+
+
+def execute_tool_calls(calls, data=None, emp_id=None):
+    """Return the results of ``calls``, in order.
+
+    Calls that the session ``data`` of employee ``emp_id`` can answer cost
+    no ERP request. The others run concurrently on the tool executor.
+    """
+    results = [None] * len(calls)
+    remote = []
+    for i, call in enumerate(calls):
+        try:
+            args = tool_arguments(call)
+        except ValueError:
+            results[i] = {"error": "Invalid arguments."}
+            TOOL_CALLS.inc(tool=call.name, source="error")
+            continue
+        local = session_result(call.name, args, data, emp_id)
+        if local is not None:
+            logger.info("Tool '%s' answered from session data", call.name)
+            TOOL_CALLS.inc(tool=call.name, source="session")
+            results[i] = local
+        else:
+            remote.append((i, call, args))
+    if len(remote) == 1:
+        i, call, args = remote[0]
+        results[i] = _call_erp(call, args)
+    elif remote:
+        executor = get_tool_executor()
+        futures = [(i, executor.submit(_call_erp, call, args)) for i, call, args in remote]
+        for i, future in futures:
+            results[i] = future.result()
+    return results
+
+
+def handle_function_call(call, args=None):
+    """Dispatch an OpenAI function call to the appropriate helper."""
+    name = call.name
+    if args is None:
+        args = tool_arguments(call)
+    if name == "get_employee_details":
+        return get_employee_details_cached(args.get("emp_id", ""))
+    if name == "get_leave_types":
+        return get_leave_types_cached(args.get("emp_id", ""))
+    if name == "get_leave_applications":
+        return get_leave_applications_cached(args.get("emp_id", ""))
+    if name == "get_leave_summary":
+        return get_leave_summary_cached(
+            args.get("emp_id", ""),
+            args.get("leave_type_id", ""),
+            args.get("from_date", ""),
+            args.get("to_date", "")
+        )
+    return {"error": "Unknown function."}